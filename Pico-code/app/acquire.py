@@ -0,0 +1,251 @@
+# app/acquire.py
+# Oversampled acquisition: a sensor measured on a fixed grid faster than the
+# log rate, each channel low-pass filtered in integer arithmetic and read
+# out once per logged row
+import math
+import time
+from array import array
+
+from app.scheduler import FixedRate
+
+try:
+    # viper machine code where the firmware has the native emitter
+    from app.kernels import fir, iir
+except Exception:
+    fir = None
+    iir = None
+
+# FIR taps are integers summing to 1 << _SHIFT. With 16-bit samples the
+# accumulator stays below 2**31 (a viper int).
+_SHIFT = 13
+# IIR state fraction bits (see app/kernels.py)
+_FRAC = 8
+# FIR half length cap: 2 * _MAX_HALF + 1 taps. The cutoff is at the
+# output Nyquist only while decim <= _MAX_HALF; past that a FIR would let
+# through what aliases into the logged rows, so Acquisition measures on a
+# coarser grid instead (a multiple of period_ms)
+_MAX_HALF = 64
+
+
+def _fir_py(ring, taps, n, head, mask):
+    acc = 0
+    for i in range(n):
+        acc += taps[i] * ring[(head - i) & mask]
+    return acc
+
+
+def _iir_py(state, x, k):
+    y = state[0]
+    state[0] = y + (((x << _FRAC) - y) >> k)
+
+
+if fir is None:
+    fir = _fir_py
+    iir = _iir_py
+
+
+def lowpass_taps(half):
+    """
+    Hamming-windowed sinc, 2 * half + 1 integer taps summing to 1 << _SHIFT,
+    cutoff at the Nyquist frequency of the input decimated by half.
+    """
+    n = 2 * half + 1
+    fc = 0.5 / half
+    h = []
+    for i in range(n):
+        m = i - half
+        s = 2 * fc if m == 0 else math.sin(2 * math.pi * fc * m) / (math.pi * m)
+        h.append(s * (0.54 - 0.46 * math.cos(2 * math.pi * i / (n - 1))))
+    total = sum(h)
+    taps = array("i", [int(round(v / total * (1 << _SHIFT))) for v in h])
+    # rounding residue onto the centre tap: unity gain at DC exactly
+    taps[half] += (1 << _SHIFT) - sum(taps)
+    return taps
+
+
+class FirDecimator:
+    """
+    One channel: raw integer samples into a ring of 2**k ints, the FIR runs
+    only when a value is taken (once per output, not per input). Linear
+    phase, delay = half input samples.
+    """
+    def __init__(self, decim):
+        self.half = min(decim, _MAX_HALF) if decim > 1 else 0
+        self.taps = lowpass_taps(self.half) if self.half else array("i", [1 << _SHIFT])
+        self.ntaps = len(self.taps)
+        size = 1
+        while size < self.ntaps:
+            size <<= 1
+        self.ring = array("i", [0] * size)
+        self.mask = size - 1
+        self.delay = self.half
+        # output noise std / input noise std for white noise
+        self.noise_gain = math.sqrt(sum(t * t for t in self.taps)) / (1 << _SHIFT)
+        self.reset()
+
+    def reset(self):
+        self.head = 0
+        self.n = 0
+
+    @property
+    def primed(self):
+        return self.n >= self.ntaps
+
+    def push(self, x):
+        self.head = (self.head + 1) & self.mask
+        self.ring[self.head] = x
+        self.n += 1
+
+    def value(self):
+        # rounded back to raw ticks: finer than the centi units they end up in
+        acc = fir(self.ring, self.taps, self.ntaps, self.head, self.mask)
+        return (acc + (1 << (_SHIFT - 1))) >> _SHIFT
+
+
+class IirDecimator:
+    """
+    One channel through a one-pole low-pass, y += (x - y) / 2**k per input
+    (k = log2 of the decimation), fixed point in place. Cheaper than the
+    FIR at high decimation, but not linear phase: delay ~2**k - 1 samples.
+    """
+    def __init__(self, decim):
+        k = 0
+        while (2 << k) <= decim:
+            k += 1
+        self.k = k
+        self.state = array("i", [0])
+        self.delay = (1 << k) - 1
+        a = 1 / (1 << k)
+        self.noise_gain = math.sqrt(a / (2 - a))
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+
+    @property
+    def primed(self):
+        return self.n >= (1 << self.k)
+
+    def push(self, x):
+        if not self.n:
+            self.state[0] = x << _FRAC
+        else:
+            iir(self.state, x, self.k)
+        self.n += 1
+
+    def value(self):
+        return (self.state[0] + (1 << (_FRAC - 1))) >> _FRAC
+
+
+class Acquisition:
+    """
+    Oversamples a sensor with a trigger()/fetch_raw() interface every
+    period_ms on a fixed grid: the measurement started at one slot is
+    fetched at the next, so the loop never sleeps through a conversion
+    (settle_ms; a slot closer than that to its trigger is skipped).
+    Each raw channel goes through a decimator ("fir" or "iir"). A "fir"
+    decimation over _MAX_HALF runs on the smallest multiple of period_ms
+    that brings it within (period_ms / decim hold the values used).
+
+    output() returns the filtered channels for a logged row, stamped at
+    the acquisition time they represent (the newest sample minus the
+    filter delay). Instrumentation: step_us (last fetch + trigger),
+    cost_us (filter work per filtered output), samples, missed slots.
+    """
+    def __init__(self, period_ms, decim, kind="fir", channels=2, settle_ms=15):
+        if kind != "iir" and decim > _MAX_HALF:
+            m = -(-decim // _MAX_HALF)
+            period_ms *= m
+            decim = -(-decim // m)  # rounded up: cutoff at or below the output Nyquist
+        self.period_ms = period_ms
+        self.decim = decim
+        self.kind = kind
+        self.settle_ms = settle_ms
+        cls = IirDecimator if kind == "iir" else FirDecimator
+        self.filters = [cls(decim) for _ in range(channels)]
+        self.delay_ms = self.filters[0].delay * period_ms
+        self.noise_gain = self.filters[0].noise_gain
+        self.values = [0] * channels
+        self.sched = FixedRate(period_ms)
+
+        self.samples = 0
+        self.early = 0
+        self.step_us = 0
+        self.cost_us = 0
+        self._work_us = 0
+        self.reset(time.ticks_ms())
+
+    def reset(self, now):
+        """Restart the grid at now and the filters from empty."""
+        self.sched.reset(now)
+        self.stop()
+
+    def stop(self):
+        # the sensor went away: whatever it had pending is lost, the filters
+        # refill once it is back
+        for f in self.filters:
+            f.reset()
+        self._trig_ms = None
+        self._t_last = 0
+        self.fresh = 0
+        self._work_us = 0
+
+    @property
+    def missed(self):
+        return self.sched.skipped + self.early
+
+    @property
+    def priming(self):
+        return not self.filters[0].primed
+
+    def due(self, now):
+        return self.sched.due(now)
+
+    def skip(self, now):
+        """A due slot without a usable sensor."""
+        self.sched.take(now)
+        self.stop()
+
+    def step(self, sensor, now):
+        """Fetch the pending measurement and start the next. Sensor errors propagate."""
+        t0 = time.ticks_us()
+        self.sched.take(now)
+        trig = self._trig_ms
+        try:
+            if trig is not None:
+                if time.ticks_diff(now, trig) < self.settle_ms:
+                    # a late slot left too little time: let this one go on
+                    self.early += 1
+                    return
+                self._trig_ms = None
+                raw = sensor.fetch_raw()
+                w = time.ticks_us()
+                filters = self.filters
+                for i in range(len(filters)):
+                    filters[i].push(raw[i])
+                self._work_us += time.ticks_diff(time.ticks_us(), w)
+                self._t_last = trig
+                self.samples += 1
+                self.fresh += 1
+            sensor.trigger()
+            self._trig_ms = now
+        finally:
+            self.step_us = time.ticks_diff(time.ticks_us(), t0)
+
+    def output(self):
+        """
+        ticks_ms the filtered values in .values (raw ticks, ints) stand for, or
+        None if no new sample came in since the last output (or the filters
+        are still filling).
+        """
+        if not self.fresh or self.priming:
+            return None
+        w = time.ticks_us()
+        filters = self.filters
+        values = self.values
+        for i in range(len(filters)):
+            values[i] = filters[i].value()
+        self.cost_us = self._work_us + time.ticks_diff(time.ticks_us(), w)
+        self._work_us = 0
+        self.fresh = 0
+        return time.ticks_add(self._t_last, -self.delay_ms)
@@ -1,21 +1,28 @@
 import time
-from machine import Pin, I2C, SPI
+from machine import Pin, SPI
 
 import config
 
 from drivers.display_ssd1306 import SSD1306_I2C
-from drivers.sensor_sht31 import SHT31
+from drivers.sensor_sht31 import SHT31, MEASURE_MS
 from drivers.rtc_ds3231 import DS3231
 from drivers.storage_sdcard import SDCard
+from drivers.block_cache import BlockCache
 from drivers.input_button import Button
 from drivers.output_led import LED
 
 from app.timekeeping import Timekeeper
-from app.logging import SdLogger
-from app.ui import Ui
+from app.i2c_bus import I2cBus
+from app.scheduler import FixedRate
+from app.acquire import Acquisition
+from app.memory import Memory
+from app.logging import SdLogger, RowBacklog
+from app.ui import Ui, PAGE_SAFE
+
+from onlinestats import IntStats
 
 from app.safe_mode import (
-    SafeModeManager,
+    SafeModeManager, Backoff, health_name,
     LEVEL_OK, LEVEL_WARNING, LEVEL_DEGRADED, LEVEL_CRITICAL, LEVEL_FATAL,
     level_name,
 )
@@ -23,13 +30,70 @@ from app.safe_mode import (
 
 class App:
     def __init__(self):
+        # first: the emergency exception buffer, and gc.threshold before the
+        # rest of the app allocates
+        self.mem = Memory(
+            threshold=config.GC_THRESHOLD_BYTES,
+            collect_after=config.GC_COLLECT_AFTER_BYTES,
+            slack_min_ms=config.GC_SLACK_MS,
+            emergency_buf=config.EMERGENCY_EXC_BUF,
+            probe_ms=config.MEM_PROBE_MS,
+            probe_slack_ms=config.MEM_PROBE_SLACK_MS,
+        )
+        self._mem_ms = time.ticks_ms()
+
         # LEDs should come up early so we can signal errors immediately
         self.red_led = LED(config.RED_LED_PIN, active_high=config.LED_ACTIVE_HIGH)
         self.green_led = LED(config.GREEN_LED_PIN, active_high=config.LED_ACTIVE_HIGH)
-        self.safe = SafeModeManager(self.red_led)
+        self.safe = SafeModeManager(
+            self.red_led,
+            decay_ms=config.SAFE_LEVEL_DECAY_MS,
+            event_capacity=config.EVENT_RING_SIZE,
+            coalesce_ms=config.EVENT_COALESCE_MS,
+        )
+        self.safe.on_health_change = self._health_changed
+
+        # health + re-init of each peripheral (safe.recover runs the due ones);
+        # the shared I2C bus first, the devices on it depend on it
+        self.h_i2c = self._peripheral("i2c", LEVEL_CRITICAL, self._init_i2c)
+        self.h_oled = self._peripheral("oled", LEVEL_CRITICAL, self._init_oled)
+        self.h_sensor = self._peripheral("sht31", LEVEL_DEGRADED, self._init_sensor)
+        self.h_rtc = self._peripheral("rtc", LEVEL_DEGRADED, self._init_rtc)
+        self.h_sd = self._peripheral("sd", LEVEL_WARNING, self._init_sd)
 
         self.experiment_running = False
-        self.last_sample_ms = time.ticks_ms()
+        # sample deadlines on a fixed grid (restarted with each experiment)
+        self.sampler = FixedRate(config.SAMPLE_INTERVAL_MS)
+        # the SHT31 oversampled on its own grid, filtered down to one value per row
+        self.acq = Acquisition(
+            config.ACQ_INTERVAL_MS,
+            max(1, config.SAMPLE_INTERVAL_MS // config.ACQ_INTERVAL_MS),
+            kind=config.ACQ_FILTER,
+            settle_ms=MEASURE_MS,
+        )
+        self.sd_logging = False
+        self._events_ms = time.ticks_ms()
+
+        # rolling stats for the current experiment (reset on each start)
+        # (centi-degrees C / centi-percent RH, like every sample value in here)
+        self.temp_stats = IntStats()
+        self.rh_stats = IntStats()
+
+        # last sample, shown by the dashboard
+        self.last_temp = None
+        self.last_rh = None
+        self.last_iso = ""
+        self.sample_ok = True
+
+        # loop timing (work per iteration, excluding sleeps)
+        self.loop_us = 0
+        self.loop_us_max = 0
+        self.loop_us_sum = 0
+        self.loop_n = 0
+        self.sample_us = 0
+        self._errors_seen = 0
+        # boot metric: ticks_ms (= ms since reset) when the first row was logged
+        self.first_sample_ms = None
 
         # --- Button (should almost never fail) ---
         try:
@@ -44,107 +108,308 @@ class App:
             self.safe.set_error(LEVEL_DEGRADED, "button_init", e)
             self.button = None
 
-        # --- I2C ---
-        try:
-            self.i2c = I2C(
-                config.I2C_ID,
-                sda=Pin(config.I2C_SDA),
-                scl=Pin(config.I2C_SCL),
-                freq=config.I2C_FREQ,
-            )
-        except Exception as e:
-            # Without I2C, OLED+sensor+RTC are gone => critical
-            self.safe.set_error(LEVEL_CRITICAL, "i2c_init", e)
-            self.i2c = None
-
-        # --- OLED / UI ---
-        self.ui_ok = False
-        self.oled = None
-        self.ui = None
-        if self.i2c:
+        # --- Page button (optional) ---
+        self.page_button = None
+        if config.PAGE_BUTTON_PIN is not None:
             try:
-                self.oled = SSD1306_I2C(
-                    config.OLED_WIDTH,
-                    config.OLED_HEIGHT,
-                    self.i2c,
-                    addr=config.OLED_I2C_ADDR,
+                self.page_button = Button(
+                    pin_num=config.PAGE_BUTTON_PIN,
+                    pull=config.PAGE_BUTTON_PULL,
+                    active_level=config.PAGE_BUTTON_ACTIVE_LEVEL,
+                    debounce_ms=config.BUTTON_DEBOUNCE_MS,
                 )
-                self.ui = Ui(self.oled)
-                self.ui_ok = True
             except Exception as e:
-                self.safe.set_error(LEVEL_CRITICAL, "oled_init", e)
-                self.ui_ok = False
+                # dashboard stays on its first page
+                self.safe.set_error(LEVEL_WARNING, "page_button_init", e)
+
+        # --- I2C: supervised, cleared + re-created when a slave hangs it ---
+        self.bus = I2cBus(
+            config.I2C_ID,
+            config.I2C_SDA,
+            config.I2C_SCL,
+            config.I2C_FREQ,
+            timeout_us=config.I2C_TIMEOUT_US,
+        )
+        self.bus.on_stuck = self._i2c_stuck
+        self._init_i2c(time.ticks_ms())
+
+        # --- OLED / UI: brought up from the main loop (_bring_up) ---
+        self.oled = None
+        self.ui = None
 
-        # --- Sensor ---
-        self.sensor_ok = False
+        # --- Sensor + RTC: needed for the first sample, so right away ---
         self.sensor = None
-        if self.i2c:
-            try:
-                self.sensor = SHT31(self.i2c, addr=config.SHT31_ADDR)
-                self.sensor_ok = True
-            except Exception as e:
-                self.safe.set_error(LEVEL_DEGRADED, "sht31_init", e)
-                self.sensor_ok = False
-
-        # --- RTC ---
-        self.rtc_ok = False
         self.rtc = None
         self.time = None
-        if self.i2c:
+        self._init_sensor(time.ticks_ms())
+        self._init_rtc(time.ticks_ms())
+
+        # --- SD logger ---
+        self.sd_logger = SdLogger(
+            mount_point=config.SD_MOUNT_POINT,
+            tiers_s=config.LOG_TIERS_S,
+            segment_bytes=config.LOG_SEGMENT_MAX_BYTES,
+            segment_s=config.LOG_SEGMENT_MAX_S,
+            index_every=config.LOG_INDEX_EVERY_ROWS,
+            sync_ms=config.LOG_SYNC_MS,
+            row_ms=config.SAMPLE_INTERVAL_MS,
+            codec=config.LOG_FORMAT,
+        )
+        self.sd = None
+        self.sd_dev = None
+        self.spi = None
+        # the card is brought up from the main loop; rows taken before it
+        # mounts (or while it is being retried) wait in the backlog
+        self.backlog = RowBacklog(config.LOG_BACKLOG_ROWS)
+        self._exp_base = None
+        self._exp_logged = False
+
+    # --- staged bring-up ---
+
+    def _peripheral(self, name, level, reinit):
+        return self.safe.peripheral(
+            name, level, reinit,
+            Backoff(config.PERIPH_RETRY_MS, config.PERIPH_RETRY_MAX_MS),
+            error_limit=config.HEALTH_ERROR_LIMIT,
+            window_ms=config.HEALTH_WINDOW_MS,
+            dead_after=config.HEALTH_DEAD_AFTER,
+            dead_retry_ms=config.HEALTH_DEAD_RETRY_MS,
+        )
+
+    # usable = OK or FAILING (see app/safe_mode.py Peripheral)
+    @property
+    def ui_ok(self):
+        return self.h_oled.usable
+
+    @property
+    def sensor_ok(self):
+        return self.h_sensor.usable
+
+    @property
+    def rtc_ok(self):
+        return self.h_rtc.usable
+
+    @property
+    def sd_ok(self):
+        return self.h_sd.usable
+
+    def _bring_up(self, now):
+        """
+        Staged init + recovery: due (re-)inits of failed or not yet started
+        peripherals within a per-tick time budget, then the SD log steps.
+        Called every loop iteration, so sampling runs from the start.
+        """
+        self.safe.tick(now)
+        if self.safe.recover(now, config.HEALTH_RECOVER_BUDGET_US):
+            return
+        if self.sd_ok and not self.sd_logging and (self.experiment_running or self.backlog.n):
+            self._start_logging(now)
+        elif self.sd_logging and self.backlog.n:
+            self._drain_backlog(config.LOG_BACKLOG_DRAIN_ROWS)
+        elif self.sd_logging and time.ticks_diff(now, self._events_ms) >= config.EVENT_PERSIST_MS:
+            self._events_ms = now
+            self._persist_events(now, False)
+        elif self.experiment_running and time.ticks_diff(now, self._mem_ms) >= config.MEM_LOG_MS:
+            self._mem_ms = now
+            self._mem_check(now)
+
+    def _health_changed(self, p, old, now):
+        line = "%s,%s,%d,%d,%d" % (p.name, health_name(p.state), p.uptime_ms(now), p.errors, p.recoveries)
+        if self.sd_logging:
+            try:
+                self.sd_logger.write_health(now, line)
+            except Exception:
+                pass  # the next row write reports the card
+
+    def _persist_events(self, now, force):
+        try:
+            self.sd_logger.write_events(self.safe.events, now, force)
+        except Exception as e:
+            self._sd_failed("events_write", e)
+
+    def _mem_check(self, now):
+        # heap trend to mem.csv; a leak or a shrinking heap is a warning
+        # long before it is a MemoryError
+        mem = self.mem
+        if mem.growth > config.MEM_GROWTH_WARN_BYTES:
+            self.safe.set_error(LEVEL_WARNING, "mem_growth", MemoryError("live +%d" % mem.growth))
+            mem.rebase()
+        # the current free heap, not min_free: a low-water mark never
+        # recovers, so the warning could never decay
+        if mem.free < config.MEM_LOW_FREE_BYTES:
+            self.safe.set_error(LEVEL_WARNING, "mem_low", MemoryError("free %d" % mem.free))
+        if self.sd_logging:
             try:
-                self.rtc = DS3231(self.i2c, address=config.DS3231_ADDR)
-                self.time = Timekeeper(self.rtc)
-                # quick read to confirm it responds
-                _ = self.rtc.datetime()
-                self.rtc_ok = True
+                self.sd_logger.write_mem(now, mem.row())
             except Exception as e:
-                self.safe.set_error(LEVEL_DEGRADED, "rtc_init", e)
-                self.rtc_ok = False
-                self.time = None
+                self._sd_failed("mem_write", e)
 
-        # --- SD logger ---
-        self.sd_logger = SdLogger(mount_point=config.SD_MOUNT_POINT)
-        self.sd_ok = False
-        self._init_sd()
+    def _idle(self, now, slack_ms):
+        # garbage collection (and heap probing) only here, before the loop
+        # sleeps: never inside a sample, an SD write or an I2C transaction
+        try:
+            self.mem.idle(now, slack_ms)
+        except Exception as e:
+            self.safe.set_error(LEVEL_WARNING, "mem_idle", e)
+
+    def _init_i2c(self, now):
+        # bus clear first: a slave may still hold SDA from before a reset
+        try:
+            found = self.bus.recover()
+        except Exception as e:
+            # Without I2C, OLED+sensor+RTC are gone => critical
+            self.h_i2c.down(now, "i2c_clear", e)
+            return
+        self.h_i2c.up(now)
+        # devices that answer the scan get their re-init now, not after their backoff
+        for addr, p in (
+            (config.OLED_I2C_ADDR, self.h_oled),
+            (config.SHT31_ADDR, self.h_sensor),
+            (config.DS3231_ADDR, self.h_rtc),
+        ):
+            if addr in found and not p.usable:
+                p.backoff.wait(now, 0)
+
+    def _i2c_stuck(self, e):
+        # a line is held low: every device is unreachable until the bus clear
+        self.h_i2c.down(time.ticks_ms(), "i2c_stuck", e)
+
+    def _init_oled(self, now):
+        try:
+            self.oled = SSD1306_I2C(
+                config.OLED_WIDTH,
+                config.OLED_HEIGHT,
+                self.bus,
+                addr=config.OLED_I2C_ADDR,
+            )
+            self.ui = Ui(self.oled)
+            self.h_oled.up(now)
+        except Exception as e:
+            self.h_oled.down(now, "oled_init", e)
 
-        # Show something at boot
-        self._safe_ui_update(where="boot")
+    def _ui_failed(self, where, e):
+        # headless until the OLED is re-initialized
+        self.h_oled.down(time.ticks_ms(), where, e)
+
+    def _init_sensor(self, now):
+        try:
+            self.sensor = SHT31(self.bus, addr=config.SHT31_ADDR)
+            # one measurement to confirm it responds
+            self.sensor.read()
+            self.h_sensor.up(now)
+        except Exception as e:
+            self.h_sensor.down(now, "sht31_init", e)
+
+    def _init_rtc(self, now):
+        try:
+            self.rtc = DS3231(self.bus, address=config.DS3231_ADDR)
+            # quick read to confirm it responds
+            _ = self.rtc.datetime()
+            self.time = Timekeeper(self.rtc)
+            self.h_rtc.up(now)
+        except Exception as e:
+            self.time = None
+            self.h_rtc.down(now, "rtc_init", e)
 
-    def _init_sd(self):
+    def _init_sd(self, now):
         try:
-            self.spi = SPI(
-                config.SD_SPI_ID,
+            if self.spi is None:
+                self.spi = SPI(
+                    config.SD_SPI_ID,
+                    baudrate=config.SD_BAUDRATE,
+                    polarity=0,
+                    phase=0,
+                    sck=Pin(config.SD_SCK),
+                    mosi=Pin(config.SD_MOSI),
+                    miso=Pin(config.SD_MISO),
+                )
+                self.sd_cs = Pin(config.SD_CS, Pin.OUT)
+            sd = SDCard(
+                self.spi,
+                self.sd_cs,
                 baudrate=config.SD_BAUDRATE,
-                polarity=0,
-                phase=0,
-                sck=Pin(config.SD_SCK),
-                mosi=Pin(config.SD_MOSI),
-                miso=Pin(config.SD_MISO),
+                baudrates=config.SD_BAUDRATES,
+                crc=config.SD_CRC,
             )
-            self.sd_cs = Pin(config.SD_CS, Pin.OUT)
-            sd = SDCard(self.spi, self.sd_cs, baudrate=config.SD_BAUDRATE)
+            self.sd = sd
+            if config.SD_CACHE_BLOCKS:
+                sd = BlockCache(
+                    sd,
+                    nblocks=config.SD_CACHE_BLOCKS,
+                    write_back=config.SD_CACHE_WRITE_BACK,
+                    readahead=config.SD_READAHEAD_BLOCKS,
+                )
+            self.sd_dev = sd
 
-            ok = self.sd_logger.mount(sd)
-            self.sd_ok = bool(ok)
-            if not self.sd_ok:
+            if not self.sd_logger.mount(sd):
                 raise OSError("SD mount failed")
+            self.h_sd.up(now)
+        except Exception as e:
+            # SD is optional => warning (rows wait in the backlog meanwhile)
+            self.h_sd.down(now, "sd_init", e)
+
+    def _sd_failed(self, where, e):
+        # open files are unusable now: drop the card and re-init it later;
+        # rows go to the backlog meanwhile
+        self.sd_logging = False
+        self.sd_logger.unmount()
+        self.h_sd.down(time.ticks_ms(), where, e)
+
+    def _start_logging(self, now):
+        iso, epoch_ms, rtc_valid, t0 = self._exp_base
+        if self._exp_logged:
+            # the card dropped out mid-experiment: continue in a new directory
+            # on the same time base, starting at the oldest row still waiting
+            start = self.backlog.oldest()[0] if self.backlog.n else time.ticks_ms()
+            epoch_ms += time.ticks_diff(start, t0)
+            t0 = start
+            iso = self._utc_iso()
+        try:
+            self.sd_logger.start_new(iso, epoch_ms, rtc_valid, t0)
+            self.sd_logging = True
+            self._exp_logged = True
         except Exception as e:
-            # SD is optional => warning (logging disabled)
-            self.safe.set_error(LEVEL_WARNING, "sd_init", e)
-            self.sd_ok = False
+            self._sd_failed("log_start", e)
+
+    def _drain_backlog(self, max_rows):
+        backlog = self.backlog
+        while backlog.n and max_rows:
+            ticks, late_ms, temp_cc, rh_cp = backlog.oldest()
+            try:
+                self._write_row(ticks, late_ms, temp_cc, rh_cp)
+            except Exception as e:
+                self._sd_failed("log_write", e)
+                return
+            backlog.pop_oldest()
+            max_rows -= 1
 
     def _utc_iso(self):
         # If RTC fails, fallback to uptime-based timestamp
-        if self.time:
+        if self.time and self.rtc_ok:
             try:
                 return self.time.utc_iso()
             except Exception as e:
-                self.safe.set_error(LEVEL_DEGRADED, "rtc_read", e)
+                self.h_rtc.error(time.ticks_ms(), "rtc_read", e)
 
         # fallback: ticks_ms
         ms = time.ticks_ms()
         return "UPTIME_%dms" % ms
 
+    def _time_base(self):
+        """
+        (utc_iso, epoch_ms, rtc_valid) from a single RTC read.
+        Falls back to uptime (ticks_ms) with rtc_valid=False.
+        """
+        if self.time and self.rtc_ok:
+            try:
+                iso, epoch_ms = self.time.stamp()
+                return iso, epoch_ms, True
+            except Exception as e:
+                self.h_rtc.error(time.ticks_ms(), "rtc_read", e)
+
+        ms = time.ticks_ms()
+        return "UPTIME_%dms" % ms, ms, False
+
     def _safe_ui_update(self, where=""):
         """
         Always try to show safe-mode info if there's an error.
@@ -164,17 +429,28 @@ class App:
                 self.safe.last_error_msg,
             )
         except Exception as e:
-            # If UI update fails, we go headless
-            self.safe.set_error(LEVEL_CRITICAL, "oled_render", e)
-            self.ui_ok = False
+            # If UI update fails, we go headless (until the OLED is back)
+            self._ui_failed("oled_render", e)
 
     def _set_off_state(self):
-        # stop logging safely
-        if self.experiment_running:
+        # stop logging safely: rows still waiting go out first. If the card
+        # is not up yet (mounting, or backing off after a fault) they stay in
+        # the backlog; _bring_up opens this experiment's log once it mounts,
+        # and the log is closed here when the last of them is written.
+        if self.sd_logging:
+            self._drain_backlog(self.backlog.n)
+        if self.sd_logging and not self.backlog.n:
+            # per-peripheral uptime/errors/recoveries for this experiment
+            now = time.ticks_ms()
+            for p in self.safe.peripherals:
+                self._health_changed(p, p.state, now)
+            self._mem_check(now)
+            self._persist_events(now, True)
             try:
                 self.sd_logger.stop()
             except Exception as e:
                 self.safe.set_error(LEVEL_WARNING, "log_stop", e)
+            self.sd_logging = False
 
         self.experiment_running = False
 
@@ -185,25 +461,37 @@ class App:
         except Exception as e:
             self.safe.set_error(LEVEL_DEGRADED, "led_off_state", e)
 
-        # UI
-        utc_iso = self._utc_iso()
-        if self.ui_ok:
+        # UI (an active error is shown instead, by _safe_ui_update)
+        if self.ui_ok and self.safe.level == LEVEL_OK:
+            utc_iso = self._utc_iso()
             try:
                 self.ui.show_off(utc_iso)
             except Exception as e:
-                self.safe.set_error(LEVEL_CRITICAL, "oled_show_off", e)
-                self.ui_ok = False
+                self._ui_failed("oled_show_off", e)
 
     def _set_on_state(self):
         if not self.experiment_running:
-            utc_iso = self._utc_iso()
+            utc_iso, epoch_ms, rtc_valid = self._time_base()
+            # the log starts now, or once the card is up (rows wait in the backlog)
+            self._exp_base = (utc_iso, epoch_ms, rtc_valid, time.ticks_ms())
+            self._exp_logged = False
+            if self.backlog.n:
+                # the last experiment's rows never reached the card
+                self.backlog.dropped += self.backlog.n
+                self.safe.set_error(LEVEL_WARNING, "log_backlog", OSError("lost %d rows" % self.backlog.n))
+                self.backlog.clear()
+            self.sampler.reset(time.ticks_ms())
+            self.acq.reset(time.ticks_ms())
+            # leak baseline: the heap as this experiment starts
+            self.mem.rebase()
+            self._mem_ms = time.ticks_ms()
             if self.sd_ok:
-                try:
-                    self.sd_logger.start_new(utc_iso)
-                except Exception as e:
-                    # keep running without logging
-                    self.safe.set_error(LEVEL_WARNING, "log_start", e)
-                    self.sd_ok = False
+                self._start_logging(time.ticks_ms())
+            self.temp_stats.reset()
+            self.rh_stats.reset()
+            self.last_temp = self.last_rh = None
+            self.sample_ok = True
+            self.last_iso = utc_iso
             self.experiment_running = True
 
         # LEDs
@@ -223,30 +511,49 @@ class App:
             self.safe.set_error(LEVEL_DEGRADED, "button_read", e)
             return False
 
-    def _read_sensor(self):
-        if not self.sensor:
-            return None, None
+    def _acquire(self, now):
+        if not (self.sensor and self.sensor_ok):
+            self.acq.skip(now)
+            return
         try:
-            return self.sensor.read()
+            self.acq.step(self.sensor, now)
         except Exception as e:
-            self.safe.set_error(LEVEL_DEGRADED, "sht31_read", e)
-            return None, None
+            # repeated failures take it down for a re-init
+            self.h_sensor.error(time.ticks_ms(), "sht31_read", e)
 
-    def _log_row(self, utc_iso, temp_c, rh):
-        if not (self.sd_ok and self.experiment_running):
+    def _read_sensor(self):
+        """(ticks, centi-degrees C, centi-percent RH) of the filtered signal for this row, or None."""
+        ticks = self.acq.output()
+        if ticks is None:
+            return None
+        temp_cc, rh_cp = SHT31.convert(self.acq.values[0], self.acq.values[1])
+        return ticks, temp_cc, rh_cp
+
+    def _log_row(self, ticks, late_ms, temp_cc, rh_cp):
+        if not self.experiment_running:
+            return
+        if not self.sd_logging or self.backlog.n:
+            # card not ready, or older rows still waiting: keep the order
+            self.backlog.append(ticks, late_ms, temp_cc, rh_cp)
             return
         try:
-            self.sd_logger.write_row(utc_iso, temp_c, rh)
+            self._write_row(ticks, late_ms, temp_cc, rh_cp)
         except Exception as e:
-            self.safe.set_error(LEVEL_WARNING, "log_write", e)
-            # disable further SD attempts this session
-            self.sd_ok = False
+            self._sd_failed("log_write", e)
+            # may be partly written; a duplicate beats a gap
+            self.backlog.append(ticks, late_ms, temp_cc, rh_cp)
 
-    def _show_on(self, temp_c, rh, utc_iso):
+    def _write_row(self, ticks, late_ms, temp_cc, rh_cp):
+        self.sd_logger.write_row(ticks, late_ms, temp_cc, rh_cp)
+        if self.first_sample_ms is None:
+            self.first_sample_ms = time.ticks_ms()
+            print("first sample logged %d ms after reset" % self.first_sample_ms)
+
+    def _show_on(self, now):
         if not self.ui_ok:
             return
         try:
-            if temp_c is None or rh is None:
+            if not self.sample_ok:
                 # show degraded info
                 self.ui.show_error(
                     level_name(max(self.safe.level, LEVEL_DEGRADED)),
@@ -254,17 +561,42 @@ class App:
                     "SHT31",
                     "read failed",
                 )
-            else:
-                self.ui.show_on(temp_c, rh, utc_iso)
+                return
+            if self.safe.events.seq != self._errors_seen:
+                # something new went wrong (not a repeat): bring up the safe-mode page
+                self._errors_seen = self.safe.events.seq
+                self.ui.show_page(PAGE_SAFE)
+            elif self._page_pressed():
+                self.ui.next_page()
+            self.ui.show_on(self, now)
+        except Exception as e:
+            self._ui_failed("oled_show_on", e)
+
+    def _page_pressed(self):
+        if not self.page_button:
+            return False
+        try:
+            return self.page_button.pressed()
         except Exception as e:
-            self.safe.set_error(LEVEL_CRITICAL, "oled_show_on", e)
-            self.ui_ok = False
+            self.safe.set_error(LEVEL_WARNING, "page_button_read", e)
+            self.page_button = None
+            return False
+
+    def _loop_done(self, t0_us):
+        dt = time.ticks_diff(time.ticks_us(), t0_us)
+        self.loop_us = dt
+        if dt > self.loop_us_max:
+            self.loop_us_max = dt
+        self.loop_us_sum += dt
+        self.loop_n += 1
 
     def run(self):
         # Initial OFF screen
         self._set_off_state()
 
         while True:
+            t0_us = time.ticks_us()
+
             # Always tick safe-mode LED pattern
             try:
                 self.safe.tick_blink()
@@ -272,12 +604,19 @@ class App:
                 # if blinking fails, nothing else to do; avoid crashing loop
                 pass
 
+            try:
+                self._bring_up(time.ticks_ms())
+            except Exception as e:
+                self.safe.set_error(LEVEL_WARNING, "bring_up", e)
+
             on = self._button_on()
 
             if not on:
                 self._set_off_state()
                 # if there’s an active error, show it
                 self._safe_ui_update(where="off_loop")
+                self._loop_done(t0_us)
+                self._idle(time.ticks_ms(), 50)
                 time.sleep_ms(50)
                 continue
 
@@ -285,20 +624,38 @@ class App:
             self._set_on_state()
 
             now = time.ticks_ms()
-            if time.ticks_diff(now, self.last_sample_ms) >= config.SAMPLE_INTERVAL_MS:
-                self.last_sample_ms = now
-
-                temp_c, rh = self._read_sensor()
-                utc_iso = self._utc_iso()
+            if self.acq.due(now):
+                self._acquire(now)
 
-                # log only if we have valid numbers
-                if temp_c is not None and rh is not None:
-                    self._log_row(utc_iso, temp_c, rh)
-
-                # UI update (or safe mode screen)
-                self._show_on(temp_c, rh, utc_iso)
+            if self.sampler.due(now):
+                # late_ms is the distance from the row's deadline; the row is
+                # stamped with the acquisition time its filtered value stands for
+                t_sample = time.ticks_us()
+                late = self.sampler.take(now)
 
-                # show error details if we’re in safe mode
-                self._safe_ui_update(where="on_loop")
+                out = self._read_sensor()
+                # (no row while the filters fill after a start or a re-init)
+                self.sample_ok = out is not None or (self.acq.priming and self.sensor_ok)
 
-            time.sleep_ms(10)
+                # log only if we have valid numbers
+                if out is not None:
+                    ticks, temp_cc, rh_cp = out
+                    self.last_temp = temp_cc
+                    self.last_rh = rh_cp
+                    self.last_iso = self._utc_iso()
+                    self.temp_stats.update(temp_cc)
+                    self.rh_stats.update(rh_cp)
+                    self._log_row(ticks, late, temp_cc, rh_cp)
+
+                self.sample_us = time.ticks_diff(time.ticks_us(), t_sample)
+
+            # dashboard (the visible page redraws at its own rate),
+            # or the safe-mode page / sensor error screen
+            self._show_on(now)
+
+            self._loop_done(t0_us)
+            now = time.ticks_ms()
+            self._idle(now, min(self.sampler.until(now), self.acq.sched.until(now)))
+            # wake up for the next deadline rather than up to 10 ms after it
+            now = time.ticks_ms()
+            time.sleep_ms(max(0, min(10, self.sampler.until(now), self.acq.sched.until(now))))
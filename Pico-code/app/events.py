@@ -0,0 +1,118 @@
+# app/events.py
+# Fixed-capacity fault timeline for safe mode: preallocated records, repeated
+# errors coalesced into one record with a count, persisted to the SD log in
+# batches (events.csv, decoded by data-analysis events()/händelser()).
+import time
+from array import array
+
+# persisted columns; where/type are names, t_ms/last_ms relative to the log's epoch_ms
+EVENTS_HEADER = "t_ms,last_ms,level,where,type,arg,count\n"
+
+
+class EventLog:
+    """
+    Ring of capacity records: first/last ticks_ms, level, where, exception
+    type, integer argument (errno) and repeat count.
+
+    add() does no allocation once a (where, type) name has been seen: names
+    are interned to small codes, and an error matching a record opened
+    less than coalesce_ms ago (same where/type/arg/level) only bumps that
+    record's count. Records are persisted in order once their coalescing
+    window has closed.
+    """
+    def __init__(self, capacity=64, coalesce_ms=10_000):
+        self.capacity = capacity
+        self.coalesce_ms = coalesce_ms
+        self.t_first = array("i", [0] * capacity)
+        self.t_last = array("i", [0] * capacity)
+        self.count = array("I", [0] * capacity)
+        self.arg = array("i", [0] * capacity)
+        self.level = bytearray(capacity)
+        self.where = bytearray(capacity)
+        self.etype = bytearray(capacity)
+
+        # code -> name (code 0 is "?": table full)
+        self.names = ["?"]
+        self._codes = {}
+
+        self.seq = 0         # records ever opened
+        self.total = 0       # errors ever added (coalesced ones included)
+        self.lost = 0        # records overwritten before they were persisted
+        self._persisted = 0  # seq of the next record to persist
+
+    def code(self, name) -> int:
+        c = self._codes.get(name)
+        if c is None:
+            if len(self.names) > 255:
+                return 0
+            c = len(self.names)
+            self._codes[name] = c
+            self.names.append(name)
+        return c
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    def newest(self, k) -> int:
+        """Slot of the k-th newest record (0 = newest), or -1."""
+        if k >= len(self):
+            return -1
+        return (self.seq - 1 - k) % self.capacity
+
+    def add(self, now, level, where, exc):
+        self.total += 1
+        w = self.code(where)
+        t = self.code(exc.__class__.__name__)
+        args = exc.args
+        a = args[0] if args and type(args[0]) is int else 0
+
+        # coalesce into an open, not yet persisted record (newest first)
+        for k in range(self.seq - self._persisted):
+            i = (self.seq - 1 - k) % self.capacity
+            if time.ticks_diff(now, self.t_first[i]) >= self.coalesce_ms:
+                break
+            if (self.where[i] == w and self.etype[i] == t and self.arg[i] == a
+                    and self.level[i] == level):
+                self.count[i] += 1
+                self.t_last[i] = now
+                return
+
+        if self.seq - self._persisted >= self.capacity:
+            self._persisted += 1
+            self.lost += 1
+        i = self.seq % self.capacity
+        self.t_first[i] = now
+        self.t_last[i] = now
+        self.count[i] = 1
+        self.arg[i] = a
+        self.level[i] = level
+        self.where[i] = w
+        self.etype[i] = t
+        self.seq += 1
+
+    def pending(self, now, force=False) -> int:
+        """Records ready to persist (closed ones; all of them if force)."""
+        n = 0
+        s = self._persisted
+        while s < self.seq:
+            i = s % self.capacity
+            if not force and time.ticks_diff(now, self.t_first[i]) < self.coalesce_ms:
+                break
+            n += 1
+            s += 1
+        return n
+
+    def persist(self, f, t0, now, force=False) -> int:
+        """
+        Write the ready records to f as CSV rows, times relative to t0
+        (ticks_ms of the log's epoch_ms). Returns the number written.
+        """
+        n = self.pending(now, force)
+        names = self.names
+        for _ in range(n):
+            i = self._persisted % self.capacity
+            f.write("%d,%d,%d,%s,%s,%d,%d\n" % (
+                time.ticks_diff(self.t_first[i], t0), time.ticks_diff(self.t_last[i], t0), self.level[i],
+                names[self.where[i]], names[self.etype[i]], self.arg[i], self.count[i]))
+            self._persisted += 1
+        return n
@@ -0,0 +1,24 @@
+# app/fixedpoint.py
+# Samples travel as scaled integers (centi-degrees C, centi-percent RH) from
+# the driver to the log and the display; these format them without floats
+# (each float is a heap object on the RP2040 port, and soft-float math)
+
+
+def centi_str(v, decimals=2):
+    """-123 -> "-1.23" (decimals=2) or "-1.2" (decimals=1, rounded)."""
+    neg = v < 0
+    if neg:
+        v = -v
+    if decimals == 1:
+        v = (v + 5) // 10
+        s = "%d.%d" % (v // 10, v % 10)
+    else:
+        s = "%d.%02d" % (v // 100, v % 100)
+    return "-" + s if neg and v else s
+
+
+def centi_round(v, decimals):
+    """v at display precision (integer), to compare before formatting."""
+    if decimals == 2:
+        return v
+    return (v + 5) // 10 if v >= 0 else -((5 - v) // 10)
@@ -0,0 +1,192 @@
+# app/i2c_bus.py
+# Supervisor for the shared I2C bus (OLED + SHT31 + DS3231): times every
+# transaction, spots a slave holding a line low and clears the bus
+import errno
+import time
+from machine import Pin, I2C
+
+# bit-banged SCL half period for the bus clear (~100 kHz)
+_HALF_US = 5
+
+
+class I2cBus:
+    """
+    Stands in for machine.I2C (the calls the drivers make). The drivers
+    keep this object; the I2C underneath is re-created by recover().
+
+    Every transaction is timed (tx, errors, last_us, max_us; machine.I2C's
+    timeout_us bounds a slave stretching the clock forever). A failed one
+    checks the lines: SDA or SCL still low with the bus idle means a slave
+    is stuck mid-byte, typically after a brownout. The bus is then marked
+    stuck, on_stuck(exc) is called, and every transaction fails at once
+    (ENODEV) instead of going out on the bus, until recover().
+
+    recover() is the bus clear: SDA/SCL as GPIO, up to 9 SCL pulses until
+    the slave lets go of SDA, a STOP, then a new I2C and a scan() like
+    scripts/I2C_scan.py. About 1 ms plus the scan (~3 ms at 400 kHz).
+    """
+    def __init__(self, i2c_id, sda, scl, freq, timeout_us=50_000):
+        self.id = i2c_id
+        self.sda = sda
+        self.scl = scl
+        self.freq = freq
+        self.timeout_us = timeout_us
+        self.i2c = None
+        self.stuck = False
+        # called as on_stuck(exc) when a failure leaves a line held low
+        self.on_stuck = None
+
+        self.tx = 0
+        self.errors = 0
+        self.last_us = 0
+        self.max_us = 0
+        self.stucks = 0
+        self.clears = 0
+        self.last_pulses = 0
+        self.last_recover_us = 0
+        self.found = ()
+
+    def _open(self):
+        self.i2c = I2C(
+            self.id,
+            sda=Pin(self.sda),
+            scl=Pin(self.scl),
+            freq=self.freq,
+            timeout=self.timeout_us,
+        )
+
+    # --- lines ---
+
+    def lines_low(self) -> bool:
+        """SDA or SCL low on every sample over ~50 us (idle lines are pulled up)."""
+        # Pin(n) without a mode only reads the pad, the I2C keeps the pins
+        sda = Pin(self.sda)
+        scl = Pin(self.scl)
+        for _ in range(5):
+            if sda.value() and scl.value():
+                return False
+            time.sleep_us(10)
+        return True
+
+    def _clear(self) -> int:
+        # drop the pins out of I2C mode; both lines open drain with pull-ups
+        sda = Pin(self.sda, Pin.OPEN_DRAIN, Pin.PULL_UP, value=1)
+        scl = Pin(self.scl, Pin.OPEN_DRAIN, Pin.PULL_UP, value=1)
+        time.sleep_us(_HALF_US)
+        # a slave stuck mid-byte releases SDA within 9 clocks (8 bits + ack)
+        pulses = 0
+        while pulses < 9 and not sda.value():
+            scl.value(0)
+            time.sleep_us(_HALF_US)
+            scl.value(1)
+            time.sleep_us(_HALF_US)
+            pulses += 1
+        # STOP: SDA low -> high while SCL is high
+        scl.value(0)
+        time.sleep_us(_HALF_US)
+        sda.value(0)
+        time.sleep_us(_HALF_US)
+        scl.value(1)
+        time.sleep_us(_HALF_US)
+        sda.value(1)
+        time.sleep_us(_HALF_US)
+        self.last_pulses = pulses
+        if not (sda.value() and scl.value()):
+            raise OSError(errno.EBUSY)
+        return pulses
+
+    def recover(self):
+        """
+        Clear the bus and open a new I2C. Returns the addresses that answer
+        a scan. Raises OSError if a line stays low (try again later).
+        """
+        t0 = time.ticks_us()
+        self.i2c = None
+        try:
+            self._clear()
+            self._open()
+            self.found = tuple(self.i2c.scan())
+        except Exception:
+            self.i2c = None
+            raise
+        finally:
+            self.last_recover_us = time.ticks_diff(time.ticks_us(), t0)
+        self.clears += 1
+        self.stuck = False
+        return self.found
+
+    # --- transactions ---
+
+    def _begin(self):
+        if self.stuck or self.i2c is None:
+            raise OSError(errno.ENODEV)
+        return time.ticks_us()
+
+    def _end(self, t0):
+        dt = time.ticks_diff(time.ticks_us(), t0)
+        self.last_us = dt
+        if dt > self.max_us:
+            self.max_us = dt
+        self.tx += 1
+
+    def _failed(self, e):
+        self.errors += 1
+        if not self.stuck and self.lines_low():
+            self.stuck = True
+            self.stucks += 1
+            if self.on_stuck is not None:
+                self.on_stuck(e)
+
+    def writeto(self, addr, buf, stop=True):
+        t0 = self._begin()
+        try:
+            return self.i2c.writeto(addr, buf, stop)
+        except OSError as e:
+            self._failed(e)
+            raise
+        finally:
+            self._end(t0)
+
+    def writevto(self, addr, bufs, stop=True):
+        t0 = self._begin()
+        try:
+            return self.i2c.writevto(addr, bufs, stop)
+        except OSError as e:
+            self._failed(e)
+            raise
+        finally:
+            self._end(t0)
+
+    def readfrom(self, addr, n, stop=True):
+        t0 = self._begin()
+        try:
+            return self.i2c.readfrom(addr, n, stop)
+        except OSError as e:
+            self._failed(e)
+            raise
+        finally:
+            self._end(t0)
+
+    def readfrom_mem(self, addr, reg, n):
+        t0 = self._begin()
+        try:
+            return self.i2c.readfrom_mem(addr, reg, n)
+        except OSError as e:
+            self._failed(e)
+            raise
+        finally:
+            self._end(t0)
+
+    def writeto_mem(self, addr, reg, buf):
+        t0 = self._begin()
+        try:
+            return self.i2c.writeto_mem(addr, reg, buf)
+        except OSError as e:
+            self._failed(e)
+            raise
+        finally:
+            self._end(t0)
+
+    def scan(self):
+        self._begin()
+        return self.i2c.scan()
@@ -0,0 +1,26 @@
+# app/kernels.py
+# Filter inner loops for app/acquire.py, compiled to machine code by the
+# viper emitter. Kept in their own module: a firmware without the native
+# emitter fails to import it, and app/acquire.py falls back to plain Python.
+import micropython
+
+
+@micropython.viper
+def fir(ring, taps, n: int, head: int, mask: int) -> int:
+    # sum of taps[i] * ring[head - i] over the last n samples (ring of 2**k ints)
+    r = ptr32(ring)  # noqa: F821 (viper builtin)
+    c = ptr32(taps)  # noqa: F821
+    acc = 0
+    i = 0
+    while i < n:
+        acc += c[i] * r[(head - i) & mask]
+        i += 1
+    return acc
+
+
+@micropython.viper
+def iir(state, x: int, k: int):
+    # one-pole low-pass in place: y += (x - y) / 2**k, y with 8 fraction bits
+    s = ptr32(state)  # noqa: F821
+    y = s[0]
+    s[0] = y + (((x << 8) - y) >> k)
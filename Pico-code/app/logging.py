@@ -1,16 +1,229 @@
+import time
 import uos as os
+from array import array
+
+from onlinestats import IntStats
+import journal
+from deltacodec import DeltaEncoder
+from app.events import EVENTS_HEADER
+from app.fixedpoint import centi_str
+
+_CHANNELS = ("temp_c", "humidity_percent")
+
+# First line of every log file. Rows carry t_ms = integer ms since epoch_ms.
+# rtc=1: epoch_ms is wall-clock UTC from the RTC; rtc=0: the RTC was not
+# available and epoch_ms is the Pico uptime at start (ticks_ms).
+# Raw rows also carry late_ms: acquisition time minus the oldest unserved
+# sample deadline (app/scheduler.py); late_ms // period = skipped slots.
+# Values arrive as centi-units (ints) and are written with two decimals;
+# they only become floats in the data-analysis loader.
+_HEADER = "# borealis-log v1 epoch_ms=%d rtc=%d\n"
+_COLUMNS = "t_ms,late_ms,temp_c,humidity_percent\n"
+# codec="delta": raw rows as varints (lib/deltacodec.py), one frame per
+# journal block: t_ms delta-of-delta (ticks on a fixed grid), late_ms as
+# is, the centi-unit values as deltas. The segment's header record says so
+# (and that the values have 2 decimals); the first frame follows it in
+# the same block.
+_DELTA_ORDERS = (2, 0, 1, 1)
+_DELTA_META = " codec=delta orders=2,0,1,1 decimals=0,0,2,2"
+# longest raw row in bytes (a csv row; delta rows are shorter)
+_ROW_MAX = 40
+
+
+class _Tier:
+    """
+    One aggregated summary file: per-channel mean/min/max over fixed windows.
+    Only the running integer stats of the open window are kept in RAM.
+    """
+    def __init__(self, path, period_s):
+        self.path = path
+        self.period_ms = period_s * 1000
+        self.stats = [IntStats() for _ in _CHANNELS]
+        self.start_ms = None
+        self._file = None
+
+    def open(self, header):
+        cols = ["t_ms", "n"]
+        for ch in _CHANNELS:
+            cols.append(ch + "_mean")
+            cols.append(ch + "_min")
+            cols.append(ch + "_max")
+        with open(self.path, "w") as f:
+            f.write(header)
+            f.write(",".join(cols) + "\n")
+        self._file = open(self.path, "a")
+
+    def add(self, t_ms, values):
+        if self.start_ms is not None and t_ms - self.start_ms >= self.period_ms:
+            self.close_window()
+        if self.start_ms is None:
+            self.start_ms = t_ms
+        for st, v in zip(self.stats, values):
+            st.update(v)
+
+    def close_window(self):
+        if self.start_ms is None:
+            return
+        parts = ["%d,%d" % (self.start_ms, self.stats[0].n)]
+        for st in self.stats:
+            parts.append("%s,%s,%s" % (centi_str(st.mean), centi_str(st.min), centi_str(st.max)))
+            st.reset()
+        self._file.write(",".join(parts) + "\n")
+        self._file.flush()
+        self.start_ms = None
+
+    def close(self):
+        if self._file:
+            try:
+                # partial last window is still worth keeping
+                self.close_window()
+            except Exception:
+                pass
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self._file = None
+
+
+def _checkpoints(index_path, segment):
+    """
+    Offsets of segment's checkpoints in the last block of an index.csv (the
+    tail is enough: the last segment's checkpoints are the last lines).
+    """
+    offsets = []
+    try:
+        with open(index_path, "rb") as f:
+            size = f.seek(0, 2)
+            f.seek(max(0, size - journal.BLOCK))
+            tail = f.read()
+    except OSError:
+        return offsets
+    # the first line is partial, or the file's header
+    for line in tail.split(b"\n")[1:]:
+        cells = line.split(b",")
+        try:
+            if len(cells) == 3 and int(cells[0]) == segment:
+                offsets.append(int(cells[2]))
+        except ValueError:
+            pass
+    return offsets
+
+
+def _close(f):
+    try:
+        f.flush()
+    except Exception:
+        pass
+    try:
+        f.close()
+    except Exception:
+        pass
+
+
+class RowBacklog:
+    """
+    Fixed-size ring of rows (ticks, late_ms, temp_cc, rh_cp) taken while the SD card is
+    not ready, written out once it mounts. When full the oldest rows are
+    dropped (counted in .dropped).
+    """
+    def __init__(self, size):
+        self.size = size
+        self._ticks = array("i", [0] * size)
+        self._late = array("i", [0] * size)
+        self._temp = array("i", [0] * size)
+        self._rh = array("i", [0] * size)
+        self._first = 0
+        self.n = 0
+        self.dropped = 0
+
+    def append(self, ticks, late_ms, temp_c, rh):
+        if not self.size:
+            self.dropped += 1
+            return
+        if self.n == self.size:
+            self.pop_oldest()
+            self.dropped += 1
+        i = (self._first + self.n) % self.size
+        self._ticks[i] = ticks
+        self._late[i] = late_ms
+        self._temp[i] = temp_c
+        self._rh[i] = rh
+        self.n += 1
+
+    def oldest(self):
+        i = self._first
+        return self._ticks[i], self._late[i], self._temp[i], self._rh[i]
+
+    def pop_oldest(self):
+        self._first = (self._first + 1) % self.size
+        self.n -= 1
+
+    def clear(self):
+        self._first = 0
+        self.n = 0
 
 
 class SdLogger:
     """
-    Handles SD mount + CSV file lifecycle.
+    Handles SD mount + log directory lifecycle.
+
+    One directory per experiment, e.g. /sd/20251206T121200Z/:
+      raw_0000.bjl, raw_0001.bjl, ...  full-rate rows as a crash-safe journal
+                                       (lib/journal.py), rotated by size/age
+      index.csv                        segment,t_ms,offset checkpoints
+      health.csv                       peripheral health changes (if any)
+      events.csv                       safe-mode fault timeline (if any)
+      mem.csv                          heap trend (app/memory.py)
+      10s.csv, 60s.csv                 one summary file per tier
+
+    Raw segments are preallocated and written in whole blocks, so rows are
+    durable once their block is written; no per-row flush. A partial block
+    is committed at least every sync_ms. codec "csv" journals text rows,
+    "delta" compressed binary rows (see _DELTA_ORDERS).
     """
-    def __init__(self, mount_point="/sd"):
+    def __init__(self, mount_point="/sd", tiers_s=(), segment_bytes=64 * 1024, segment_s=0,
+                 index_every=0, sync_ms=5000, codec="csv", row_ms=0):
         self.mount_point = mount_point
+        self.tiers_s = tiers_s
+        # keep one block spare for the end-of-file marker
+        blocks = segment_bytes // journal.BLOCK
+        if segment_s and sync_ms and row_ms:
+            # a segment closed by age needs no more than its sync commits
+            # (each a block, more if the rows in between overflow one) plus
+            # the header, the end-of-file marker and the rotation margin;
+            # preallocating more would only leave zeros on the card
+            rows = -(-sync_ms // row_ms)
+            commits = segment_s * 1000 // (rows * row_ms) + 2
+            blocks = min(blocks, commits * -(-rows * _ROW_MAX // journal.PAYLOAD) + 3)
+        self.segment_bytes = max(4, blocks) * journal.BLOCK
+        self.segment_ms = segment_s * 1000
+        self.index_every = index_every
+        self.sync_ms = sync_ms
+        self._enc = DeltaEncoder(_DELTA_ORDERS) if codec == "delta" else None
+        self._row = [0] * len(_DELTA_ORDERS)
         self.sd_ok = False
         self._mounted = False
         self._file = None
+        self._journal = None
+        self._index = None
+        self._health = None
+        self._events = None
+        self._mem = None
         self._path = None
+        self._header = ""
+        self._session = 0
+        self._seq = 0
+        self._tiers = []
+        self._t0 = 0
+        self._last_commit_ms = 0
+        self.last_recovery = None
+        self.rows = 0
+
+        # current segment
+        self._segment = -1
+        self._seg_rows = 0
+        self._seg_t0 = 0
 
     def mount(self, sdcard_block_device) -> bool:
         """
@@ -22,51 +235,269 @@ class SdLogger:
             os.mount(vfs, self.mount_point)
             self.sd_ok = True
             self._mounted = True
-            return True
         except Exception:
             self.sd_ok = False
             self._mounted = False
             return False
 
-    def start_new(self, start_utc_iso: str) -> str | None:
+        try:
+            self.last_recovery = self.recover_latest()
+        except Exception:
+            # a damaged old log must not stop a new one
+            self.last_recovery = None
+        return True
+
+    def recover_latest(self):
         """
-        Create a new CSV file and open it for append.
-        Returns path if created, else None.
+        Seal the last segment of the newest log directory if the previous
+        session did not stop cleanly. This runs at every (re)mount from the
+        main loop, so the scan starts at the segment's last checkpoint in
+        index.csv, not at the start of the segment; a checkpoint whose block
+        was never written (power cut before its commit) falls back to the
+        one before it.
+        Returns (segment path, end of the valid records, was_clean) or None.
+        """
+        dirs = sorted(e[0] for e in os.ilistdir(self.mount_point) if e[1] & 0x4000)
+        if not dirs:
+            return None
+        path = "%s/%s" % (self.mount_point, dirs[-1])
+        segs = sorted(name for name in os.listdir(path) if name.endswith(".bjl"))
+        if not segs:
+            return None
+        seg_path = "%s/%s" % (path, segs[-1])
+        starts = [0] + _checkpoints(path + "/index.csv", int(segs[-1][4:8]))
+        for start in reversed(starts):
+            records, end, clean = journal.recover(seg_path, start)
+            if records or clean or not start:
+                break
+        return seg_path, end, clean
+
+    def start_new(self, start_utc_iso: str, epoch_ms: int = 0, rtc_valid: bool = False,
+                  t0_ticks=None) -> str | None:
+        """
+        Create a new log directory, open its first segment and tier files.
+        epoch_ms is the wall-clock (or uptime) time at ticks_ms() == t0_ticks
+        (default: now); rows are stamped relative to it, so rows buffered
+        before the card was ready keep their times.
+        Returns the directory if created, else None.
         """
         if not self.sd_ok:
             return None
 
-        # Example: 20251206T121200Z.csv (safe filename)
+        # Example: 20251206T121200Z (safe filename)
         fn_safe = start_utc_iso.replace("-", "").replace(":", "")
-        path = "%s/%s.csv" % (self.mount_point, fn_safe)
+        path = "%s/%s" % (self.mount_point, fn_safe)
+        try:
+            os.mkdir(path)
+        except OSError:
+            pass  # already there (RTC gave the same second twice)
 
-        # Write header
-        with open(path, "w") as f:
-            f.write("utc_iso,temp_c,humidity_percent\n")
+        self._header = _HEADER % (epoch_ms, 1 if rtc_valid else 0)
+        with open(path + "/index.csv", "w") as f:
+            f.write(self._header)
+            f.write("segment,t_ms,offset\n")
+        self._index = open(path + "/index.csv", "a")
+        self._health = None
+        self._events = None
+        self._mem = None
 
-        self._file = open(path, "a")
         self._path = path
-        return path
+        self._t0 = time.ticks_ms() if t0_ticks is None else t0_ticks
+        self._last_commit_ms = time.ticks_ms()
+        self._session = (epoch_ms ^ (time.ticks_ms() << 8)) & 0xFFFFFFFF
+        self._seq = 0
+        self._segment = -1
+        self.rows = 0
+        self._open_segment()
 
-    def write_row(self, utc_iso: str, temp_c: float, rh_percent: float) -> None:
-        if not self._file:
-            return
-        self._file.write("%s,%.2f,%.2f\n" % (utc_iso, temp_c, rh_percent))
-        self._file.flush()
+        self._tiers = []
+        for period_s in self.tiers_s:
+            tier = _Tier("%s/%ds.csv" % (path, period_s), period_s)
+            tier.open(self._header)
+            self._tiers.append(tier)
+        return path
 
-    def stop(self) -> None:
-        if self._file:
+    def _close_segment(self):
+        if self._journal:
             try:
-                self._file.flush()
+                self._journal.close_record()
+                self._seq = self._journal.seq
             except Exception:
                 pass
+        if self._file:
+            _close(self._file)
+        self._file = None
+        self._journal = None
+
+    def _open_segment(self):
+        self._close_segment()
+        self._segment += 1
+        seg_path = "%s/raw_%04d.bjl" % (self._path, self._segment)
+        f = open(seg_path, "wb")
+        journal.preallocate(f, self.segment_bytes)
+        self._file = f
+        self._journal = journal.JournalWriter(f, self._session, self._seq)
+        # every segment starts with the CSV header, so it decodes on its own
+        if self._enc:
+            self._journal.append((self._header[:-1] + _DELTA_META + "\n" + _COLUMNS).encode())
+            self._enc.reset()
+        else:
+            self._journal.append((self._header + _COLUMNS).encode())
+        self._seg_rows = 0
+
+    def _rotate_due(self, t_ms, n):
+        if not self._seg_rows:
+            return False
+        # room for the block a row of n bytes lands in + the end-of-file
+        # marker; when it overflows the pending block, that block too
+        w = self._journal
+        blocks = 3 if w.pending + n > journal.PAYLOAD else 2
+        if w.offset + blocks * journal.BLOCK > self.segment_bytes:
+            return True
+        return bool(self.segment_ms) and t_ms - self._seg_t0 >= self.segment_ms
+
+    def write_row(self, ticks: int, late_ms: int, temp_cc: int, rh_cp: int) -> None:
+        """
+        ticks: time.ticks_ms() at acquisition, late_ms: how far past its deadline,
+        temp_cc / rh_cp: centi-degrees C / centi-percent RH.
+        """
+        if not self._journal:
+            return
+        t_ms = time.ticks_diff(ticks, self._t0)
+        enc = self._enc
+        if enc:
+            row = self._row
+            row[0] = t_ms
+            row[1] = late_ms
+            row[2] = temp_cc
+            row[3] = rh_cp
+            n = enc.encode(row)
+        else:
+            line = ("%d,%d,%s,%s\n" % (t_ms, late_ms, centi_str(temp_cc), centi_str(rh_cp))).encode()
+            n = len(line)
+
+        w = self._journal
+        fresh = False
+        if self._rotate_due(t_ms, n):
+            self._open_segment()
+            w = self._journal
+            fresh = True
+        elif w.pending + n > journal.PAYLOAD:
+            w.commit()
+            fresh = True
+        if enc and fresh:
+            # first row of a block = of a frame: encoded without history
+            enc.reset()
+            n = enc.encode(row)
+
+        # checkpoint: first row of each segment + every index_every rows.
+        # The offset is the block the row lands in.
+        if not self._seg_rows:
+            self._seg_t0 = t_ms
+        if not self._seg_rows or (self.index_every and self._seg_rows % self.index_every == 0):
+            self._index.write("%d,%d,%d\n" % (self._segment, t_ms, w.offset))
+            self._index.flush()
+
+        w.append(enc.mv[:n] if enc else line)
+        self._seg_rows += 1
+        self.rows += 1
+
+        # bound what a power cut can take: commit the partial block now and then
+        if time.ticks_diff(ticks, self._last_commit_ms) >= self.sync_ms:
+            w.commit()
+            self._last_commit_ms = ticks
+            if enc:
+                enc.reset()
+
+        if self._tiers:
+            values = (temp_cc, rh_cp)
+            for tier in self._tiers:
+                tier.add(t_ms, values)
+
+    def write_health(self, ticks: int, line: str) -> None:
+        """
+        Append a peripheral health record (name,state,up_ms,errors,recoveries)
+        to health.csv, created on first use. Flushed: these are rare.
+        """
+        if not self._path:
+            return
+        if self._health is None:
+            with open(self._path + "/health.csv", "w") as f:
+                f.write(self._header)
+                f.write("t_ms,peripheral,state,up_ms,errors,recoveries\n")
+            self._health = open(self._path + "/health.csv", "a")
+        self._health.write("%d,%s\n" % (time.ticks_diff(ticks, self._t0), line))
+        self._health.flush()
+
+    def write_mem(self, ticks: int, line: str) -> None:
+        """
+        Append a heap record (free,alloc,largest,live,min_free,collections,
+        auto,gc_us_max) to mem.csv, created on first use. Flushed: one per
+        MEM_LOG_MS.
+        """
+        if not self._path:
+            return
+        if self._mem is None:
+            with open(self._path + "/mem.csv", "w") as f:
+                f.write(self._header)
+                f.write("t_ms,free,alloc,largest,live,min_free,collections,auto,gc_us_max\n")
+            self._mem = open(self._path + "/mem.csv", "a")
+        self._mem.write("%d,%s\n" % (time.ticks_diff(ticks, self._t0), line))
+        self._mem.flush()
+
+    def write_events(self, events, now: int, force: bool = False) -> int:
+        """
+        Persist the closed records of an EventLog (all of them if force) to
+        events.csv, created on first use. Returns the number written.
+        """
+        if not self._path or not events.pending(now, force):
+            return 0
+        if self._events is None:
+            with open(self._path + "/events.csv", "w") as f:
+                f.write(self._header)
+                f.write(EVENTS_HEADER)
+            self._events = open(self._path + "/events.csv", "a")
+        n = events.persist(self._events, self._t0, now, force)
+        self._events.flush()
+        return n
+
+    def stop(self) -> None:
+        for tier in self._tiers:
+            tier.close()
+        self._tiers = []
+        self._close_segment()
+        if self._index:
+            _close(self._index)
+        self._index = None
+        if self._health:
+            _close(self._health)
+        self._health = None
+        if self._events:
+            _close(self._events)
+        self._events = None
+        if self._mem:
+            _close(self._mem)
+        self._mem = None
+        self._path = None
+
+    def unmount(self) -> None:
+        """Best effort: stop logging and release the card (e.g. after a write error)."""
+        try:
+            self.stop()
+        except Exception:
+            pass
+        if self._mounted:
             try:
-                self._file.close()
+                os.umount(self.mount_point)
             except Exception:
                 pass
-        self._file = None
-        self._path = None
+        self._mounted = False
+        self.sd_ok = False
 
     @property
     def current_path(self):
         return self._path
+
+    @property
+    def segment(self):
+        return self._segment
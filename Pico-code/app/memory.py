@@ -0,0 +1,137 @@
+# app/memory.py
+# Heap bookkeeping, and garbage collection at points the main loop chooses
+# (idle time before the next deadline) instead of wherever the allocator
+# runs out, e.g. in the middle of an SD block write or an I2C transaction
+import gc
+import time
+import micropython
+
+
+class Memory:
+    """
+    idle(now, slack_ms) is called where the loop would otherwise sleep,
+    slack_ms before its next deadline; with less than slack_min_ms it does
+    nothing. At most every check_ms it records gc.mem_free()/mem_alloc()
+    (each call scans the heap's allocation table), and collects if
+    collect_after bytes were allocated since the last collection.
+    gc.threshold(threshold) remains as the safety net; automatic
+    collections that happen anyway are counted in auto (seen as
+    mem_alloc dropping without one of ours, so approximate).
+
+    The largest free block has no API: every probe_ms, at the first idle
+    with probe_slack_ms to spare, right after a collection, it is found
+    by allocating bytearrays (binary search to probe_step bytes, a
+    collection after each that fits). The search stops where the next
+    step (about one collection) would overrun the idle slack, so largest
+    may then be a lower bound.
+
+    live is the heap in use right after our last collection; its growth
+    over baseline (taken at the first collection after rebase()) is the
+    leak indicator.
+    """
+    def __init__(self, threshold=0, collect_after=8192, slack_min_ms=5,
+                 emergency_buf=256, check_ms=100, probe_ms=60_000,
+                 probe_slack_ms=20, probe_step=256):
+        # exceptions raised in IRQs / out of memory still get a traceback
+        micropython.alloc_emergency_exception_buf(emergency_buf)
+        if threshold:
+            gc.threshold(threshold)
+        self.collect_after = collect_after
+        self.slack_min_ms = slack_min_ms
+        self.check_ms = check_ms
+        self.probe_ms = probe_ms
+        self.probe_slack_ms = probe_slack_ms
+        self.probe_step = probe_step
+
+        self.collections = 0
+        self.auto = 0
+        self.gc_us = 0
+        self.gc_us_max = 0
+        self.largest = 0
+        self.baseline = None
+        self._collect()
+        self.free = gc.mem_free()
+        self.min_free = self.free
+        now = time.ticks_ms()
+        self._check = now
+        self._probe = time.ticks_add(now, -probe_ms)
+
+    def _collect(self):
+        t = time.ticks_us()
+        gc.collect()
+        dt = time.ticks_diff(time.ticks_us(), t)
+        self.gc_us = dt
+        if dt > self.gc_us_max:
+            self.gc_us_max = dt
+        self.collections += 1
+        self.live = self.alloc = gc.mem_alloc()
+        if self.baseline is None:
+            self.baseline = self.live
+
+    def rebase(self):
+        """New leak baseline: the live heap at the next collection."""
+        self.baseline = None
+
+    @property
+    def growth(self):
+        return 0 if self.baseline is None else self.live - self.baseline
+
+    def row(self) -> str:
+        """free,alloc,largest,live,min_free,collections,auto,gc_us_max (mem.csv)"""
+        return "%d,%d,%d,%d,%d,%d,%d,%d" % (
+            self.free, self.alloc, self.largest, self.live, self.min_free,
+            self.collections, self.auto, self.gc_us_max)
+
+    def idle(self, now, slack_ms) -> bool:
+        """Bookkeeping + collection if due. Returns True if it collected."""
+        if slack_ms < self.slack_min_ms:
+            return False
+        if slack_ms >= self.probe_slack_ms and self._probe_due(now):
+            self._probe = now
+            t0 = time.ticks_us()
+            self._collect()
+            self.free = gc.mem_free()
+            self.largest = self._largest(self.free, t0, slack_ms * 1000)
+            return True
+        if time.ticks_diff(now, self._check) < self.check_ms:
+            return False
+        self._check = now
+        alloc = gc.mem_alloc()
+        if alloc < self.alloc - 1024:
+            self.auto += 1
+            self.live = alloc
+        self.alloc = alloc
+        free = gc.mem_free()
+        self.free = free
+        if free < self.min_free:
+            self.min_free = free
+        if alloc - self.live < self.collect_after:
+            return False
+        self._collect()
+        self.free = gc.mem_free()
+        return True
+
+    def _probe_due(self, now):
+        return time.ticks_diff(now, self._probe) >= self.probe_ms
+
+    def _largest(self, hi, t0, budget_us):
+        step = self.probe_step
+        lo = 0
+        # failed allocations must not trigger an automatic collection
+        gc.disable()
+        try:
+            while hi - lo > step:
+                # a step costs about one collection: stop before the slack ends
+                if time.ticks_diff(time.ticks_us(), t0) + self.gc_us > budget_us:
+                    break
+                mid = (lo + hi) // 2
+                try:
+                    bytearray(mid)
+                except MemoryError:
+                    hi = mid
+                    continue
+                lo = mid
+                gc.collect()
+        finally:
+            gc.enable()
+        return lo
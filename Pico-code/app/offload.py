@@ -0,0 +1,137 @@
+# app/offload.py
+# Log offload over the USB serial console. The host tool (tools/offload.py)
+# stops main.py, starts serve() through the raw REPL and then talks to it on
+# stdin/stdout:
+#
+#   host -> pico, one ASCII line per request
+#     L                        list every file under the root
+#     G <path> <offset> <n>    up to n bytes of a file, from offset on
+#     Q                        leave serve()
+#   pico -> host, frames
+#     magic "BO" | type u8 | 0 u8 | offset u32 | length u32 | crc32 u32 | payload
+#
+# Types: T text (the banner, one "path,size" line per file for L), D file
+# data at offset, E end of a reply (G: offset = where it stopped, length =
+# file size), X error text (ends the reply too). The CRC covers
+# offset/length and the payload, so the host can drop a bad frame and ask
+# again from the last good offset.
+import struct
+import sys
+import uos as os
+
+from journal import crc32
+
+MAGIC = b"BO"
+HDR_SIZE = 16
+_HDR = "<2sBBIII"
+CHUNK = 4096
+VERSION = 1
+
+TEXT = 0x54  # "T"
+DATA = 0x44  # "D"
+END = 0x45  # "E"
+ERROR = 0x58  # "X"
+
+
+def mount(mount_point):
+    """Mount the card unless it still is (main.py interrupted rather than reset)."""
+    try:
+        os.stat(mount_point)
+        return
+    except OSError:
+        pass
+    from machine import Pin, SPI
+    import config
+    from drivers.storage_sdcard import SDCard
+    spi = SPI(config.SD_SPI_ID, baudrate=config.SD_BAUDRATE, polarity=0, phase=0,
+              sck=Pin(config.SD_SCK), mosi=Pin(config.SD_MOSI), miso=Pin(config.SD_MISO))
+    sd = SDCard(spi, Pin(config.SD_CS, Pin.OUT), baudrate=config.SD_BAUDRATE,
+                baudrates=config.SD_BAUDRATES, crc=config.SD_CRC)
+    os.mount(os.VfsFat(sd), mount_point)
+
+
+class _Link:
+    """Frame writer around one reused buffer: file data is read straight into it."""
+    def __init__(self, out, chunk):
+        self.out = out
+        self.buf = bytearray(HDR_SIZE + chunk)
+        self.mv = memoryview(self.buf)
+        self.payload = self.mv[HDR_SIZE:]
+
+    def send(self, kind, offset, n):
+        mv = self.mv
+        struct.pack_into(_HDR, mv, 0, MAGIC, kind, 0, offset, n, 0)
+        crc = crc32(self.payload[:n], crc32(mv[4:12])) & 0xFFFFFFFF
+        struct.pack_into("<I", mv, 12, crc)
+        self.out.write(mv[:HDR_SIZE + n])
+
+    def text(self, kind, s, offset=0):
+        b = s.encode()[:len(self.payload)]
+        self.payload[:len(b)] = b
+        self.send(kind, offset, len(b))
+
+
+def _walk(link, path, rel):
+    for e in os.ilistdir(path):
+        name = e[0]
+        if e[1] & 0x4000:
+            _walk(link, path + "/" + name, rel + name + "/")
+        else:
+            link.text(TEXT, "%s%s,%d\n" % (rel, name, e[3]))
+
+
+def _send_file(link, path, offset, n):
+    payload = link.payload
+    size = os.stat(path)[6]
+    end = min(size, offset + n)
+    pos = offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while pos < end:
+            # the last chunk of a window only up to its end
+            want = min(len(payload), end - pos)
+            got = f.readinto(payload[:want] if want < len(payload) else payload)
+            if not got:
+                break
+            link.send(DATA, pos, got)
+            pos += got
+    link.send(END, pos, size)
+
+
+def _readline(inp):
+    line = bytearray()
+    while True:
+        c = inp.read(1)
+        if not c:
+            return None
+        if c == b"\n":
+            return bytes(line).decode().strip()
+        line += c
+
+
+def serve(root, inp=None, out=None, chunk=CHUNK):
+    """Answer L/G requests for the files under root until Q or end of input."""
+    if inp is None:
+        inp = sys.stdin.buffer
+        out = sys.stdout.buffer
+    link = _Link(out, chunk)
+    link.text(TEXT, "borealis-offload %d chunk=%d\n" % (VERSION, chunk))
+    while True:
+        line = _readline(inp)
+        if line is None:
+            return
+        cmd = line.split(" ")
+        try:
+            if cmd[0] == "L":
+                _walk(link, root, "")
+                link.send(END, 0, 0)
+            elif cmd[0] == "G":
+                # paths never contain spaces: the logger names them
+                _send_file(link, root + "/" + cmd[1], int(cmd[2]), int(cmd[3]))
+            elif cmd[0] == "Q":
+                link.send(END, 0, 0)
+                return
+            elif cmd[0]:
+                link.text(ERROR, "unknown request %s" % cmd[0])
+        except Exception as e:
+            link.text(ERROR, "%s: %r" % (line, e))
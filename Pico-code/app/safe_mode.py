@@ -1,6 +1,8 @@
 # app/safe_mode.py
 import time
 
+from app.events import EventLog
+
 LEVEL_OK = 0
 LEVEL_WARNING = 1
 LEVEL_DEGRADED = 2
@@ -15,22 +17,181 @@ _LEVEL_NAMES = {
     LEVEL_FATAL: "FATAL",
 }
 
+# peripheral health states
+HEALTH_OK = 0        # working
+HEALTH_FAILING = 1   # recent errors, still in use
+HEALTH_BACKOFF = 2   # down, re-init scheduled with exponential backoff
+HEALTH_DEAD = 3      # too many failed re-inits in a row, retried rarely
+
+_HEALTH_NAMES = ("OK", "FAIL", "BACK", "DEAD")
+
+def health_name(state: int) -> str:
+    return _HEALTH_NAMES[state]
+
 def level_name(level: int) -> str:
     return _LEVEL_NAMES.get(level, "UNKNOWN")
 
 
+class Backoff:
+    """
+    Retry timer for a failed peripheral: first retry after first_ms, each
+    further failure doubles the wait up to max_ms; ok() resets it.
+    """
+    def __init__(self, first_ms=1000, max_ms=60_000):
+        self.first_ms = first_ms
+        self.max_ms = max_ms
+        self.delay_ms = 0
+        self.failures = 0
+        self._next_ms = time.ticks_ms()
+
+    def due(self, now) -> bool:
+        return time.ticks_diff(now, self._next_ms) >= 0
+
+    def failed(self, now):
+        self.failures += 1
+        self.delay_ms = min(self.max_ms, self.delay_ms * 2) if self.delay_ms else self.first_ms
+        self._next_ms = time.ticks_add(now, self.delay_ms)
+
+    def wait(self, now, ms):
+        self._next_ms = time.ticks_add(now, ms)
+
+    def ok(self):
+        self.failures = 0
+        self.delay_ms = 0
+
+
+class Peripheral:
+    """
+    Health state machine of one peripheral:
+
+      OK --error--> FAILING --error_limit errors in window_ms--> BACKOFF
+      FAILING --a window without reaching the limit--> OK
+      any --down()--> BACKOFF --re-init ok--> OK
+      BACKOFF --dead_after failed re-inits in a row--> DEAD (retry every dead_retry_ms)
+
+    reinit(now) is the owner's bring-up function; it reports back with up()
+    or down(). Starts in BACKOFF with a re-init due, i.e. "not up yet".
+    Time spent usable is counted in up_ms (see uptime_ms()).
+    """
+    def __init__(self, manager, name, level, reinit, backoff, error_limit=3,
+                 window_ms=60_000, dead_after=8, dead_retry_ms=600_000):
+        self.manager = manager
+        self.name = name
+        self.level = level  # safe-mode level while down
+        self.reinit = reinit
+        self.backoff = backoff
+        self.error_limit = error_limit
+        self.window_ms = window_ms
+        self.dead_after = dead_after
+        self.dead_retry_ms = dead_retry_ms
+
+        self.state = HEALTH_BACKOFF
+        self.errors = 0          # total
+        self.recoveries = 0      # came back after having been up
+        self.up_ms = 0
+        self.last_init_us = 0
+        self._up_since = None
+        self._ever_up = False
+        self._win_start = 0
+        self._win_errors = 0
+
+    @property
+    def usable(self) -> bool:
+        return self.state <= HEALTH_FAILING
+
+    def uptime_ms(self, now) -> int:
+        if self._up_since is None:
+            return self.up_ms
+        return self.up_ms + time.ticks_diff(now, self._up_since)
+
+    def due(self, now) -> bool:
+        return self.state >= HEALTH_BACKOFF and self.backoff.due(now)
+
+    def up(self, now):
+        if self.usable:
+            return
+        if self._ever_up:
+            self.recoveries += 1
+        self._ever_up = True
+        self._up_since = now
+        self._win_errors = 0
+        self.backoff.ok()
+        self._set(HEALTH_OK, now)
+
+    def error(self, now, where, exc):
+        """A failed operation on a usable peripheral (it stays in use until error_limit)."""
+        self.errors += 1
+        self._win_errors += 1
+        if self._win_errors >= self.error_limit:
+            self.down(now, where, exc)
+            return
+        self.manager._record(LEVEL_WARNING, where, exc)
+        if self.state == HEALTH_OK:
+            self._set(HEALTH_FAILING, now)
+
+    def down(self, now, where, exc):
+        """The peripheral is unusable: schedule a re-init (failed re-inits back off)."""
+        if self.usable:
+            self.up_ms = self.uptime_ms(now)
+            self._up_since = None
+        else:
+            self.errors += 1
+        self.manager._record(self.level, where, exc)
+        self.backoff.failed(now)
+        if self.backoff.failures >= self.dead_after:
+            self.backoff.wait(now, self.dead_retry_ms)
+            self._set(HEALTH_DEAD, now)
+        else:
+            self._set(HEALTH_BACKOFF, now)
+
+    def tick(self, now):
+        # windows are restarted here, so _win_start never gets old enough
+        # for ticks_diff to wrap; a quiet window clears FAILING
+        if time.ticks_diff(now, self._win_start) >= self.window_ms:
+            self._win_start = now
+            self._win_errors = 0
+            if self.state == HEALTH_FAILING:
+                self._set(HEALTH_OK, now)
+
+    def _set(self, state, now):
+        old = self.state
+        self.state = state
+        self.manager._health_changed(self, old, now)
+
+
 class SafeModeManager:
     """
-    Tracks the highest active safe-mode level + last error details.
+    Tracks the safe-mode level + last error details, and the health of the
+    registered peripherals (see Peripheral).
     Also provides a non-blocking blink pattern scheduler.
+
+    The level is the worst of: every peripheral's contribution (WARNING
+    while failing, its own level while down) and the level of one-off
+    errors from set_error(), which decays one step per decay_ms without a
+    new one (FATAL never decays).
     """
-    def __init__(self, red_led):
+    def __init__(self, red_led, decay_ms=0, event_capacity=64, coalesce_ms=10_000):
         self.red_led = red_led
         self.level = LEVEL_OK
+        self.decay_ms = decay_ms
+
+        # one-off errors (set_error), decaying
+        self._error_level = LEVEL_OK
+        self._error_ms = 0
+
+        self.peripherals = []
+        self.health_changes = 0
+        # called as on_health_change(peripheral, old_state, now)
+        self.on_health_change = None
+        self._rr = 0
 
         self.last_error_where = ""
         self.last_error_type = ""
-        self.last_error_msg = ""
+        self.last_exc = None
+
+        # fault timeline (no allocation per error once a name was seen)
+        self.events = EventLog(event_capacity, coalesce_ms)
+        self.error_count = 0
 
         # blink scheduler
         self._blink_step = 0
@@ -38,20 +199,96 @@ class SafeModeManager:
         self._blink_on = False
 
     def set_error(self, level: int, where: str, exc: Exception):
-        # keep highest severity
-        if level > self.level:
-            self.level = level
+        # keep highest severity (until it decays)
+        if level >= self._error_level:
+            self._error_level = level
+            self._error_ms = time.ticks_ms()
+        self._record(level, where, exc)
+        self._update_level()
 
+    def _record(self, level, where, exc):
+        # only references here; the message is formatted when shown
         self.last_error_where = where
         self.last_error_type = exc.__class__.__name__
+        self.last_exc = exc
+        self.error_count += 1
+        self.events.add(time.ticks_ms(), level, where, exc)
+
+    @property
+    def last_error_msg(self) -> str:
+        if self.last_exc is None:
+            return ""
         # MicroPython exceptions sometimes don't have rich repr; str() is safest
-        self.last_error_msg = str(exc)[:120]  # cap so we don't explode the OLED
+        return str(self.last_exc)[:120]  # cap so we don't explode the OLED
+
+    # --- peripheral health ---
+
+    def peripheral(self, name, level, reinit, backoff, **kw) -> Peripheral:
+        p = Peripheral(self, name, level, reinit, backoff, **kw)
+        self.peripherals.append(p)
+        return p
+
+    def _health_changed(self, p, old, now):
+        self.health_changes += 1
+        self._update_level()
+        if self.on_health_change is not None and p.state != old:
+            self.on_health_change(p, old, now)
+
+    def _update_level(self):
+        level = self._error_level
+        for p in self.peripherals:
+            if p.state == HEALTH_FAILING:
+                c = LEVEL_WARNING
+            elif p.state >= HEALTH_BACKOFF and p.backoff.failures:
+                c = p.level  # (not yet brought up at all does not count)
+            else:
+                c = LEVEL_OK
+            if c > level:
+                level = c
+        self.level = level
+
+    def tick(self, now):
+        """Call every loop: error windows and level decay."""
+        for p in self.peripherals:
+            p.tick(now)
+        el = self._error_level
+        if (self.decay_ms and LEVEL_OK < el < LEVEL_FATAL
+                and time.ticks_diff(now, self._error_ms) >= self.decay_ms):
+            self._error_level = el - 1
+            self._error_ms = now
+        self._update_level()
+
+    def recover(self, now, budget_us):
+        """
+        Run due re-inits, round robin, until budget_us is used up. A started
+        re-init is never interrupted, so one slow one may overrun the budget.
+        Returns the number of re-inits attempted.
+        """
+        n = len(self.peripherals)
+        t0 = time.ticks_us()
+        tried = 0
+        for k in range(n):
+            p = self.peripherals[(self._rr + k) % n]
+            if not p.due(now):
+                continue
+            t = time.ticks_us()
+            try:
+                p.reinit(now)
+            except Exception as e:
+                p.down(now, p.name + "_init", e)
+            p.last_init_us = time.ticks_diff(time.ticks_us(), t)
+            tried += 1
+            if time.ticks_diff(time.ticks_us(), t0) >= budget_us:
+                self._rr = (self._rr + k + 1) % n
+                break
+        return tried
 
     def clear_to_ok(self):
+        self._error_level = LEVEL_OK
         self.level = LEVEL_OK
         self.last_error_where = ""
         self.last_error_type = ""
-        self.last_error_msg = ""
+        self.last_exc = None
 
     def tick_blink(self):
         """
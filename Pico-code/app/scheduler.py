@@ -0,0 +1,45 @@
+# app/scheduler.py
+# Fixed-rate sample deadlines: slot k is due at t0 + k * period_ms, however
+# late earlier samples were taken
+import time
+
+
+class FixedRate:
+    """
+    Deadline scheduler for a periodic task (ticks_ms).
+
+    take(now) claims the due slot and returns its lateness in ms, measured
+    from the oldest deadline not yet served. The next deadline moves by
+    exactly period_ms, so lateness never accumulates into the rate. If
+    whole periods went by (a long SD stall), those slots are skipped, not
+    caught up in a burst: late_ms // period_ms of them, counted in skipped.
+    """
+    def __init__(self, period_ms, now=None):
+        self.period_ms = period_ms
+        self.reset(time.ticks_ms() if now is None else now)
+
+    def reset(self, now):
+        """Slot 0 is due at now; clears the counters."""
+        self.next_ms = now
+        self.taken = 0
+        self.skipped = 0
+        self.late_ms = 0
+        self.late_max_ms = 0
+
+    def until(self, now) -> int:
+        """ms until the next deadline (<= 0: due)."""
+        return time.ticks_diff(self.next_ms, now)
+
+    def due(self, now) -> bool:
+        return time.ticks_diff(now, self.next_ms) >= 0
+
+    def take(self, now) -> int:
+        late = time.ticks_diff(now, self.next_ms)
+        missed = late // self.period_ms
+        self.next_ms = time.ticks_add(self.next_ms, (missed + 1) * self.period_ms)
+        self.skipped += missed
+        self.taken += 1
+        self.late_ms = late
+        if late > self.late_max_ms:
+            self.late_max_ms = late
+        return late
@@ -1,3 +1,14 @@
+def _days_from_civil(y, m, d):
+    # days since 1970-01-01 (proleptic Gregorian), independent of the port's epoch
+    if m <= 2:
+        y -= 1
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
 class Timekeeper:
     """
     Small glue layer around an RTC driver to provide formatted timestamps.
@@ -10,3 +21,13 @@ class Timekeeper:
     def utc_iso(self) -> str:
         y, m, d, wd, hh, mm, ss, sub = self.rtc.datetime()
         return "%04d-%02d-%02dT%02d:%02d:%02dZ" % (y, m, d, hh, mm, ss)
+
+    def stamp(self):
+        """
+        One RTC read -> (utc_iso, epoch_ms).
+        epoch_ms is milliseconds since 1970-01-01T00:00:00Z.
+        """
+        y, m, d, wd, hh, mm, ss, sub = self.rtc.datetime()
+        iso = "%04d-%02d-%02dT%02d:%02d:%02dZ" % (y, m, d, hh, mm, ss)
+        epoch_s = _days_from_civil(y, m, d) * 86400 + hh * 3600 + mm * 60 + ss
+        return iso, epoch_s * 1000
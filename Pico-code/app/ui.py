@@ -1,24 +1,519 @@
+import time
+import framebuf
+
+from app.safe_mode import level_name, health_name
+from app.fixedpoint import centi_str, centi_round
+
+
+class CellScreen:
+    """
+    Text-only renderer: the display as a fixed grid of 8x8 character cells
+    (16x8 on a 128x64 SSD1306).
+
+    Each cell remembers the character last drawn in it. put() only touches
+    cells whose character changed, by copying a cached glyph (rasterized
+    once per character) straight into the SSD1306 page buffer. flush() then
+    pushes just the dirty column span of each dirty page.
+    """
+    def __init__(self, oled):
+        self.oled = oled
+        self.cols = oled.width // 8
+        self.rows = oled.height // 8
+        self._cells = bytearray(b" " * (self.cols * self.rows))
+        self._buf = memoryview(oled.buffer)
+        self._glyphs = {}
+        self._gbuf = bytearray(8)
+        self._gfb = framebuf.FrameBuffer(self._gbuf, 8, 8, framebuf.MONO_VLSB)
+        # per page: dirty column span (lo > hi means clean)
+        self._lo = bytearray([255] * self.rows)
+        self._hi = bytearray(self.rows)
+        # the grid starts blank: the driver clears the panel on init
+
+    def _glyph(self, code):
+        g = self._glyphs.get(code)
+        if g is None:
+            self._gfb.fill(0)
+            self._gfb.text(chr(code), 0, 0, 1)
+            g = bytes(self._gbuf)
+            self._glyphs[code] = g
+        return g
+
+    def put(self, col, row, text, width=0):
+        """Write text at a cell, padded with spaces to width, clipped at the edge."""
+        n = len(text)
+        end = col + (width if width > n else n)
+        if end > self.cols:
+            end = self.cols
+        base = row * self.cols
+        cells = self._cells
+        for c in range(col, end):
+            i = c - col
+            code = ord(text[i]) if i < n else 32
+            if cells[base + c] == code:
+                continue
+            cells[base + c] = code
+            off = (row * self.cols + c) * 8
+            self._buf[off:off + 8] = self._glyph(code)
+            if c < self._lo[row]:
+                self._lo[row] = c
+            if c > self._hi[row]:
+                self._hi[row] = c
+
+    def clear(self):
+        for row in range(self.rows):
+            self.put(0, row, "", self.cols)
+
+    def flush(self):
+        """Send only the changed cells to the display."""
+        for row in range(self.rows):
+            lo = self._lo[row]
+            hi = self._hi[row]
+            if lo > hi:
+                continue
+            self.oled.show_span(row, lo * 8, hi * 8 + 7)
+            self._lo[row] = 255
+            self._hi[row] = 0
+
+
+class TextField:
+    """Fixed-width text at a cell; redraws only when the text changes."""
+    def __init__(self, screen, col, row, width):
+        self.screen = screen
+        self.col = col
+        self.row = row
+        self.width = width
+        self._last = None
+
+    def set(self, text):
+        if text == self._last:
+            return
+        self._last = text
+        self.screen.put(self.col, self.row, text, self.width)
+
+    def invalidate(self):
+        self._last = None
+
+
+class NumberField(TextField):
+    """
+    Number with fixed decimals. The value is compared at display precision
+    first, so an unchanged reading costs no string formatting at all.
+    """
+    def __init__(self, screen, col, row, width, fmt, decimals=1):
+        super().__init__(screen, col, row, width)
+        self.fmt = fmt
+        self._scale = 10 ** decimals
+        self._q = None
+
+    def set(self, value):
+        q = int(round(value * self._scale))
+        if q == self._q:
+            return
+        self._q = q
+        super().set(self.fmt % value)
+
+    def invalidate(self):
+        super().invalidate()
+        self._q = None
+
+
+class PairField(TextField):
+    """Two numbers in one format, reformatted only when either changes at display precision."""
+    def __init__(self, screen, col, row, width, fmt, decimals=1):
+        super().__init__(screen, col, row, width)
+        self.fmt = fmt
+        self._scale = 10 ** decimals
+        self._a = None
+        self._b = None
+
+    def set(self, a, b):
+        qa = int(round(a * self._scale))
+        qb = int(round(b * self._scale))
+        if qa == self._a and qb == self._b:
+            return
+        self._a = qa
+        self._b = qb
+        super().set(self.fmt % (a, b))
+
+    def invalidate(self):
+        super().invalidate()
+        self._a = None
+        self._b = None
+
+
+class CentiField(TextField):
+    """A centi-unit integer (sample value) shown with 1 or 2 decimals, no float math."""
+    def __init__(self, screen, col, row, width, fmt, decimals=1):
+        super().__init__(screen, col, row, width)
+        self.fmt = fmt
+        self.decimals = decimals
+        self._q = None
+
+    def set(self, value):
+        q = centi_round(value, self.decimals)
+        if q == self._q:
+            return
+        self._q = q
+        super().set(self.fmt % centi_str(value, self.decimals))
+
+    def invalidate(self):
+        super().invalidate()
+        self._q = None
+
+
+class CentiPairField(TextField):
+    """Two centi-unit integers in one format (see CentiField)."""
+    def __init__(self, screen, col, row, width, fmt, decimals=1):
+        super().__init__(screen, col, row, width)
+        self.fmt = fmt
+        self.decimals = decimals
+        self._a = None
+        self._b = None
+
+    def set(self, a, b):
+        qa = centi_round(a, self.decimals)
+        qb = centi_round(b, self.decimals)
+        if qa == self._a and qb == self._b:
+            return
+        self._a = qa
+        self._b = qb
+        super().set(self.fmt % (centi_str(a, self.decimals), centi_str(b, self.decimals)))
+
+    def invalidate(self):
+        super().invalidate()
+        self._a = None
+        self._b = None
+
+
+class ClockField:
+    """Date on one row, time on the next; skips work if the second is unchanged."""
+    def __init__(self, screen, col, row):
+        self.date = TextField(screen, col, row, 10)
+        self.time = TextField(screen, col, row + 1, 9)
+        self._last = None
+
+    def set(self, utc_iso):
+        if utc_iso == self._last:
+            return
+        self._last = utc_iso
+        self.date.set(utc_iso[:10])
+        self.time.set(utc_iso[11:19] + "Z")
+
+    def invalidate(self):
+        self._last = None
+        self.date.invalidate()
+        self.time.invalidate()
+
+
+# --- dashboard pages ---
+
+# index of SafePage in Ui.pages (the controller jumps there on new errors)
+PAGE_SAFE = 2
+
+class Page:
+    """
+    One dashboard page. Only the visible page renders, at most every
+    refresh_ms, so hidden pages cost nothing and the bus load per second is
+    bounded by the visible page alone. render() reads whatever it shows
+    from the App.
+    """
+    title = ""
+    refresh_ms = 1000
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.fields = []
+
+    def _field(self, f):
+        self.fields.append(f)
+        return f
+
+    def enter(self):
+        # static labels go here; fields redraw on the next render
+        for f in self.fields:
+            f.invalidate()
+
+    def render(self, app):
+        pass
+
+
+class LivePage(Page):
+    title = "Live"
+    refresh_ms = 500
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.temp = self._field(CentiField(screen, 0, 2, 16, "T: %s C"))
+        self.rh = self._field(CentiField(screen, 0, 3, 16, "H: %s %%"))
+        self.status = self._field(TextField(screen, 0, 4, 16))
+        self.clock = self._field(ClockField(screen, 0, 5))
+        self.range = self._field(CentiPairField(screen, 0, 7, 16, "%s..%s"))
+
+    def render(self, app):
+        if app.last_temp is not None:
+            self.temp.set(app.last_temp)
+            self.rh.set(app.last_rh)
+        level = app.safe.level
+        self.status.set("SAFE " + level_name(level) if level else "")
+        if app.last_iso:
+            self.clock.set(app.last_iso)
+        stats = app.temp_stats
+        if stats.n:
+            # rolling min/max since experiment start
+            self.range.set(stats.min, stats.max)
+
+
+class MinMaxPage(Page):
+    title = "Min/max"
+    refresh_ms = 1000
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.temp = self._field(CentiPairField(screen, 0, 2, 16, "T %6s %6s"))
+        self.rh = self._field(CentiPairField(screen, 0, 3, 16, "H %6s %6s"))
+        self.means = self._field(CentiPairField(screen, 0, 5, 16, "  %6s %6s"))
+        self.n = self._field(NumberField(screen, 0, 7, 16, "n %d", 0))
+
+    def enter(self):
+        super().enter()
+        self.screen.put(0, 1, "     min    max", 16)
+        self.screen.put(0, 4, "   T avg  H avg", 16)
+
+    def render(self, app):
+        t = app.temp_stats
+        h = app.rh_stats
+        self.n.set(t.n)
+        if not t.n:
+            return
+        self.temp.set(t.min, t.max)
+        self.rh.set(h.min, h.max)
+        self.means.set(t.mean, h.mean)
+
+
+class SafePage(Page):
+    title = "Safe mode"
+    refresh_ms = 500
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.level = self._field(TextField(screen, 0, 1, 16))
+        self.lines = [self._field(TextField(screen, 0, row, 16)) for row in range(2, 8)]
+        self._count = -1
+
+    def enter(self):
+        super().enter()
+        self._count = -1
+
+    def render(self, app):
+        safe = app.safe
+        self.level.set(level_name(safe.level))
+        count = safe.error_count + safe.health_changes
+        if count == self._count:
+            return
+        self._count = count
+        # one line per peripheral: state, errors, recoveries
+        lines = self.lines
+        i = 0
+        for p in safe.peripherals:
+            if i == len(lines):
+                break
+            lines[i].set("%-5s %s e%d r%d" % (p.name, health_name(p.state), p.errors, p.recoveries))
+            i += 1
+        # then the newest events: uptime second, where, repeat count
+        ev = safe.events
+        k = 0
+        while i < len(lines):
+            slot = ev.newest(k)
+            if slot < 0:
+                lines[i].set("")
+            elif ev.count[slot] > 1:
+                lines[i].set("%4ds %s x%d" % (ev.t_first[slot] // 1000, ev.names[ev.where[slot]], ev.count[slot]))
+            else:
+                lines[i].set("%4ds %s" % (ev.t_first[slot] // 1000, ev.names[ev.where[slot]]))
+            k += 1
+            i += 1
+
+
+class SdPage(Page):
+    title = "SD card"
+    refresh_ms = 2000
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.state = self._field(TextField(screen, 0, 1, 16))
+        self.clock = self._field(NumberField(screen, 0, 2, 16, "clk %.1f MHz"))
+        self.cache = self._field(PairField(screen, 0, 3, 16, "hit %d%% of %d", 0))
+        self.rows = self._field(NumberField(screen, 0, 5, 16, "rows %d", 0))
+        self.segment = self._field(NumberField(screen, 0, 6, 16, "segment %d", 0))
+        self.backlog = self._field(PairField(screen, 0, 7, 16, "wait %d drop %d", 0))
+
+    def render(self, app):
+        if app.sd_logging:
+            self.state.set("logging")
+        elif app.sd_ok:
+            self.state.set("mounted")
+        else:
+            self.state.set("%s, %d retries" % (health_name(app.h_sd.state), app.h_sd.backoff.failures))
+        if app.sd is not None:
+            self.clock.set(app.sd.baudrate / 1_000_000)
+        dev = app.sd_dev
+        if dev is not None and hasattr(dev, "hits"):
+            total = dev.hits + dev.misses
+            self.cache.set(100 * dev.hits // total if total else 0, total)
+        self.rows.set(app.sd_logger.rows)
+        self.segment.set(app.sd_logger.segment)
+        self.backlog.set(app.backlog.n, app.backlog.dropped)
+
+
+class TimingPage(Page):
+    title = "Loop timing"
+    refresh_ms = 500
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.last = self._field(NumberField(screen, 0, 2, 16, "loop %6d us", 0))
+        self.max = self._field(NumberField(screen, 0, 3, 16, "max  %6d us", 0))
+        self.mean = self._field(NumberField(screen, 0, 4, 16, "avg  %6d us", 0))
+        self.first = self._field(NumberField(screen, 0, 5, 16, "1st  %6d ms", 0))
+        self.sample = self._field(NumberField(screen, 0, 6, 16, "smpl %6d us", 0))
+        self.late = self._field(PairField(screen, 0, 7, 16, "late %3d/%4dms", 0))
+        self.skipped = self._field(NumberField(screen, 0, 1, 16, "skipped %6d", 0))
+
+    def render(self, app):
+        self.last.set(app.loop_us)
+        self.max.set(app.loop_us_max)
+        if app.loop_n:
+            self.mean.set(app.loop_us_sum // app.loop_n)
+        if app.first_sample_ms is not None:
+            self.first.set(app.first_sample_ms)
+        self.sample.set(app.sample_us)
+        self.late.set(app.sampler.late_ms, app.sampler.late_max_ms)
+        self.skipped.set(app.sampler.skipped)
+
+
+class AcqPage(Page):
+    title = "Oversample"
+    refresh_ms = 1000
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.step = self._field(NumberField(screen, 0, 4, 16, "step %6d us", 0))
+        self.cost = self._field(NumberField(screen, 0, 5, 16, "filt %6d us", 0))
+        self.samples = self._field(NumberField(screen, 0, 6, 16, "n %10d", 0))
+        self.missed = self._field(NumberField(screen, 0, 7, 16, "miss %6d", 0))
+        self._setup = False
+
+    def render(self, app):
+        acq = app.acq
+        if not self._setup:
+            # fixed while running: drawn once per visit
+            self._setup = True
+            self.screen.put(0, 1, "%s %dms /%d" % (acq.kind, acq.period_ms, acq.decim), 16)
+            self.screen.put(0, 2, "delay %5d ms" % acq.delay_ms, 16)
+            self.screen.put(0, 3, "noise x%.2f" % acq.noise_gain, 16)
+        self.step.set(acq.step_us)
+        self.cost.set(acq.cost_us)
+        self.samples.set(acq.samples)
+        self.missed.set(acq.missed)
+
+    def enter(self):
+        super().enter()
+        self._setup = False
+
+
+class MemPage(Page):
+    title = "Heap"
+    refresh_ms = 1000
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.free = self._field(NumberField(screen, 0, 1, 16, "free %7d", 0))
+        self.min = self._field(NumberField(screen, 0, 2, 16, "min  %7d", 0))
+        self.largest = self._field(NumberField(screen, 0, 3, 16, "big  %7d", 0))
+        self.live = self._field(NumberField(screen, 0, 4, 16, "live %7d", 0))
+        self.growth = self._field(NumberField(screen, 0, 5, 16, "grow %+7d", 0))
+        self.gc = self._field(PairField(screen, 0, 6, 16, "gc %4d/%5dus", 0))
+        self.count = self._field(PairField(screen, 0, 7, 16, "n %5d auto %d", 0))
+
+    def render(self, app):
+        mem = app.mem
+        self.free.set(mem.free)
+        self.min.set(mem.min_free)
+        self.largest.set(mem.largest)
+        self.live.set(mem.live)
+        self.growth.set(mem.growth)
+        self.gc.set(mem.gc_us, mem.gc_us_max)
+        self.count.set(mem.collections, mem.auto)
+
+
 class Ui:
     """
     OLED rendering logic only.
+
+    While the experiment runs the display is a paged dashboard (next_page()
+    cycles it); OFF and safe-mode error screens are separate.
     """
     def __init__(self, oled):
         self.oled = oled
+        self.screen = CellScreen(oled)
+        s = self.screen
+        self._page = None
+
+        self._title = TextField(s, 0, 0, 16)
+        self._clock_off = ClockField(s, 0, 2)
+        self._lines = [TextField(s, 0, row, 16) for row in range(1, 8)]
+
+        self.pages = [LivePage(s), MinMaxPage(s), SafePage(s), SdPage(s), TimingPage(s), AcqPage(s), MemPage(s)]
+        self.page = 0
+        self._last_render = 0
+
+    def _enter(self, page):
+        # switching screens: blank the grid and forget every field's state
+        if page == self._page:
+            return False
+        self._page = page
+        self.screen.clear()
+        self._title.invalidate()
+        self._clock_off.invalidate()
+        for f in self._lines:
+            f.invalidate()
+        return True
+
+    def next_page(self):
+        self.show_page(self.page + 1)
+
+    def show_page(self, index):
+        # takes effect (immediately) on the next show_on
+        self.page = index % len(self.pages)
+        self._page = None
 
     def show_off(self, utc_iso: str):
-        self.oled.fill(0)
-        self.oled.text("Experiment OFF", 0, 0)
-        self.oled.text(utc_iso[:10], 0, 16)
-        self.oled.text(utc_iso[11:19] + "Z", 0, 26)
-        self.oled.text("Switch the switch", 0, 44)
-        self.oled.text("to turn ON", 0, 54)
-        self.oled.show()
-
-    def show_on(self, temp_c: float, rh: float, utc_iso: str):
-        self.oled.fill(0)
-        self.oled.text("Borealis-1", 0, 0)
-        self.oled.text("T: %.1f C" % temp_c, 0, 16)
-        self.oled.text("H: %.1f %%" % rh, 0, 26)
-        self.oled.text(utc_iso[:10], 0, 38)
-        self.oled.text(utc_iso[11:19] + "Z", 0, 48)
-        self.oled.show()
+        if self._enter("off"):
+            self._title.set("Experiment OFF")
+            self._lines[4].set("Flip the switch")
+            self._lines[5].set("to turn ON")
+        self._clock_off.set(utc_iso)
+        self.screen.flush()
+
+    def show_on(self, app, now: int) -> bool:
+        """Render the visible dashboard page if it is due. Returns True if drawn."""
+        page = self.pages[self.page]
+        if self._enter(page):
+            self._title.set("%-12s%d/%d" % (page.title, self.page + 1, len(self.pages)))
+            page.enter()
+        elif time.ticks_diff(now, self._last_render) < page.refresh_ms:
+            return False
+        self._last_render = now
+        page.render(app)
+        self.screen.flush()
+        return True
+
+    def show_error(self, level: str, where: str, err_type: str, msg: str):
+        self._enter("error")
+        self._title.set("SAFE " + level)
+        lines = self._lines
+        lines[1].set(where[:16])
+        lines[2].set(err_type[:16])
+        for i in range(4):
+            lines[3 + i].set(msg[i * 16:(i + 1) * 16])
+        self.screen.flush()
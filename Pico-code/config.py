@@ -10,6 +10,9 @@ I2C_ID = 0
 I2C_SDA = 0
 I2C_SCL = 1
 I2C_FREQ = 400_000
+# Per-transaction limit (a slave stretching SCL forever); a failed
+# transaction that leaves SDA/SCL low triggers a bus clear (app/i2c_bus.py)
+I2C_TIMEOUT_US = 10_000
 
 # SHT31
 SHT31_ADDR = 0x44
@@ -23,6 +26,12 @@ BUTTON_PULL = "down"          # "down" or "up"
 BUTTON_ACTIVE_LEVEL = 1       # 0 if switch pulls pin low when ON; 1 if pulls high when ON
 BUTTON_DEBOUNCE_MS = 50       # keep small, you already have a stable switch
 
+# Momentary push button that cycles the OLED dashboard pages (None = no button):
+# Live, Min/max, Safe mode, SD card, Loop timing, Oversample, Heap
+PAGE_BUTTON_PIN = 14
+PAGE_BUTTON_PULL = "up"
+PAGE_BUTTON_ACTIVE_LEVEL = 0  # pressed pulls the pin to GND
+
 # LEDs
 RED_LED_PIN = 17
 GREEN_LED_PIN = 16
@@ -34,8 +43,109 @@ SD_SCK = 10
 SD_MOSI = 11
 SD_MISO = 12
 SD_CS = 13
-SD_BAUDRATE = 1_000_000
+SD_BAUDRATE = 1_000_000                  # fallback clock, always works
+SD_BAUDRATES = (25_000_000, 12_500_000)  # tried fastest first after init (capped by card CSD, verified by read-back)
+SD_CRC = False                           # CMD59 CRC on commands + data (costs CPU per block)
+
+# Sector cache between VfsFat and the card (drivers/block_cache.py)
+SD_CACHE_BLOCKS = 8             # RAM budget in 512-byte sectors (0 = no cache)
+SD_CACHE_WRITE_BACK = False     # hold FAT metadata writes until sync (faster, less crash-safe)
+SD_READAHEAD_BLOCKS = 4         # sequential reads fetch this many sectors per CMD18
 SD_MOUNT_POINT = "/sd"
 
+# Staged init: the OLED and SD card come up from the main loop after the
+# sensor + RTC; any peripheral that fails is retried after
+# PERIPH_RETRY_MS, doubling per failure up to PERIPH_RETRY_MAX_MS
+PERIPH_RETRY_MS = 1000
+PERIPH_RETRY_MAX_MS = 60_000
+
+# Peripheral health (app/safe_mode.py): HEALTH_ERROR_LIMIT errors within
+# HEALTH_WINDOW_MS take a peripheral down for re-init; after
+# HEALTH_DEAD_AFTER failed re-inits in a row it is only retried every
+# HEALTH_DEAD_RETRY_MS. Re-inits get HEALTH_RECOVER_BUDGET_US per loop
+# (a started one is not interrupted). One-off errors lower the safe-mode
+# level one step per SAFE_LEVEL_DECAY_MS without a new one.
+HEALTH_ERROR_LIMIT = 3
+HEALTH_WINDOW_MS = 60_000
+HEALTH_DEAD_AFTER = 8
+HEALTH_DEAD_RETRY_MS = 10 * 60_000
+HEALTH_RECOVER_BUDGET_US = 20_000
+SAFE_LEVEL_DECAY_MS = 5 * 60_000
+
+# Safe-mode event log (app/events.py): ring of EVENT_RING_SIZE records; the
+# same error repeating within EVENT_COALESCE_MS of a record's first
+# occurrence only bumps its count. Closed records go to events.csv in the
+# log directory every EVENT_PERSIST_MS (and when the experiment stops).
+EVENT_RING_SIZE = 64
+EVENT_COALESCE_MS = 10_000
+EVENT_PERSIST_MS = 30_000
+
+# Heap (app/memory.py): the loop collects garbage in idle time at least
+# GC_SLACK_MS before its next deadline, once GC_COLLECT_AFTER_BYTES were
+# allocated since the last collection; gc.threshold(GC_THRESHOLD_BYTES) is
+# only the safety net (None: MicroPython's default, collect when full).
+# Every MEM_LOG_MS a heap record goes to mem.csv; the largest free block
+# is probed every MEM_PROBE_MS (needs MEM_PROBE_SLACK_MS of idle time).
+# The live heap (after a collection) growing by MEM_GROWTH_WARN_BYTES over
+# the experiment start, or free memory below MEM_LOW_FREE_BYTES at a
+# MEM_LOG_MS check (the current free heap, so it clears again), is a
+# warning. EMERGENCY_EXC_BUF bytes are reserved for exceptions raised
+# with the heap locked or exhausted.
+GC_THRESHOLD_BYTES = 48 * 1024
+GC_COLLECT_AFTER_BYTES = 8 * 1024
+GC_SLACK_MS = 5
+MEM_LOG_MS = 60_000
+MEM_PROBE_MS = 60_000
+MEM_PROBE_SLACK_MS = 20
+MEM_GROWTH_WARN_BYTES = 16 * 1024
+MEM_LOW_FREE_BYTES = 24 * 1024
+EMERGENCY_EXC_BUF = 256
+
+# Rows taken while the SD card is not (yet) mounted are kept in RAM (16
+# bytes each, oldest dropped when full) and written once it mounts,
+# at most LOG_BACKLOG_DRAIN_ROWS per loop iteration
+LOG_BACKLOG_ROWS = 300
+LOG_BACKLOG_DRAIN_ROWS = 20
+
 # Sampling / UI update
-SAMPLE_INTERVAL_MS = 1000      # sensor read & log interval while ON
+SAMPLE_INTERVAL_MS = 1000      # log interval while ON (fixed grid, app/scheduler.py)
+
+# Oversampling (app/acquire.py): the SHT31 is measured every ACQ_INTERVAL_MS
+# (>= 16 ms: a measurement takes 15) and each channel is low-pass filtered
+# down to one value per SAMPLE_INTERVAL_MS: "fir" (linear phase, delay
+# SAMPLE_INTERVAL_MS) or "iir" (one pole, cheaper). ACQ_INTERVAL_MS =
+# SAMPLE_INTERVAL_MS logs single measurements. "fir" decimates by at most
+# 64 (a longer filter would alias): beyond that it measures every 2, 3, ..
+# ACQ_INTERVAL_MS. Faster sampling warms the SHT31 slightly.
+ACQ_INTERVAL_MS = 50
+ACQ_FILTER = "fir"
+
+# Logging tiers: besides the full-rate raw log, one summary CSV per entry
+# (mean/min/max over that many seconds) in the experiment directory,
+# e.g. 20251206T121200Z/10s.csv
+LOG_TIERS_S = (10, 60)
+
+# Raw log rotation: a new raw_NNNN.bjl segment starts when the current one
+# is full or after LOG_SEGMENT_MAX_S (0 = no time limit). Segments are
+# preallocated to what LOG_SEGMENT_MAX_S of rows needs at SAMPLE_INTERVAL_MS
+# and LOG_SYNC_MS (at most LOG_SEGMENT_MAX_BYTES): 185 blocks, ~93 KB, at
+# the defaults. index.csv gets a (segment, t_ms, byte offset) checkpoint at
+# each segment start and every LOG_INDEX_EVERY_ROWS rows.
+LOG_SEGMENT_MAX_BYTES = 512 * 1024
+LOG_SEGMENT_MAX_S = 15 * 60
+LOG_INDEX_EVERY_ROWS = 60
+
+# Raw row encoding in the segments: "csv" (text, like the summary files)
+# or "delta" (binary varint deltas, ~5x smaller: ~4 bytes per row instead
+# of ~23; decoded by the data-analysis loader, see lib/deltacodec.py and
+# tools/codec_report.py). The card only sees the saving where more rows
+# than fit a CSV block (~21) arrive between LOG_SYNC_MS commits: at the
+# defaults (1 Hz, 5 s) both formats write 5 rows per block, at 10 Hz
+# delta takes ~3x fewer blocks.
+LOG_FORMAT = "csv"
+
+# Raw rows are journaled in 512-byte blocks; a partially filled block is
+# written at least this often (= most data a power cut can lose). Each
+# commit takes a whole block of card: at 1 Hz and 5 s that is 5 rows per
+# block, ~100 bytes of card per row in either LOG_FORMAT.
+LOG_SYNC_MS = 5000
@@ -0,0 +1,205 @@
+# drivers/block_cache.py
+# LRU sector cache in front of a block device (SDCard protocol: readblocks,
+# writeblocks, ioctl), for VfsFat's repeated FAT/directory sector reads
+from micropython import const
+
+_BLOCK = const(512)
+
+# extra ioctl ops (1..6 are the standard block-device ops)
+IOCTL_HITS = const(0x100)
+IOCTL_MISSES = const(0x101)
+IOCTL_RESET_STATS = const(0x102)
+
+
+def _u16(b, o):
+    return b[o] | (b[o + 1] << 8)
+
+
+def _u32(b, o):
+    return b[o] | (b[o + 1] << 8) | (b[o + 2] << 16) | (b[o + 3] << 24)
+
+
+class BlockCache:
+    """
+    Fixed-RAM LRU cache of 512-byte sectors.
+
+    nblocks:    cache slots (RAM = nblocks * 512 bytes)
+    write_back: keep writes to FAT metadata sectors (boot sector, FATs, FAT16
+                root dir) in RAM until sync/evict; data sectors are always
+                written through
+    readahead:  on a sequential single-sector miss, fetch this many sectors
+                with one multi-block read (CMD18)
+
+    The metadata range is learned from the MBR/boot sector as VfsFat reads
+    them at mount.
+    """
+    def __init__(self, dev, nblocks=8, write_back=False, readahead=0):
+        self.dev = dev
+        self.nblocks = nblocks
+        self.write_back = write_back
+        self.readahead = min(readahead, nblocks // 2) if readahead > 1 else 0
+
+        self._buf = bytearray(nblocks * _BLOCK)
+        self._mv = memoryview(self._buf)
+        self._tag = [-1] * nblocks
+        self._age = [0] * nblocks
+        self._dirty = bytearray(nblocks)
+        self._slot = {}
+        self._clock = 0
+        self._ra = memoryview(bytearray(self.readahead * _BLOCK)) if self.readahead else None
+        self._last = -2
+        self._sectors = dev.ioctl(4, 0)
+
+        # FAT layout (unknown until the boot sector went through the cache)
+        self._part = None
+        self._meta_lo = 0
+        self._meta_hi = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.readaheads = 0
+        self.writebacks = 0
+
+    # --- slots ---
+
+    def _lookup(self, block):
+        i = self._slot.get(block)
+        if i is not None:
+            self._clock += 1
+            self._age[i] = self._clock
+        return i
+
+    def _evict(self):
+        # least recently used slot (free slots have age 0)
+        age = self._age
+        victim = 0
+        for i in range(1, self.nblocks):
+            if age[i] < age[victim]:
+                victim = i
+        if self._dirty[victim]:
+            self._flush_slot(victim)
+        old = self._tag[victim]
+        if old >= 0:
+            del self._slot[old]
+            self._tag[victim] = -1
+        return victim
+
+    def _insert(self, block, data):
+        i = self._evict()
+        self._mv[i * _BLOCK:(i + 1) * _BLOCK] = data
+        self._tag[i] = block
+        self._slot[block] = i
+        self._clock += 1
+        self._age[i] = self._clock
+        return i
+
+    def _flush_slot(self, i):
+        self.dev.writeblocks(self._tag[i], self._mv[i * _BLOCK:(i + 1) * _BLOCK])
+        self._dirty[i] = 0
+        self.writebacks += 1
+
+    def sync(self):
+        for i in range(self.nblocks):
+            if self._dirty[i]:
+                self._flush_slot(i)
+
+    # --- FAT layout ---
+
+    def _learn(self, block, data):
+        if data[510] != 0x55 or data[511] != 0xAA:
+            return
+        is_boot = data[0] in (0xEB, 0xE9) and _u16(data, 11) == _BLOCK
+        if block == 0 and not is_boot:
+            self._part = _u32(data, 446 + 8)  # first MBR partition
+            return
+        if not is_boot or (self._part is not None and block != self._part):
+            return
+        reserved = _u16(data, 14)
+        nfats = data[16]
+        root_entries = _u16(data, 17)
+        fat_size = _u16(data, 22) or _u32(data, 36)
+        self._part = block
+        self._meta_lo = block
+        self._meta_hi = block + reserved + nfats * fat_size + (root_entries * 32 + _BLOCK - 1) // _BLOCK
+
+    def _is_meta(self, block):
+        return self._meta_lo <= block < self._meta_hi
+
+    # --- block device protocol ---
+
+    def readblocks(self, block_num, buf):
+        n = len(buf) // _BLOCK
+        mv = memoryview(buf)
+        if n > 1:
+            self._read_many(block_num, n, mv)
+            return
+
+        i = self._lookup(block_num)
+        if i is not None:
+            self.hits += 1
+            mv[:] = self._mv[i * _BLOCK:(i + 1) * _BLOCK]
+            self._last = block_num
+            return
+
+        self.misses += 1
+        sequential = block_num == self._last + 1
+        self._last = block_num
+        if sequential and self._ra is not None and block_num + self.readahead <= self._sectors:
+            k = self.readahead
+            self.dev.readblocks(block_num, self._ra)
+            self.readaheads += 1
+            for j in range(k):
+                if (block_num + j) not in self._slot:
+                    self._insert(block_num + j, self._ra[j * _BLOCK:(j + 1) * _BLOCK])
+            mv[:] = self._ra[:_BLOCK]
+            return
+
+        self.dev.readblocks(block_num, mv)
+        if self._meta_hi == 0 and block_num <= (self._part or 0):
+            self._learn(block_num, mv)
+        self._insert(block_num, mv)
+
+    def _read_many(self, block_num, n, mv):
+        # bulk reads go straight to the card; cached copies win (may be dirty)
+        self.misses += n
+        self.dev.readblocks(block_num, mv)
+        for j in range(n):
+            i = self._slot.get(block_num + j)
+            if i is not None:
+                mv[j * _BLOCK:(j + 1) * _BLOCK] = self._mv[i * _BLOCK:(i + 1) * _BLOCK]
+        self._last = block_num + n - 1
+
+    def writeblocks(self, block_num, buf):
+        n = len(buf) // _BLOCK
+        mv = memoryview(buf)
+        if n == 1 and self.write_back and self._is_meta(block_num):
+            i = self._lookup(block_num)
+            if i is None:
+                i = self._insert(block_num, mv)
+            else:
+                self._mv[i * _BLOCK:(i + 1) * _BLOCK] = mv
+            self._dirty[i] = 1
+            return
+
+        self.dev.writeblocks(block_num, mv)
+        # keep cached copies coherent
+        for j in range(n):
+            i = self._slot.get(block_num + j)
+            if i is not None:
+                self._mv[i * _BLOCK:(i + 1) * _BLOCK] = mv[j * _BLOCK:(j + 1) * _BLOCK]
+                self._dirty[i] = 0
+            elif n == 1 and self._is_meta(block_num):
+                self._insert(block_num, mv)
+
+    def ioctl(self, op, arg):
+        if op == 3 or op == 2:  # sync / deinit
+            self.sync()
+            return self.dev.ioctl(op, arg)
+        if op == IOCTL_HITS:
+            return self.hits
+        if op == IOCTL_MISSES:
+            return self.misses
+        if op == IOCTL_RESET_STATS:
+            self.hits = self.misses = self.readaheads = self.writebacks = 0
+            return 0
+        return self.dev.ioctl(op, arg)
@@ -82,6 +82,17 @@ class SSD1306:
         self.write_cmd(self.pages - 1)
         self.write_data(self.buffer)
 
+    def show_span(self, page, x0, x1):
+        """Send columns x0..x1 of one 8-pixel page only."""
+        self.write_cmd(SET_COL_ADDR)
+        self.write_cmd(x0)
+        self.write_cmd(x1)
+        self.write_cmd(SET_PAGE_ADDR)
+        self.write_cmd(page)
+        self.write_cmd(page)
+        o = page * self.width
+        self.write_data(memoryview(self.buffer)[o + x0:o + x1 + 1])
+
     def fill(self, col):
         self.framebuf.fill(col)
 
@@ -123,7 +134,8 @@ class SSD1306_I2C(SSD1306):
         self.i2c.writeto(self.addr, self._temp)
 
     def write_data(self, buf):
-        self.i2c.writeto(self.addr, b"\x40" + buf)
+        # scatter write: no prefixed copy of the buffer per update
+        self.i2c.writevto(self.addr, (b"\x40", buf))
 
 
 class SSD1306_SPI(SSD1306):
@@ -22,6 +22,7 @@ class Button:
         self._stable = self.pin.value()
         self._last_read = self._stable
         self._last_change_ms = time.ticks_ms()
+        self._was_active = self._stable == self.active_level
 
     def read(self) -> int:
         raw = self.pin.value()
@@ -39,3 +40,10 @@ class Button:
 
     def is_active(self) -> bool:
         return self.read() == self.active_level
+
+    def pressed(self) -> bool:
+        """True once per debounced press (inactive -> active edge)."""
+        active = self.is_active()
+        edge = active and not self._was_active
+        self._was_active = active
+        return edge
@@ -1,23 +1,42 @@
 import time
 
+# single shot, high repeatability, clock stretching disabled
+_MEASURE = b"\x24\x00"
+MEASURE_MS = 15
+
 
 class SHT31:
     def __init__(self, i2c, addr=0x44):
         self.i2c = i2c
         self.addr = addr
 
-    def read(self):
-        # Single shot, high repeatability, clock stretching disabled (0x2400)
-        self.i2c.writeto(self.addr, b"\x24\x00")
-        time.sleep_ms(15)
+    def trigger(self):
+        """Start a measurement; fetch_raw() it MEASURE_MS later (the bus stays free meanwhile)."""
+        self.i2c.writeto(self.addr, _MEASURE)
 
+    def fetch_raw(self):
+        """(t_raw, rh_raw) of the last triggered measurement."""
         data = self.i2c.readfrom(self.addr, 6)
         if len(data) != 6:
             raise RuntimeError("SHT31 read error")
+        return (data[0] << 8) | data[1], (data[3] << 8) | data[4]
 
-        t_raw = (data[0] << 8) | data[1]
-        rh_raw = (data[3] << 8) | data[4]
+    @staticmethod
+    def convert(t_raw, rh_raw):
+        """
+        Raw ticks to (centi-degrees C, centi-percent RH), rounded, in small
+        ints: T = -45 + 175 * t_raw / 65535 and RH = 100 * rh_raw / 65535,
+        with x / 65535 done as x * (1 + 2**-16) / 2**16 (exact to 1e-9).
+        """
+        q = t_raw * 4375  # 175 * 100 / 4
+        temp_cc = ((q + (q >> 16) + 8192) >> 14) - 4500
+        q = rh_raw * 625  # 100 * 100 / 16
+        rh_cp = (q + (q >> 16) + 2048) >> 12
+        return temp_cc, rh_cp
 
-        temp_c = -45 + (175 * t_raw / 65535.0)
-        rh = 100 * rh_raw / 65535.0
-        return temp_c, rh
+    def read(self):
+        """(centi-degrees C, centi-percent RH) of a fresh measurement."""
+        self.trigger()
+        time.sleep_ms(MEASURE_MS)
+        t_raw, rh_raw = self.fetch_raw()
+        return self.convert(t_raw, rh_raw)
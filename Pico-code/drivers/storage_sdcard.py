@@ -6,18 +6,93 @@ _CMD_TIMEOUT = 100
 _R1_IDLE_STATE = 1
 _R1_ILLEGAL_COMMAND = 4
 
+_INIT_BAUDRATE = 400_000     # SPI-mode init must stay <= 400 kHz
+_ACMD41_TIMEOUT_MS = 1000    # spec: card leaves idle within 1 s
+
+# CSD TRAN_SPEED: time value (x10) and rate unit (as a power of ten, bit/s x10)
+_TRAN_VALUE = (0, 10, 12, 13, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 70, 80)
+
 _TOKEN_CMD25 = 0xFC
 _TOKEN_STOP_TRAN = 0xFD
 _TOKEN_DATA = 0xFE
 
+# tokens as ready-made buffers so sending one never allocates
+_TOKEN_BUF = {
+    _TOKEN_CMD25: b"\xFC",
+    _TOKEN_STOP_TRAN: b"\xFD",
+    _TOKEN_DATA: b"\xFE",
+}
+
+_POLL = 8  # bytes clocked per poll while waiting for the card
+
+
+_crc16_table = None
+
+
+def _crc7(buf, n):
+    crc = 0
+    for i in range(n):
+        b = buf[i]
+        for _ in range(8):
+            crc <<= 1
+            if (b ^ crc) & 0x80:
+                crc ^= 0x09
+            b <<= 1
+    return crc & 0x7F
+
+
+def _crc16(buf):
+    # CRC16-CCITT (XModem) as used for SD data blocks
+    global _crc16_table
+    if _crc16_table is None:
+        _crc16_table = []
+        for i in range(256):
+            c = i << 8
+            for _ in range(8):
+                c = ((c << 1) ^ 0x1021) if c & 0x8000 else (c << 1)
+            _crc16_table.append(c & 0xFFFF)
+    t = _crc16_table
+    crc = 0
+    for b in buf:
+        crc = ((crc << 8) & 0xFF00) ^ t[(crc >> 8) ^ b]
+    return crc
+
+
+def tran_speed(csd) -> int:
+    """Max SPI clock in Hz the card advertises in its CSD (TRAN_SPEED)."""
+    ts = csd[3]
+    return _TRAN_VALUE[(ts >> 3) & 0x0F] * 10 ** ((ts & 0x07) + 4)
+
 
 class SDCard:
-    def __init__(self, spi, cs, baudrate=1_000_000):
+    """
+    baudrate:  fallback clock, always used if nothing faster verifies
+    baudrates: faster clocks to try, fastest first; each is capped by the
+               card's CSD max rate and must read the CSD back unchanged
+    crc:       enable CMD59 CRC checking on commands and data blocks
+
+    init_times holds ms spent per init phase.
+    """
+    def __init__(self, spi, cs, baudrate=1_000_000, baudrates=(), crc=False):
         self.spi = spi
         self.cs = cs
         self.cs.init(self.cs.OUT, value=1)
         self.baudrate = baudrate
+        self.baudrates = baudrates
+        self.crc = crc
         self.cdv = 512  # may become 1 for SDHC/SDXC
+        self.version = 2
+        self.sectors = 0
+        self.max_baudrate = 0
+        self.init_times = {}
+
+        # scratch buffers reused by every transfer (no per-block allocation)
+        self._cmdbuf = bytearray(6)
+        self._byte = bytearray(1)
+        self._crcbuf = bytearray(2)
+        self._poll = bytearray(_POLL)
+        self._poll_mv = memoryview(self._poll)
+
         self._init_card()
 
     def _init_spi(self, baudrate):
@@ -29,31 +104,38 @@ class SDCard:
     def _deselect(self):
         self.cs(1)
 
+    def _read_byte(self):
+        self.spi.readinto(self._byte, 0xFF)
+        return self._byte[0]
+
     def _wait_ready(self, timeout=500):
+        # busy is 0x00; once the card drives 0xFF it stays there
+        poll = self._poll
         start = time.ticks_ms()
         while True:
-            if self.spi.read(1, 0xFF)[0] == 0xFF:
+            self.spi.readinto(poll, 0xFF)
+            if poll[_POLL - 1] == 0xFF:
                 return True
             if time.ticks_diff(time.ticks_ms(), start) >= timeout:
                 return False
 
     def _cmd(self, cmd, arg, crc=0x95):
         self._deselect()
-        self.spi.read(1, 0xFF)
+        self._read_byte()
         self._select()
         self._wait_ready()
 
-        buf = bytearray(6)
+        buf = self._cmdbuf
         buf[0] = 0x40 | cmd
         buf[1] = (arg >> 24) & 0xFF
         buf[2] = (arg >> 16) & 0xFF
         buf[3] = (arg >> 8) & 0xFF
         buf[4] = arg & 0xFF
-        buf[5] = crc
+        buf[5] = (_crc7(buf, 5) << 1) | 1 if self.crc else crc
         self.spi.write(buf)
 
         for _ in range(_CMD_TIMEOUT):
-            r = self.spi.read(1, 0xFF)[0]
+            r = self._read_byte()
             if not (r & 0x80):
                 return r
         return -1
@@ -63,40 +145,56 @@ class SDCard:
         self._deselect()
         return r
 
+    def _phase(self, name, t0):
+        now = time.ticks_ms()
+        self.init_times[name] = time.ticks_diff(now, t0)
+        return now
+
     def _init_card(self):
-        # init at low speed
-        self._init_spi(100_000)
+        t = time.ticks_ms()
+        # init at low speed, >= 74 clocks with CS high
+        self._init_spi(_INIT_BAUDRATE)
 
         self._deselect()
-        for _ in range(10):
-            self.spi.write(b"\xFF")
+        self.spi.write(b"\xFF" * 10)
 
-        r = self._cmd(0, 0, 0x95)  # CMD0
-        if r not in (_R1_IDLE_STATE, 0):
+        for _ in range(5):
+            r = self._cmd(0, 0, 0x95)  # CMD0
+            if r == _R1_IDLE_STATE:
+                break
+        else:
             raise OSError("no SD card (CMD0)")
+        t = self._phase("cmd0", t)
 
         r = self._cmd(8, 0x1AA, 0x87)  # CMD8
-        if not (r & _R1_ILLEGAL_COMMAND):
-            self.spi.read(4, 0xFF)
-
-        # ACMD41 init loop
-        for _ in range(1000):
-            self._cmd(55, 0, 0x65)                 # CMD55
-            r = self._cmd(41, 0x40000000, 0x77)    # ACMD41
+        if r & _R1_ILLEGAL_COMMAND:
+            self.version = 1  # SD v1 or MMC: no CMD8, no HCS
+        else:
+            echo = self.spi.read(4, 0xFF)
+            if (echo[2] & 0x0F) != 0x01 or echo[3] != 0xAA:
+                raise OSError("SD CMD8 echo mismatch")
+            self.version = 2
+        t = self._phase("cmd8", t)
+
+        # ACMD41 init loop: poll flat out until the card is ready or 1 s passes
+        hcs = 0x40000000 if self.version == 2 else 0
+        while True:
+            self._cmd(55, 0, 0x65)          # CMD55
+            r = self._cmd(41, hcs, 0x77)    # ACMD41
             if r == 0:
                 break
-            time.sleep_ms(1)
-        else:
-            raise OSError("timeout waiting for ACMD41")
+            if time.ticks_diff(time.ticks_ms(), t) >= _ACMD41_TIMEOUT_MS:
+                raise OSError("timeout waiting for ACMD41")
+        t = self._phase("acmd41", t)
 
         # CMD58 read OCR to detect SDHC
-        r = self._cmd(58, 0, 0xFD)
-        ocr = bytearray(4)
-        if r == 0:
-            self.spi.readinto(ocr, 0xFF)
-            self.cdv = 1 if (ocr[0] & 0x40) else 512
-        else:
-            self.cdv = 512
+        self.cdv = 512
+        if self.version == 2:
+            r = self._cmd(58, 0, 0xFD)
+            if r == 0:
+                ocr = self.spi.read(4, 0xFF)
+                if ocr[0] & 0x40:
+                    self.cdv = 1
 
         # If not SDHC, set block length
         if self.cdv == 512:
@@ -104,8 +202,53 @@ class SDCard:
             if r != 0:
                 raise OSError("CMD16 failed")
 
-        # switch to normal speed
-        self._init_spi(self.baudrate)
+        if self.crc:
+            if self._cmd_nodata(59, 1) != 0:  # CMD59 CRC on
+                raise OSError("CMD59 failed")
+        t = self._phase("ocr", t)
+
+        # geometry + max rate, read once and cached
+        csd = self._read_csd()
+        if csd is None:
+            raise OSError("SD CSD read failed")
+        self.sectors = self._csd_sectors(csd)
+        self.max_baudrate = tran_speed(csd)
+        t = self._phase("csd", t)
+
+        # step up the clock: keep the fastest rate that reads the CSD back intact
+        chosen = self.baudrate
+        for baud in self.baudrates:
+            if baud <= self.baudrate or (self.max_baudrate and baud > self.max_baudrate):
+                continue
+            self._init_spi(baud)
+            try:
+                if self._read_csd() == csd:
+                    chosen = baud
+                    break
+            except OSError:
+                pass
+        self.baudrate = chosen
+        self._init_spi(chosen)
+        self._phase("speed", t)
+
+    def _read_csd(self):
+        if self._cmd(9, 0, 0xFF) != 0:  # CMD9 read CSD
+            self._deselect()
+            return None
+        csd = bytearray(16)
+        self._readinto(csd)
+        self._deselect()
+        return csd
+
+    @staticmethod
+    def _csd_sectors(csd):
+        if csd[0] >> 6 == 1:
+            c_size = ((csd[7] & 0x3F) << 16) | (csd[8] << 8) | csd[9]
+            return (c_size + 1) * 1024
+        c_size = ((csd[6] & 0x03) << 10) | (csd[7] << 2) | (csd[8] >> 6)
+        c_size_mult = ((csd[9] & 0x03) << 1) | (csd[10] >> 7)
+        read_bl_len = csd[5] & 0x0F
+        return (c_size + 1) * (2 ** (c_size_mult + 2)) * (2 ** read_bl_len) // 512
 
     def readblocks(self, block_num, buf):
         nblocks = len(buf) // 512
@@ -118,9 +261,10 @@ class SDCard:
         else:
             if self._cmd(18, addr, 0xFF) != 0:
                 raise OSError("read error (CMD18)")
+            mv = memoryview(buf)
             offset = 0
             for _ in range(nblocks):
-                self._readinto(memoryview(buf)[offset:offset + 512])
+                self._readinto(mv[offset:offset + 512])
                 offset += 512
             self._cmd_nodata(12, 0)  # CMD12 stop
 
@@ -135,55 +279,77 @@ class SDCard:
         else:
             if self._cmd(25, addr, 0xFF) != 0:
                 raise OSError("write error (CMD25)")
+            mv = memoryview(buf)
             offset = 0
             for _ in range(nblocks):
-                self._write_token(_TOKEN_CMD25)
-                self._write(memoryview(buf)[offset:offset + 512])
+                self._write(mv[offset:offset + 512], _TOKEN_CMD25)
                 offset += 512
             self._write_token(_TOKEN_STOP_TRAN)
 
         self._deselect()
-        self.spi.read(1, 0xFF)
+        self._read_byte()
 
     def ioctl(self, op, arg):
-        # op=4: return number of blocks
+        # op=4: number of blocks (cached at init, no CMD9 per query)
         if op == 4:
-            if self._cmd(9, 0, 0xFF) != 0:  # CMD9 read CSD
-                return 0
-            csd = bytearray(16)
-            self._readinto(csd)
-            self._deselect()
-
-            if csd[0] >> 6 == 1:
-                c_size = ((csd[7] & 0x3F) << 16) | (csd[8] << 8) | csd[9]
-                nblocks = (c_size + 1) * 1024
-            else:
-                c_size = ((csd[6] & 0x03) << 10) | (csd[7] << 2) | (csd[8] >> 6)
-                c_size_mult = ((csd[9] & 0x03) << 1) | (csd[10] >> 7)
-                nblocks = (c_size + 1) * (2 ** (c_size_mult + 2))
-            return nblocks
-
+            return self.sectors
+        # op=5: block size
+        if op == 5:
+            return 512
         return 0
 
     def _readinto(self, buf):
+        """
+        Wait for the data token, then bulk-read len(buf) bytes + CRC.
+        Polls _POLL bytes at a time; payload bytes that arrive in the same
+        poll as the token are copied to the front of buf.
+        """
+        mv = memoryview(buf)
+        poll = self._poll
         start = time.ticks_ms()
         while True:
-            tok = self.spi.read(1, 0xFF)[0]
-            if tok == _TOKEN_DATA:
+            self.spi.readinto(poll, 0xFF)
+            i = 0
+            while i < _POLL and poll[i] == 0xFF:
+                i += 1
+            if i < _POLL:
                 break
             if time.ticks_diff(time.ticks_ms(), start) > 1000:
                 raise OSError("timeout waiting for data token")
 
-        mv = memoryview(buf)
-        self.spi.readinto(mv, 0xFF)
-        self.spi.read(2, 0xFF)  # discard CRC
-
-    def _write(self, buf):
-        self._write_token(_TOKEN_DATA)
+        if poll[i] != _TOKEN_DATA:
+            raise OSError("SD read error token 0x%02x" % poll[i])
+
+        # bytes after the token in this poll are already payload (or CRC)
+        got = _POLL - 1 - i
+        n = len(mv)
+        head = got if got < n else n
+        if head:
+            mv[:head] = self._poll_mv[i + 1:i + 1 + head]
+        if head < n:
+            self.spi.readinto(mv[head:], 0xFF)
+
+        crc = self._crcbuf
+        extra = got - head  # CRC bytes already polled (only for tiny reads)
+        for k in range(extra):
+            crc[k] = poll[i + 1 + head + k]
+        if extra < 2:
+            self.spi.readinto(memoryview(crc)[extra:], 0xFF)
+        if self.crc and ((crc[0] << 8) | crc[1]) != _crc16(mv):
+            raise OSError("SD data CRC error")
+
+    def _write(self, buf, token=_TOKEN_DATA):
+        self._write_token(token)
         self.spi.write(buf)
-        self.spi.write(b"\xFF\xFF")  # dummy CRC
+        if self.crc:
+            crc = _crc16(buf)
+            self._crcbuf[0] = crc >> 8
+            self._crcbuf[1] = crc & 0xFF
+            self.spi.write(self._crcbuf)
+        else:
+            self.spi.write(b"\xFF\xFF")  # dummy CRC
 
-        resp = self.spi.read(1, 0xFF)[0]
+        resp = self._read_byte()
         if (resp & 0x1F) != 0x05:
             raise OSError("data rejected")
 
@@ -191,4 +357,4 @@ class SDCard:
             raise OSError("timeout after write")
 
     def _write_token(self, token):
-        self.spi.write(bytearray([token]))
+        self.spi.write(_TOKEN_BUF[token])
@@ -0,0 +1,102 @@
+# lib/deltacodec.py
+# Delta / delta-of-delta coding of integer sample rows as zig-zag varints,
+# shared by the firmware (DeltaEncoder, for the raw log) and the host tools
+# (decode). The data-analysis loader has a vectorized decoder of its own.
+#
+# A frame is a run of rows of len(orders) integers, each stored as a LEB128
+# varint of the zig-zagged value (0, -1, 1, -2 ... -> 0, 1, 2, 3 ...). Per
+# column, order 0 stores the value, 1 its change since the previous row, 2
+# the change of that change. A frame starts from scratch: its first row is
+# stored as is and the change before its second row counts as 0, so every
+# frame (one journal block in the log) decodes on its own.
+
+# longest varint of a value within +-2**31
+MAX_VARINT = 5
+
+
+def zigzag(v):
+    return v << 1 if v >= 0 else ((-v) << 1) - 1
+
+
+def unzigzag(z):
+    return z >> 1 if not z & 1 else -((z + 1) >> 1)
+
+
+class DeltaEncoder:
+    """
+    Encodes one row at a time into a reused buffer: encode(values) returns
+    the byte count in .buf. The work per row is fixed (one pass over the
+    columns, at most MAX_VARINT bytes each). reset() starts a new frame.
+    """
+    def __init__(self, orders):
+        self.orders = tuple(orders)
+        n = len(self.orders)
+        self.prev = [0] * n
+        self.step = [0] * n
+        self.buf = bytearray(n * MAX_VARINT)
+        self.mv = memoryview(self.buf)
+        self.rows = 0
+
+    def reset(self):
+        self.rows = 0
+
+    def encode(self, values):
+        buf = self.buf
+        prev = self.prev
+        step = self.step
+        first = not self.rows
+        n = 0
+        for i in range(len(self.orders)):
+            x = values[i]
+            order = self.orders[i]
+            if first or not order:
+                v = x
+                d = 0
+            else:
+                d = x - prev[i]
+                v = d if order == 1 else d - step[i]
+            prev[i] = x
+            step[i] = d
+            z = v << 1 if v >= 0 else ((-v) << 1) - 1
+            while z >= 0x80:
+                buf[n] = (z & 0x7F) | 0x80
+                z >>= 7
+                n += 1
+            buf[n] = z
+            n += 1
+        self.rows += 1
+        return n
+
+
+def decode(payload, orders):
+    """Rows (lists of ints) of one frame. Reference decoder, plain Python."""
+    ncols = len(orders)
+    vals = []
+    z = 0
+    shift = 0
+    for b in payload:
+        z |= (b & 0x7F) << shift
+        if b & 0x80:
+            shift += 7
+            continue
+        vals.append(unzigzag(z))
+        z = 0
+        shift = 0
+    rows = []
+    prev = [0] * ncols
+    step = [0] * ncols
+    for r in range(len(vals) // ncols):
+        row = []
+        for i in range(ncols):
+            v = vals[r * ncols + i]
+            order = orders[i]
+            if r and order:
+                d = v if order == 1 else step[i] + v
+                v = prev[i] + d
+            else:
+                d = 0
+            prev[i] = v
+            step[i] = d
+            row.append(v)
+        rows.append(row)
+    return rows
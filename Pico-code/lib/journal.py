@@ -0,0 +1,177 @@
+# lib/journal.py
+# Crash-safe append journal for the SD logs, shared by the firmware (writer,
+# recovery) and the data-analysis loader (scan).
+#
+# A journal file is a sequence of 512-byte blocks. Each block is one record:
+#   magic "BJ" | length u16 | session u32 | seq u32 | crc32 u32 | payload | zero pad
+# The CRC covers length/session/seq and the payload. A zero-length record
+# marks a clean end of file. Readers take the longest prefix of valid,
+# consecutive records, so a torn block after a brownout just ends the file.
+import struct
+
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None
+
+BLOCK = 512
+HDR_SIZE = 16
+PAYLOAD = BLOCK - HDR_SIZE
+MAGIC = b"BJ"
+_HDR = "<2sHIII"
+
+_ZEROS = bytearray(BLOCK)
+
+if crc32 is None:
+    _TABLE = None
+
+    def crc32(data, crc=0):
+        # slow fallback for ports built without binascii.crc32
+        global _TABLE
+        if _TABLE is None:
+            _TABLE = []
+            for i in range(256):
+                c = i
+                for _ in range(8):
+                    c = (c >> 1) ^ 0xEDB88320 if c & 1 else c >> 1
+                _TABLE.append(c)
+        crc ^= 0xFFFFFFFF
+        for b in data:
+            crc = _TABLE[(crc ^ b) & 0xFF] ^ (crc >> 8)
+        return crc ^ 0xFFFFFFFF
+
+
+def _crc(mv, n):
+    return crc32(mv[HDR_SIZE:HDR_SIZE + n], crc32(mv[2:12])) & 0xFFFFFFFF
+
+
+class JournalWriter:
+    """
+    Packs records into whole blocks and writes each block exactly once.
+
+    The file should be preallocated (see preallocate()) so block writes
+    never change FAT metadata; then nothing needs flushing for durability.
+    Whole records never straddle blocks, so every block decodes on its own.
+    """
+    def __init__(self, f, session, seq=0, offset=0):
+        self.f = f
+        self.session = session
+        self.seq = seq
+        self.offset = offset  # file offset of the block being filled
+        self._buf = bytearray(BLOCK)
+        self._mv = memoryview(self._buf)
+        self._n = 0
+
+    @property
+    def pending(self):
+        return self._n
+
+    def append(self, data):
+        n = len(data)
+        if n > PAYLOAD:
+            raise ValueError("record larger than a block")
+        if self._n + n > PAYLOAD:
+            self.commit()
+        p = HDR_SIZE + self._n
+        self._mv[p:p + n] = data
+        self._n += n
+
+    def commit(self):
+        """Write the current block (if it holds anything)."""
+        if self._n:
+            self._write_block()
+
+    def close_record(self):
+        """Commit pending data, then write the clean end-of-file marker."""
+        self.commit()
+        self._write_block()
+
+    def _write_block(self):
+        mv = self._mv
+        n = self._n
+        # stale bytes from the previous block must not survive in the pad
+        mv[HDR_SIZE + n:] = memoryview(_ZEROS)[HDR_SIZE + n:]
+        struct.pack_into(_HDR, self._buf, 0, MAGIC, n, self.session, self.seq, 0)
+        struct.pack_into("<I", self._buf, 12, _crc(mv, n))
+        self.f.write(self._buf)
+        self.offset += BLOCK
+        self.seq += 1
+        self._n = 0
+
+
+def preallocate(f, size):
+    """
+    Grow a freshly created file to size bytes (block multiple) and flush once,
+    so the cluster chain and directory entry are final before logging starts.
+    """
+    pos = f.tell()
+    f.seek(size - 1)
+    f.write(b"\x00")
+    f.flush()
+    f.seek(pos)
+
+
+def scan(f, end=None, session=None):
+    """
+    Yield (offset, seq, payload) for the valid prefix of a journal, starting
+    at the current file position (must be block aligned).
+    If end is a list, end[0] is set to the offset where the valid prefix stops
+    and end[1] to True if that stop was a clean end-of-file marker.
+    session: the journal's session id (default: the first block's).
+    """
+    buf = bytearray(BLOCK)
+    mv = memoryview(buf)
+    offset = f.tell()
+    expect = None
+    clean = False
+    while f.readinto(buf) == BLOCK:
+        magic, n, sess, seq, crc = struct.unpack_from(_HDR, buf, 0)
+        if magic != MAGIC or n > PAYLOAD:
+            break
+        if expect is None:
+            if session is None:
+                session = sess
+            expect = seq
+        if sess != session or seq != expect or _crc(mv, n) != crc:
+            break
+        if not n:
+            clean = True
+            break
+        yield offset, seq, bytes(mv[HDR_SIZE:HDR_SIZE + n])
+        offset += BLOCK
+        expect = seq + 1
+    if end is not None:
+        end[0] = offset
+        end[1] = clean
+
+
+def recover(path, start=0):
+    """
+    Find the last valid record of a journal file after an unclean shutdown
+    and seal the file there with an end-of-file marker. start (block
+    aligned) skips the scan to a record known to be written, e.g. an index
+    checkpoint; records then counts from there.
+    Returns (records, end_offset, was_clean).
+    """
+    end = [start, False]
+    records = 0
+    last = None
+    session = _session_of(path)
+    with open(path, "rb") as f:
+        f.seek(start)
+        for _, seq, payload in scan(f, end, session):
+            records += 1
+            last = (seq, payload)
+    if not end[1] and last is not None:
+        with open(path, "r+b") as f:
+            f.seek(end[0])
+            w = JournalWriter(f, session, last[0] + 1, end[0])
+            w.close_record()
+            f.flush()
+    return records, end[0], end[1]
+
+
+def _session_of(path):
+    with open(path, "rb") as f:
+        hdr = f.read(HDR_SIZE)
+    return struct.unpack_from(_HDR, hdr, 0)[2]
@@ -0,0 +1,274 @@
+# lib/onlinestats.py
+# Constant-memory running statistics, shared by the Pico firmware and the
+# data-analysis tools. Runs as-is on MicroPython; on CPython the extend()
+# methods also take NumPy arrays and fold a whole batch in at once.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_INF = float("inf")
+
+
+def _is_array(x):
+    return np is not None and isinstance(x, np.ndarray)
+
+
+class RunningStats:
+    """
+    Welford mean/variance + min/max.
+
+    update(x) takes one value. extend(xs) takes an iterable, or a NumPy
+    array (1-D, or 2-D rows x channels to track every column at once).
+    """
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = _INF
+        self.max = -_INF
+
+    def update(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def extend(self, xs):
+        if _is_array(xs):
+            if not len(xs):
+                return
+            mean = xs.mean(axis=0)
+            self._merge(len(xs), mean, ((xs - mean) ** 2).sum(axis=0),
+                        xs.min(axis=0), xs.max(axis=0))
+        else:
+            for x in xs:
+                self.update(x)
+
+    def merge(self, other):
+        """Fold another RunningStats into this one (Chan et al.)."""
+        if other.n:
+            self._merge(other.n, other.mean, other.m2, other.min, other.max)
+
+    def _merge(self, n, mean, m2, lo, hi):
+        tot = self.n + n
+        d = mean - self.mean
+        self.mean = self.mean + d * (n / tot)
+        self.m2 = self.m2 + m2 + d * d * (self.n * n / tot)
+        self.n = tot
+        if _is_array(lo) or _is_array(self.min):
+            self.min = np.minimum(self.min, lo)
+            self.max = np.maximum(self.max, hi)
+        else:
+            self.min = min(self.min, lo)
+            self.max = max(self.max, hi)
+
+    @property
+    def variance(self):
+        # sample variance, 0 until we have two points
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0 * self.m2
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+
+class IntStats:
+    """
+    n/sum/min/max of fixed-point integer samples (e.g. centi-degrees): no
+    float work per update, so nothing is allocated on MicroPython while the
+    values stay small ints. mean is the rounded integer mean, same units.
+    """
+    __slots__ = ("n", "total", "min", "max")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def update(self, x):
+        if not self.n or x < self.min:
+            self.min = x
+        if not self.n or x > self.max:
+            self.max = x
+        self.n += 1
+        self.total += x
+
+    @property
+    def mean(self):
+        n = self.n
+        return (2 * self.total + n) // (2 * n) if n else 0
+
+
+class RunningRegression:
+    """
+    Streaming least-squares line y = k*x + m with R^2.
+
+    Keeps means and co-moments only, so it never needs the full arrays.
+    extend(x, y) accepts NumPy arrays; y may be 2-D (rows x channels).
+    """
+    __slots__ = ("n", "mx", "my", "cxx", "cxy", "cyy")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mx = 0.0
+        self.my = 0.0
+        self.cxx = 0.0
+        self.cxy = 0.0
+        self.cyy = 0.0
+
+    def update(self, x, y):
+        self.n += 1
+        dx = x - self.mx
+        dy = y - self.my
+        self.mx += dx / self.n
+        self.my += dy / self.n
+        self.cxx += dx * (x - self.mx)
+        self.cxy += dx * (y - self.my)
+        self.cyy += dy * (y - self.my)
+
+    def extend(self, xs, ys):
+        if _is_array(xs) or _is_array(ys):
+            xs = np.asarray(xs, dtype=float)
+            ys = np.asarray(ys, dtype=float)
+            n = len(xs)
+            if not n:
+                return
+            mx = xs.mean()
+            my = ys.mean(axis=0)
+            dx = xs - mx
+            dy = ys - my
+            if dy.ndim > 1:
+                dx = dx[:, None]
+            cxx = (dx * dx).sum()
+            cxy = (dx * dy).sum(axis=0)
+            cyy = (dy * dy).sum(axis=0)
+            tot = self.n + n
+            f = self.n * n / tot
+            ddx = mx - self.mx
+            ddy = my - self.my
+            self.cxx = self.cxx + cxx + ddx * ddx * f
+            self.cxy = self.cxy + cxy + ddx * ddy * f
+            self.cyy = self.cyy + cyy + ddy * ddy * f
+            self.mx = self.mx + ddx * (n / tot)
+            self.my = self.my + ddy * (n / tot)
+            self.n = tot
+        else:
+            for x, y in zip(xs, ys):
+                self.update(x, y)
+
+    @property
+    def slope(self):
+        return self.cxy / self.cxx if self.cxx else 0.0 * self.cxy
+
+    @property
+    def intercept(self):
+        return self.my - self.slope * self.mx
+
+    @property
+    def r2(self):
+        if _is_array(self.cyy):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r2 = self.cxy ** 2 / (self.cxx * self.cyy)
+            return np.where(self.cyy != 0, r2, 1.0)
+        if not self.cyy:
+            return 1.0
+        return self.cxy * self.cxy / (self.cxx * self.cyy)
+
+
+class P2Quantile:
+    """
+    P^2 quantile estimator (Jain & Chlamtac, 1985): five markers, O(1) memory.
+    p is the wanted quantile in 0..1 (0.5 = median).
+    """
+    __slots__ = ("p", "n", "q", "pos", "want", "dwant")
+
+    def __init__(self, p=0.5):
+        self.p = p
+        self.reset()
+
+    def reset(self):
+        p = self.p
+        self.n = 0
+        self.q = [0.0] * 5
+        self.pos = [1, 2, 3, 4, 5]
+        self.want = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+        self.dwant = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, x):
+        q = self.q
+        if self.n < 5:
+            q[self.n] = x
+            self.n += 1
+            if self.n == 5:
+                q.sort()
+            return
+        self.n += 1
+
+        # find cell k and widen the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        pos = self.pos
+        want = self.want
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            want[i] += self.dwant[i]
+
+        # nudge the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = want[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = self._parabolic(i, s)
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (pos[i + s] - pos[i])
+                q[i] = qp
+                pos[i] += s
+
+    def _parabolic(self, i, s):
+        q = self.q
+        n = self.pos
+        return q[i] + s / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def extend(self, xs):
+        # P^2 is inherently sequential; arrays are just iterated
+        for x in xs:
+            self.update(x)
+
+    @property
+    def value(self):
+        if self.n >= 5:
+            return self.q[2]
+        if not self.n:
+            return None
+        s = sorted(self.q[:self.n])
+        return s[min(self.n - 1, int(self.p * self.n))]
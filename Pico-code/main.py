@@ -4,14 +4,54 @@ from machine import Pin
 # Onboard LED heartbeat
 onboard = Pin(25, Pin.OUT)
 
+# Modules in dependency order, so each import below times just that module
+# (compile from .py, or load of a .mpy from tools/build_mpy.py)
+_BOOT_MODULES = (
+    "config",
+    "onlinestats",
+    "journal",
+    "deltacodec",
+    "drivers.display_ssd1306",
+    "drivers.sensor_sht31",
+    "drivers.rtc_ds3231",
+    "drivers.storage_sdcard",
+    "drivers.block_cache",
+    "drivers.input_button",
+    "drivers.output_led",
+    "app.events",
+    "app.safe_mode",
+    "app.timekeeping",
+    "app.i2c_bus",
+    "app.scheduler",
+    "app.kernels",
+    "app.acquire",
+    "app.memory",
+    "app.fixedpoint",
+    "app.logging",
+    "app.ui",
+    "app.controller",
+)
+
 def blink(n, on=0.12, off=0.12):
     for _ in range(n):
         onboard.on(); time.sleep(on)
         onboard.off(); time.sleep(off)
 
+def import_report():
+    # boot-time report on the serial console
+    total = 0
+    for name in _BOOT_MODULES:
+        t0 = time.ticks_us()
+        __import__(name)
+        dt = time.ticks_diff(time.ticks_us(), t0)
+        total += dt
+        print("import %-26s %7d us" % (name, dt))
+    print("imports total %d us, at %d ms after reset" % (total, time.ticks_ms()))
+
 blink(1)  # reached main.py
 
 try:
+    import_report()
     from app.controller import App
     blink(2)  # imports OK
     App().run()
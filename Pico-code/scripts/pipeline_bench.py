@@ -0,0 +1,81 @@
+import gc
+import time
+
+from onlinestats import RunningStats, IntStats
+from drivers.sensor_sht31 import SHT31
+from app.fixedpoint import centi_str, centi_round
+from deltacodec import DeltaEncoder
+
+# per sample, what the firmware does with a reading besides I/O: convert,
+# format the raw row, update the app stats and two summary tiers (2
+# channels each), format the two live values for the OLED
+N = 500
+STATS = 3  # app stats + LOG_TIERS_S (10, 60)
+
+
+def float_sample(t_raw, rh_raw, stats):
+    # the float pipeline this replaced
+    temp = -45 + (175 * t_raw / 65535.0)
+    rh = 100 * rh_raw / 65535.0
+    line = ("%d,%d,%.2f,%.2f\n" % (123456, 0, temp, rh)).encode()
+    for t, h in stats:
+        t.update(temp)
+        h.update(rh)
+    int(round(temp * 10))
+    "T: %.1f C" % temp
+    int(round(rh * 10))
+    "H: %.1f %%" % rh
+    return line
+
+
+def int_sample(t_raw, rh_raw, stats):
+    temp, rh = SHT31.convert(t_raw, rh_raw)
+    line = ("%d,%d,%s,%s\n" % (123456, 0, centi_str(temp), centi_str(rh))).encode()
+    for t, h in stats:
+        t.update(temp)
+        h.update(rh)
+    centi_round(temp, 1)
+    "T: %s C" % centi_str(temp, 1)
+    centi_round(rh, 1)
+    "H: %s %%" % centi_str(rh, 1)
+    return line
+
+
+_enc = DeltaEncoder((2, 0, 1, 1))
+_row = [0, 0, 0, 0]
+
+
+def delta_sample(t_raw, rh_raw, stats):
+    # LOG_FORMAT = "delta": the raw row as varints instead of text
+    temp, rh = SHT31.convert(t_raw, rh_raw)
+    _row[0] += 1000
+    _row[2] = temp
+    _row[3] = rh
+    n = _enc.encode(_row)
+    for t, h in stats:
+        t.update(temp)
+        h.update(rh)
+    centi_round(temp, 1)
+    "T: %s C" % centi_str(temp, 1)
+    centi_round(rh, 1)
+    "H: %s %%" % centi_str(rh, 1)
+    return n
+
+
+def bench(name, fn, cls):
+    stats = [(cls(), cls()) for _ in range(STATS)]
+    gc.collect()
+    gc.disable()
+    a0 = gc.mem_alloc()
+    t = time.ticks_us()
+    for i in range(N):
+        fn(0x6666 + (i & 63), 0x8000 - (i & 63), stats)
+    dt = time.ticks_diff(time.ticks_us(), t)
+    a1 = gc.mem_alloc()
+    gc.enable()
+    print("%-6s %7.1f us/sample  %6.1f bytes alloc/sample" % (name, dt / N, (a1 - a0) / N))
+
+
+bench("float", float_sample, RunningStats)
+bench("int", int_sample, IntStats)
+bench("delta", delta_sample, IntStats)
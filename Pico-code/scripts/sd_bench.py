@@ -0,0 +1,53 @@
+import gc
+import time
+import uos as os
+from machine import Pin, SPI
+import config
+from drivers.storage_sdcard import SDCard
+
+# raw reads only touch blocks 0..N_BLOCKS-1 (read-only); writes go to a file
+N_BLOCKS = 256
+MULTI = 8
+WRITE_KB = 64
+
+spi = SPI(config.SD_SPI_ID, baudrate=config.SD_BAUDRATE, polarity=0, phase=0,
+          sck=Pin(config.SD_SCK), mosi=Pin(config.SD_MOSI), miso=Pin(config.SD_MISO))
+t0 = time.ticks_ms()
+sd = SDCard(spi, Pin(config.SD_CS, Pin.OUT), baudrate=config.SD_BAUDRATE,
+            baudrates=config.SD_BAUDRATES, crc=config.SD_CRC)
+print("init: %d ms %s" % (time.ticks_diff(time.ticks_ms(), t0), sd.init_times))
+print("clock: %d Hz (card max %d Hz), %d sectors" % (sd.baudrate, sd.max_baudrate, sd.sectors))
+
+
+def bench(name, nblocks_per_call, calls, fn):
+    buf = bytearray(512 * nblocks_per_call)
+    gc.collect()
+    gc.disable()
+    a0 = gc.mem_alloc()
+    t = time.ticks_us()
+    for i in range(calls):
+        fn(i * nblocks_per_call, buf)
+    dt = time.ticks_diff(time.ticks_us(), t)
+    a1 = gc.mem_alloc()
+    gc.enable()
+    blocks = nblocks_per_call * calls
+    mb = blocks * 512 / 1_048_576
+    print("%-14s %6.1f bytes alloc/block  %7.1f ms/MB  %6.1f KB/s"
+          % (name, (a1 - a0) / blocks, dt / 1000 / mb, blocks * 512 / 1024 / (dt / 1_000_000)))
+
+
+bench("read CMD17", 1, N_BLOCKS, sd.readblocks)
+bench("read CMD18x%d" % MULTI, MULTI, N_BLOCKS // MULTI, sd.readblocks)
+
+os.mount(os.VfsFat(sd), config.SD_MOUNT_POINT)
+path = config.SD_MOUNT_POINT + "/_bench.bin"
+chunk = bytearray(512)
+gc.collect()
+t = time.ticks_us()
+with open(path, "wb") as f:
+    for _ in range(WRITE_KB * 2):
+        f.write(chunk)
+dt = time.ticks_diff(time.ticks_us(), t)
+os.remove(path)
+os.umount(config.SD_MOUNT_POINT)
+print("file write     %7.1f ms/MB  %6.1f KB/s" % (dt / 1000 / (WRITE_KB / 1024), WRITE_KB / (dt / 1_000_000)))
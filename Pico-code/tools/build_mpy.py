@@ -0,0 +1,139 @@
+# tools/build_mpy.py - cross-compile the firmware to .mpy bytecode
+#
+# The pico otherwise compiles every imported .py at boot (time + heap
+# fragmentation before the first sample). This precompiles app/, drivers/
+# and lib/ with mpy-cross into build/mpy/, mirroring the device layout, and
+# writes build/mpy/manifest.json with the sha256 of every source and
+# artifact. main.py and config.py stay source (entry point / user settings).
+#
+#   python tools/build_mpy.py              # build
+#   python tools/build_mpy.py --check      # exit 1 if build/ is missing or stale
+#   python tools/build_mpy.py --freeze     # also write build/manifest.py for a
+#                                          # firmware build with frozen modules
+#
+# mpy-cross must match the firmware's bytecode version ("pip install
+# mpy-cross==<firmware version>", or --mpy-cross PATH).
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+PACKAGES = ("app", "drivers", "lib")
+OUT = os.path.join(ROOT, "build", "mpy")
+MANIFEST = os.path.join(OUT, "manifest.json")
+FREEZE = os.path.join(ROOT, "build", "manifest.py")
+ARCH = "armv6m"  # RP2040 (Cortex-M0+); only matters for @native/@viper code
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def sources():
+    """Relative paths (device layout, '/' separated) of all sources to compile."""
+    out = []
+    for pkg in PACKAGES:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(ROOT, pkg)):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            for name in sorted(filenames):
+                if name.endswith(".py"):
+                    out.append(os.path.relpath(os.path.join(dirpath, name), ROOT).replace(os.sep, "/"))
+    return out
+
+
+def target(rel):
+    # lib/ is on the pico's sys.path: lib/journal.py -> /lib/journal.mpy
+    return os.path.join(OUT, rel[:-3] + ".mpy")
+
+
+def mpy_cross_version(exe):
+    return subprocess.run([exe, "--version"], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def build(exe, opt):
+    version = mpy_cross_version(exe)
+    entries = {}
+    for rel in sources():
+        out = target(rel)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        # -s: the name tracebacks show on the device
+        cmd = [exe, "-march=" + ARCH, "-O%d" % opt, "-s", rel, "-o", out, os.path.join(ROOT, rel)]
+        r = subprocess.run(cmd, capture_output=True, text=True)
+        if r.returncode:
+            sys.exit("mpy-cross failed on %s:\n%s" % (rel, r.stderr))
+        entries[rel] = {"source_sha256": _sha256(os.path.join(ROOT, rel)), "mpy_sha256": _sha256(out)}
+        print("%-36s %6d -> %6d bytes" % (rel, os.path.getsize(os.path.join(ROOT, rel)), os.path.getsize(out)))
+
+    with open(MANIFEST, "w") as f:
+        json.dump({"mpy_cross": version, "arch": ARCH, "opt": opt, "files": entries}, f, indent=1, sort_keys=True)
+    print("%d modules, %s" % (len(entries), version))
+
+
+def check():
+    """Problems that make build/mpy unfit to deploy (empty list = up to date)."""
+    if not os.path.exists(MANIFEST):
+        return ["no build (run tools/build_mpy.py)"]
+    with open(MANIFEST) as f:
+        files = json.load(f)["files"]
+    problems = []
+    current = sources()
+    for rel in current:
+        entry = files.get(rel)
+        out = target(rel)
+        if entry is None:
+            problems.append("%s: not built" % rel)
+        elif entry["source_sha256"] != _sha256(os.path.join(ROOT, rel)):
+            problems.append("%s: source changed since build" % rel)
+        elif not os.path.exists(out) or entry["mpy_sha256"] != _sha256(out):
+            problems.append("%s: .mpy missing or modified" % rel)
+    for rel in sorted(set(files) - set(current)):
+        problems.append("%s: built but source is gone" % rel)
+    return problems
+
+
+def write_freeze_manifest():
+    # for a custom firmware: make BOARD=RPI_PICO FROZEN_MANIFEST=<this file>
+    lines = [
+        "# generated by tools/build_mpy.py",
+        'include("$(PORT_DIR)/boards/manifest.py")',
+        'package("app", base_path="%s")' % ROOT.replace("\\", "/"),
+        'package("drivers", base_path="%s")' % ROOT.replace("\\", "/"),
+    ]
+    lib = os.path.join(ROOT, "lib")
+    for name in sorted(os.listdir(lib)):
+        if name.endswith(".py"):
+            lines.append('module("%s", base_path="%s")' % (name, lib.replace("\\", "/")))
+    os.makedirs(os.path.dirname(FREEZE), exist_ok=True)
+    with open(FREEZE, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    print("wrote", FREEZE)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="cross-compile app/, drivers/ and lib/ to .mpy")
+    ap.add_argument("--check", action="store_true", help="verify build/mpy against the sources")
+    ap.add_argument("--freeze", action="store_true", help="also write a frozen-modules manifest")
+    ap.add_argument("--mpy-cross", default="mpy-cross", help="mpy-cross executable")
+    ap.add_argument("-O", dest="opt", type=int, default=0, help="mpy-cross optimisation level")
+    args = ap.parse_args()
+
+    if args.check:
+        problems = check()
+        for p in problems:
+            print(p)
+        if problems:
+            sys.exit(1)
+        print("build/mpy matches the sources")
+        return
+
+    build(args.mpy_cross, args.opt)
+    if args.freeze:
+        write_freeze_manifest()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+# tools/cache_check.py - host-side check for drivers/block_cache.py
+#
+# Runs BlockCache on CPython in front of a RAM block device (Disk) that
+# counts the commands it gets. Two FAT volumes are formatted the way the
+# FAT spec lays them out: FAT16 in an MBR partition and a FAT32
+# "superfloppy" (no partition table). For each, and for every combination
+# of write_back and readahead:
+#   - mounting must learn the metadata range (boot sector .. first data
+#     sector, so the FAT16 root directory is in it and FAT32's is not)
+#   - files written and read back through a small FAT reader/writer land
+#     on the card byte-identical to a write-through run once synced;
+#     write-back holds FAT / root dir writes until ioctl(3), data is
+#     written through
+#   - a random mix of single and multi-block reads, writes and syncs
+#     (sequential runs for readahead, a share aimed at the metadata)
+#     always reads back a reference model, and the card equals the model
+#     after every sync
+#
+#   python tools/cache_check.py [ops] [seed]
+import os
+import random
+import struct
+import sys
+import types
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, ".."))
+
+sys.modules["micropython"] = types.ModuleType("micropython")
+sys.modules["micropython"].const = lambda x: x
+from drivers.block_cache import BlockCache  # noqa: E402
+
+BLOCK = 512
+SECTORS = 1 << 17  # 64 MB
+PART = 2048        # FAT16 partition start (1 MB aligned, as SD cards ship)
+NBLOCKS = 8
+READAHEAD = 4
+
+
+class Disk:
+    """RAM block device (SDCard protocol); unwritten sectors read as zeros."""
+    def __init__(self, sectors=SECTORS):
+        self.sectors = sectors
+        self.store = {}
+        self.reads = 0
+        self.multi_reads = 0
+        self.writes = 0
+        self.written = []
+
+    def _range(self, block, buf):
+        n, rest = divmod(len(buf), BLOCK)
+        assert n and not rest, "%d-byte transfer" % len(buf)
+        assert 0 <= block and block + n <= self.sectors, "blocks %d+%d past the end" % (block, n)
+        return n
+
+    def readblocks(self, block, buf):
+        n = self._range(block, buf)
+        self.reads += 1
+        self.multi_reads += n > 1
+        for j in range(n):
+            buf[j * BLOCK:(j + 1) * BLOCK] = self.store.get(block + j, bytes(BLOCK))
+
+    def writeblocks(self, block, buf):
+        n = self._range(block, buf)
+        self.writes += 1
+        for j in range(n):
+            self.store[block + j] = bytes(buf[j * BLOCK:(j + 1) * BLOCK])
+            self.written.append(block + j)
+
+    def ioctl(self, op, arg):
+        if op == 4:
+            return self.sectors
+        if op == 5:
+            return BLOCK
+        return 0
+
+    def image(self):
+        return {b: d for b, d in self.store.items() if any(d)}
+
+
+# --- FAT formatting (fatgen103 layout and FAT size formula) -----------------
+
+class Layout:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+def format_fat(disk, fat32, part=0):
+    size = disk.sectors - part
+    spc = 1 if fat32 else 4
+    rsvd = 32 if fat32 else 1
+    root_entries = 0 if fat32 else 512
+    root_secs = (root_entries * 32 + BLOCK - 1) // BLOCK
+    t2 = 256 * spc + 2
+    if fat32:
+        t2 //= 2
+    fatsz = (size - (rsvd + root_secs) + t2 - 1) // t2
+    data = part + rsvd + 2 * fatsz + root_secs
+    clusters = (part + size - data) // spc
+    assert (clusters >= 65525) == fat32 and clusters >= 4085, "%d clusters" % clusters
+
+    bs = bytearray(BLOCK)
+    bs[0:3] = b"\xEB\x58\x90" if fat32 else b"\xEB\x3C\x90"
+    bs[3:11] = b"MSWIN4.1"
+    struct.pack_into("<HBHBHHBHHHLL", bs, 11, BLOCK, spc, rsvd, 2, root_entries,
+                     size if size < 0x10000 else 0, 0xF8, 0 if fat32 else fatsz,
+                     63, 255, part, size if size >= 0x10000 else 0)
+    if fat32:
+        struct.pack_into("<LHHLHH12xBBBL11s8s", bs, 36, fatsz, 0, 0, 2, 1, 6,
+                         0x80, 0, 0x29, 0x1234ABCD, b"NO NAME    ", b"FAT32   ")
+    else:
+        struct.pack_into("<BBBL11s8s", bs, 36, 0x80, 0, 0x29, 0x1234ABCD,
+                         b"NO NAME    ", b"FAT16   ")
+    bs[510:512] = b"\x55\xAA"
+    disk.writeblocks(part, bs)
+
+    fat = bytearray(BLOCK)
+    if fat32:
+        struct.pack_into("<LLL", fat, 0, 0x0FFFFFF8, 0x0FFFFFFF, 0x0FFFFFFF)  # root dir: cluster 2
+        info = bytearray(BLOCK)
+        struct.pack_into("<L", info, 0, 0x41615252)
+        struct.pack_into("<LLL", info, 484, 0x61417272, 0xFFFFFFFF, 3)
+        struct.pack_into("<L", info, 508, 0xAA550000)
+        disk.writeblocks(part + 1, info)
+        disk.writeblocks(part + 6, bs)  # backup boot sector
+    else:
+        struct.pack_into("<HH", fat, 0, 0xFFF8, 0xFFFF)
+    for k in range(2):
+        disk.writeblocks(part + rsvd + k * fatsz, fat)
+
+    if part:
+        mbr = bytearray(BLOCK)
+        struct.pack_into("<B3sB3sLL", mbr, 446, 0, b"\xFE\xFF\xFF", 0x0E if fat32 else 0x06,
+                         b"\xFE\xFF\xFF", part, size)
+        mbr[510:512] = b"\x55\xAA"
+        disk.writeblocks(0, mbr)
+    return Layout(part=part, fat32=fat32, data=data, fatsz=fatsz, clusters=clusters)
+
+
+# --- a small FAT reader / writer (what VfsFat does to the sectors) ----------
+
+class Volume:
+    """8.3 files in the root directory; FAT sectors written to both copies."""
+    def __init__(self, dev):
+        self.dev = dev
+        b = self._read(0)
+        part = 0
+        if b[0] not in (0xEB, 0xE9):
+            part = struct.unpack_from("<L", b, 454)[0]
+            b = self._read(part)
+        (bps, self.spc, rsvd, nfats, root_entries, _, _, fatsz16, _, _, _,
+         _) = struct.unpack_from("<HBHBHHBHHHLL", b, 11)
+        assert bps == BLOCK and nfats == 2
+        self.fat32 = fatsz16 == 0
+        self.fatsz = struct.unpack_from("<L", b, 36)[0] if self.fat32 else fatsz16
+        self.fat = part + rsvd
+        self.root = self.fat + 2 * self.fatsz
+        self.root_secs = (root_entries * 32 + BLOCK - 1) // BLOCK
+        self.data = self.root + self.root_secs
+        self.root_cluster = struct.unpack_from("<L", b, 44)[0] if self.fat32 else 0
+        self.width = 4 if self.fat32 else 2
+        self.eoc = 0x0FFFFFFF if self.fat32 else 0xFFFF
+
+    def _read(self, block, n=1):
+        buf = bytearray(n * BLOCK)
+        self.dev.readblocks(block, buf)
+        return buf
+
+    def _sector(self, cluster):
+        return self.data + (cluster - 2) * self.spc
+
+    def _entry(self, c):
+        return divmod(c * self.width, BLOCK)
+
+    def get(self, c):
+        s, o = self._entry(c)
+        v = self._read(self.fat + s)
+        return struct.unpack_from("<L" if self.fat32 else "<H", v, o)[0] & 0x0FFFFFFF
+
+    def set(self, c, value):
+        s, o = self._entry(c)
+        for k in range(2):
+            v = self._read(self.fat + k * self.fatsz + s)
+            struct.pack_into("<L" if self.fat32 else "<H", v, o, value)
+            self.dev.writeblocks(self.fat + k * self.fatsz + s, v)
+
+    def _dir_sectors(self):
+        if not self.fat32:
+            return range(self.root, self.data)
+        s = self._sector(self.root_cluster)
+        return range(s, s + self.spc)
+
+    def _find(self, name):
+        for s in self._dir_sectors():
+            d = self._read(s)
+            for o in range(0, BLOCK, 32):
+                if d[o] in (0, 0xE5) and name is None or d[o:o + 11] == name:
+                    return s, o, d
+        raise OSError("%s not found" % name)
+
+    def write(self, name, data):
+        csize = self.spc * BLOCK
+        c, chain = 2, []
+        while len(chain) * csize < len(data):
+            if self.get(c) == 0:
+                chain.append(c)
+            c += 1
+        for k, c in enumerate(chain):
+            self.dev.writeblocks(self._sector(c), data[k * csize:(k + 1) * csize].ljust(csize, b"\0"))
+        for k, c in enumerate(chain):
+            self.set(c, chain[k + 1] if k + 1 < len(chain) else self.eoc)
+        s, o, d = self._find(None)
+        first = chain[0] if chain else 0
+        struct.pack_into("<11sB8xHHHHL", d, o, name, 0x20, first >> 16, 0, 0, first & 0xFFFF, len(data))
+        self.dev.writeblocks(s, d)
+
+    def read(self, name):
+        _, o, d = self._find(name)
+        hi, lo, size = struct.unpack_from("<H", d, o + 20)[0], *struct.unpack_from("<HL", d, o + 26)
+        c = hi << 16 | lo
+        out = bytearray()
+        while len(out) < size:
+            s = self._sector(c)
+            if self.spc > 1:
+                out += self._read(s, self.spc)  # whole cluster, one CMD18
+            else:
+                out += self._read(s)  # cluster by cluster: sequential singles
+            c = self.get(c)
+        return bytes(out[:size])
+
+
+# --- checks -----------------------------------------------------------------
+
+FILES = ((b"LOG     CSV", 7000), (b"RAW_0000BJL", 24 * 1024), (b"HEALTH  CSV", 300), (b"INDEX   CSV", 0))
+
+
+def check_volume(rng, fat32, write_back, readahead, ops):
+    disk = Disk()
+    lay = format_fat(disk, fat32, 0 if fat32 else PART)
+    formatted = disk.image()
+    disk.written = []
+    cache = BlockCache(disk, NBLOCKS, write_back, readahead)
+    vol = Volume(cache)
+    assert (cache._meta_lo, cache._meta_hi) == (lay.part, lay.data), \
+        "learned meta %d..%d, layout %d..%d" % (cache._meta_lo, cache._meta_hi, lay.part, lay.data)
+
+    files = {}
+    for name, size in FILES:
+        files[name] = random.Random(name).randbytes(size)  # same files in every mode
+        vol.write(name, files[name])
+    held = [b for b in range(lay.part, lay.data) if disk.store.get(b) != formatted.get(b)]
+    if write_back:
+        assert not held, "metadata sector %d written before sync" % held[0]
+        assert cache.writebacks == 0
+        assert all(b >= lay.data for b in disk.written)
+    else:
+        assert held, "no metadata reached the card"
+    for name, data in files.items():
+        assert vol.read(name) == data, "%s read back wrong through the cache" % name
+    cache.ioctl(3, 0)
+    for name, data in files.items():
+        assert Volume(disk).read(name) == data, "%s wrong on the card after sync" % name
+    synced = disk.image()
+
+    # random mix against a model of what the card holds once synced
+    model = dict(disk.store)
+    cursor = 0
+    for _ in range(ops):
+        r = rng.random()
+        n = 1 if r < 0.7 else rng.choice((2, 3, 4, 8))
+        if rng.random() < 0.4:
+            block = rng.randrange(lay.part, lay.data)
+        elif rng.random() < 0.5:
+            block = cursor + 1  # sequential: readahead
+        else:
+            block = rng.randrange(SECTORS)
+        block = min(block, SECTORS - n)
+        cursor = block + n - 1
+        if rng.random() < 0.6:
+            buf = bytearray(n * BLOCK)
+            cache.readblocks(block, buf)
+            for j in range(n):
+                assert buf[j * BLOCK:(j + 1) * BLOCK] == model.get(block + j, bytes(BLOCK)), \
+                    "read of %d+%d: block %d stale" % (block, n, block + j)
+        else:
+            data = bytes(rng.getrandbits(8) for _ in range(n * BLOCK))
+            cache.writeblocks(block, data)
+            for j in range(n):
+                model[block + j] = data[j * BLOCK:(j + 1) * BLOCK]
+                if n > 1 or not write_back or not lay.part <= block < lay.data:
+                    assert disk.store.get(block + j) == model[block + j], \
+                        "write of %d+%d not through to the card" % (block, n)
+        if rng.random() < 0.02:
+            cache.ioctl(3, 0)
+            assert disk.store == model, "card differs from the model after sync"
+        slots = cache._slot
+        assert len(slots) <= NBLOCKS and all(cache._tag[i] == b for b, i in slots.items())
+        for b, i in slots.items():
+            assert cache._buf[i * BLOCK:(i + 1) * BLOCK] == model.get(b, bytes(BLOCK)), \
+                "cached copy of %d stale" % b
+    cache.ioctl(3, 0)
+    assert disk.store == model, "card differs from the model after sync"
+    if readahead:
+        assert cache.readaheads, "no readahead"
+    assert disk.multi_reads, "no multi-block reads"
+    return synced, cache, disk
+
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+    failed = 0
+    for fat32 in (False, True):
+        images = []
+        for write_back in (False, True):
+            for readahead in (0, READAHEAD):
+                name = "%s, write_back=%s, readahead=%d" % (
+                    "FAT32 superfloppy" if fat32 else "FAT16 in an MBR partition", write_back, readahead)
+                try:
+                    synced, cache, disk = check_volume(random.Random(rng.random()), fat32, write_back,
+                                                       readahead, ops)
+                except (AssertionError, OSError, KeyError) as e:
+                    failed += 1
+                    print("FAIL %s: %s: %s" % (name, type(e).__name__, e))
+                    continue
+                images.append(synced)
+                print("ok   %s (%d hits, %d misses, %d readaheads, %d writebacks; card %d reads, %d writes)" % (
+                    name, cache.hits, cache.misses, cache.readaheads, cache.writebacks, disk.reads, disk.writes))
+        if any(im != images[0] for im in images):
+            failed += 1
+            print("FAIL %s: synced images differ between modes" % ("FAT32" if fat32 else "FAT16"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# tools/codec_report.py - compression ratio + encode cost of lib/deltacodec.py
+#
+# Encodes integer sample streams the way SdLogger does with LOG_FORMAT =
+# "delta" (rows packed into 496-byte journal payloads, a fresh frame per
+# block) and compares them with the same rows as CSV text:
+#   - mission-data/sample.csv (alt, temp; values scaled to integers by the
+#     decimals they were written with)
+#   - synthetic flights: 1 Hz and 10 Hz, ascent + descent, temperature,
+#     humidity, pressure, altitude and a 3-axis accelerometer
+# Per stream: bytes/row as CSV and coded, ratio on the payload, the
+# 512-byte blocks both formats take on the card, and the CPython encode
+# cost per row (the pico's is measured by scripts/pipeline_bench.py).
+# The card column packs rows as SdLogger does: a block is committed when
+# the next row does not fit or --sync-ms after the last commit, and each
+# --segment-s segment starts with its header record and ends with an
+# end-of-file block. "full" is the same with --sync-ms 0 (blocks always
+# fill): the most delta can save.
+#
+#   python tools/codec_report.py [csv ...] [--period MS] [--sync-ms MS]
+#                                [--segment-s S]
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, ".."))
+sys.path.insert(0, os.path.join(_HERE, "..", "lib"))
+import config  # noqa: E402
+import journal  # noqa: E402
+from deltacodec import DeltaEncoder, decode  # noqa: E402
+
+SAMPLE = os.path.join(_HERE, "..", "..", "mission-data", "sample.csv")
+# app/logging.py's header record (a typical epoch_ms)
+HEADER = "# borealis-log v1 epoch_ms=1735689600000 rtc=1"
+
+
+def load_csv(path):
+    """Columns of a CSV as integers, each scaled by its largest decimal count."""
+    with open(path) as f:
+        lines = [ln.strip() for ln in f if ln.strip() and not ln.startswith("#")]
+    names = lines[0].split(",")
+    cells = [ln.split(",") for ln in lines[1:]]
+    decimals = [max(len(c[i].partition(".")[2]) for c in cells) for i in range(len(names))]
+    rows = [[int(round(float(v) * 10 ** d)) for v, d in zip(c, decimals)] for c in cells]
+    return names, decimals, rows
+
+
+def flight(hz, seconds, seed):
+    """t_ms + 7 sensor channels of a balloon-like ascent and descent, as logged integers."""
+    rng = random.Random(seed)
+    names = ["t_ms", "temp_cc", "rh_cp", "press_pa", "alt_cm", "ax_mg", "ay_mg", "az_mg"]
+    decimals = [0, 2, 2, 0, 2, 3, 3, 3]
+    rows = []
+    period = 1000 // hz
+    t = 0
+    for i in range(seconds * hz):
+        s = i / hz
+        up = min(s, seconds * 0.8)
+        alt = 5.0 * up - 25.0 * max(0.0, s - seconds * 0.8)  # m
+        temp = 15 - 0.0065 * alt + 0.3 * math.sin(s / 60) + rng.gauss(0, 0.05)
+        rh = max(0.0, 60 - alt / 500 + rng.gauss(0, 0.3))
+        press = 101325 * (1 - 2.25577e-5 * alt) ** 5.25588 + rng.gauss(0, 2)
+        swing = 0.05 * math.sin(s * 1.3)
+        t += period + (rng.randint(0, 3) if rng.random() < 0.05 else 0)
+        rows.append([
+            t,
+            int(round(temp * 100)), int(round(rh * 100)), int(round(press)),
+            int(round(alt * 100)),
+            int(round((swing + rng.gauss(0, 0.01)) * 1000)),
+            int(round((swing * 0.5 + rng.gauss(0, 0.01)) * 1000)),
+            int(round((1 + rng.gauss(0, 0.02)) * 1000)),
+        ])
+    return names, decimals, rows
+
+
+def csv_row(row, decimals):
+    cells = ["%d" % v if not d else "%.*f" % (d, v / 10 ** d) for v, d in zip(row, decimals)]
+    return len(",".join(cells)) + 1
+
+
+def csv_bytes(rows, decimals):
+    return sum(csv_row(row, decimals) for row in rows)
+
+
+def card_blocks(rows, row_bytes, head, period_ms, sync_ms, segment_s):
+    """
+    Blocks SdLogger writes for rows taken every period_ms. row_bytes(row,
+    fresh) is a row's size, fresh if it starts a block (a new frame); head
+    is the header record at the start of each segment's first block.
+    """
+    seg_rows = segment_s * 1000 // period_ms if segment_s else 0
+    per_sync = -(-sync_ms // period_ms) if sync_ms else 0
+    blocks = pending = since = 0
+    fresh = True
+    for i, row in enumerate(rows):
+        if not i or (seg_rows and i % seg_rows == 0):
+            if i:
+                # the last block, then the end-of-file marker
+                blocks += (1 if pending else 0) + 1
+            pending = head
+            fresh = True
+        n = row_bytes(row, fresh)
+        if pending + n > journal.PAYLOAD:
+            blocks += 1
+            pending = 0
+            n = row_bytes(row, True)
+        pending += n
+        fresh = False
+        since += 1
+        if per_sync and since >= per_sync:
+            blocks += 1
+            pending = since = 0
+            fresh = True
+    return blocks + (1 if pending else 0) + 1
+
+
+def encode(rows, orders):
+    """Frames as SdLogger packs them, and the encode time per row (us)."""
+    enc = DeltaEncoder(orders)
+    frames = []
+    frame = bytearray()
+    t = time.perf_counter()
+    for row in rows:
+        n = enc.encode(row)
+        if len(frame) + n > journal.PAYLOAD:
+            frames.append(bytes(frame))
+            frame = bytearray()
+            enc.reset()
+            n = enc.encode(row)
+        frame += enc.mv[:n]
+    dt = time.perf_counter() - t
+    if frame:
+        frames.append(bytes(frame))
+    return frames, dt / len(rows) * 1e6
+
+
+def report(name, names, decimals, rows, orders, period_ms, sync_ms, segment_s):
+    frames, us = encode(rows, orders)
+    back = [r for f in frames for r in decode(f, orders)]
+    assert back == rows, "round trip failed"
+    text = csv_bytes(rows, decimals)
+    coded = sum(len(f) for f in frames)
+
+    columns = ",".join(names) + "\n"
+    csv_head = len(HEADER) + 1 + len(columns)
+    delta_head = csv_head + len(" codec=delta orders=%s decimals=%s" % (
+        ",".join("%d" % o for o in orders), ",".join("%d" % d for d in decimals)))
+    enc = DeltaEncoder(orders)
+
+    def delta_row(row, fresh):
+        if fresh:
+            enc.reset()
+        return enc.encode(row)
+
+    def blocks(sync):
+        enc.reset()
+        return (card_blocks(rows, lambda row, fresh: csv_row(row, decimals), csv_head,
+                            period_ms, sync, segment_s),
+                card_blocks(rows, delta_row, delta_head, period_ms, sync, segment_s))
+
+    tc, dc = blocks(sync_ms)
+    tf, df = blocks(0)
+    print("%-20s %7d rows x %d  csv %5.1f B/row  delta %4.1f B/row  ratio %4.1fx  "
+          "card %5d -> %5d blocks (%4.1fx, full %5d -> %5d)  encode %5.1f us/row"
+          % (name, len(rows), len(names), text / len(rows), coded / len(rows), text / coded,
+             tc, dc, tc / dc, tf, df, us))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="compression ratio + encode cost of lib/deltacodec.py")
+    ap.add_argument("csv", nargs="*", help="CSV files (default: mission-data/sample.csv)")
+    ap.add_argument("--period", type=int, default=1000, help="ms per CSV row")
+    ap.add_argument("--sync-ms", type=int, default=config.LOG_SYNC_MS)
+    ap.add_argument("--segment-s", type=int, default=config.LOG_SEGMENT_MAX_S)
+    args = ap.parse_args()
+    log = (args.sync_ms, args.segment_s)
+    print("card: LOG_SYNC_MS %d, LOG_SEGMENT_MAX_S %d" % log)
+    for path in args.csv or [SAMPLE]:
+        names, decimals, rows = load_csv(path)
+        # a sampled profile: the first column (x) is smooth, use the change of its step
+        for label, orders in (("order 1", [1] * len(names)), ("order 2/1", [2] + [1] * (len(names) - 1))):
+            report("%s %s" % (os.path.basename(path), label), names, decimals, rows, orders,
+                   args.period, *log)
+    for hz in (1, 10):
+        names, decimals, rows = flight(hz, 3 * 3600, seed=hz)
+        # t_ms on a fixed grid: delta-of-delta; sensors: delta
+        report("flight %d Hz" % hz, names, decimals, rows, [2] + [1] * (len(names) - 1), 1000 // hz, *log)
+    # the firmware's own raw rows: t_ms, late_ms, temp, rh (SdLogger's orders)
+    _, decimals, rows = flight(1, 3 * 3600, seed=7)
+    rows = [[r[0], 0, r[1], r[2]] for r in rows]
+    report("firmware rows 1 Hz", ["t_ms", "late_ms", "temp_c", "humidity_percent"], [0, 0, 2, 2], rows,
+           [2, 0, 1, 1], 1000, *log)
+
+
+if __name__ == "__main__":
+    main()
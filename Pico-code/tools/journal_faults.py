@@ -0,0 +1,117 @@
+# tools/journal_faults.py - host-side brownout check for lib/journal.py
+#
+# Runs the journal writer against a RAM "SD card" that loses power at a
+# random byte of a random block write (torn block, or stale junk left in the
+# block), then runs recovery and checks that exactly the blocks written
+# before the cut come back, in order, and nothing else.
+#
+#   python tools/journal_faults.py [trials] [seed]
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+import journal  # noqa: E402
+
+
+class PowerLoss(Exception):
+    pass
+
+
+class FaultyDevice:
+    """
+    File-like stand-in for a preallocated segment on the card. Writes land
+    in RAM; the write that hits the fault byte is torn there.
+    """
+    def __init__(self, size, fault_at, mode, junk):
+        self.data = bytearray(junk[:size])
+        self.pos = 0
+        self.fault_at = fault_at
+        self.mode = mode
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos):
+        self.pos = pos
+
+    def flush(self):
+        pass
+
+    def write(self, buf):
+        end = self.pos + len(buf)
+        if self.pos <= self.fault_at < end:
+            cut = self.fault_at - self.pos
+            self.data[self.pos:self.pos + cut] = buf[:cut]
+            if self.mode == "garbage":
+                # controller wrote part of the block, the rest is noise
+                for i in range(self.pos + cut, end):
+                    self.data[i] = random.getrandbits(8)
+            raise PowerLoss()
+        self.data[self.pos:end] = buf
+        self.pos = end
+        return len(buf)
+
+
+def trial(rng, size=32 * journal.BLOCK):
+    # junk from an "older" journal with another session, to catch stale reads
+    old = FaultyDevice(size, size + 1, "torn", bytes(size))
+    w = journal.JournalWriter(old, session=0xDEAD, seq=rng.randrange(1000))
+    while w.offset + journal.BLOCK <= size:
+        w.append(b"%d,old\n" % rng.randrange(10 ** 6))
+        w.commit()
+
+    dev = FaultyDevice(size, rng.randrange(size), rng.choice(("torn", "garbage")), old.data)
+    w = journal.JournalWriter(dev, session=rng.getrandbits(32))
+    rows = []
+    committed = 0
+    try:
+        while w.offset + journal.BLOCK < size:
+            row = b"%d,%d,%d\n" % (len(rows), rng.randrange(-4000, 9000), rng.randrange(10000))
+            w.append(row)
+            rows.append(row)
+            if rng.random() < 0.1:
+                w.commit()  # the logger's periodic sync of a partial block
+            committed = w.offset // journal.BLOCK
+        w.close_record()
+        committed = w.offset // journal.BLOCK - 1
+    except PowerLoss:
+        committed = w.offset // journal.BLOCK
+
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(dev.data)
+    try:
+        records, end, clean = journal.recover(f.name)
+        with open(f.name, "rb") as g:
+            got = b"".join(p for _, _, p in journal.scan(g))
+        # a second pass must see the sealed, clean file
+        again = journal.recover(f.name)
+    finally:
+        os.unlink(f.name)
+
+    want = b"".join(rows)
+    # +1: the cut fell where the old bytes already matched (e.g. in the pad),
+    # so the torn block is in fact complete
+    assert committed <= records <= committed + 1, (records, committed)
+    assert want.startswith(got), "recovered data is not a prefix of what was written"
+    assert got.count(b"\n") == len(got.splitlines()), "torn row"
+    assert again[0] == records and (again[2] or not records), "recovery did not seal the journal"
+    return records, len(got.splitlines()), len(rows)
+
+
+def main():
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+    random.seed(rng.random())
+    kept = total = 0
+    for _ in range(trials):
+        _, got, written = trial(rng)
+        kept += got
+        total += written
+    print("%d power cuts: all recovered journals valid, %d/%d rows kept (%.1f%%)"
+          % (trials, kept, total, 100.0 * kept / total))
+
+
+if __name__ == "__main__":
+    main()
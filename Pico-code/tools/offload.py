@@ -0,0 +1,275 @@
+# tools/offload.py - copy the logs off the pico over its USB serial port
+#
+# Stops main.py (Ctrl-C), starts app/offload.py through the raw REPL and
+# fetches files in windows of CRC-checked chunks. A bad or missing chunk is
+# asked for again from the last good offset; files arrive as <name>.part
+# and are renamed when complete, so an interrupted offload resumes where it
+# stopped on the next run. Complete files of the same size are skipped.
+#
+#   python tools/offload.py PORT list
+#   python tools/offload.py PORT get [DIR ...] [--out offload] [--decode] [--reset]
+#
+# DIR are experiment directories on the card (default: all). --decode
+# stores each fetched log directory as <dir>.npz for the data-analysis
+# loader (read('<dir>.npz')), --reset restarts main.py afterwards.
+# Needs pyserial (installed with mpremote).
+import argparse
+import os
+import select
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+from journal import crc32  # noqa: E402
+
+MAGIC = b"BO"
+HDR_SIZE = 16
+_HDR = "<2sBBIII"
+TEXT, DATA, END, ERROR = 0x54, 0x44, 0x45, 0x58
+# bytes per G request: a bad frame costs at most one window of draining
+WINDOW = 64 * 1024
+RETRIES = 8
+
+_START = b"import config\nfrom app.offload import mount, serve\nmount(config.SD_MOUNT_POINT)\nserve(config.SD_MOUNT_POINT)\n"
+
+
+class LinkError(Exception):
+    pass
+
+
+class PtyPort:
+    """pyserial-like read/write with a timeout on a file descriptor (a pty)."""
+    def __init__(self, fd, timeout=2.0):
+        self.fd = fd
+        self.timeout = timeout
+
+    def read(self, n):
+        out = b""
+        deadline = time.monotonic() + self.timeout
+        while len(out) < n:
+            left = deadline - time.monotonic()
+            if left <= 0 or not select.select([self.fd], [], [], left)[0]:
+                break
+            try:
+                b = os.read(self.fd, n - len(out))
+            except OSError:
+                break  # the other side closed
+            if not b:
+                break
+            out += b
+        return out
+
+    def write(self, b):
+        os.write(self.fd, b)
+
+    def reset_input_buffer(self):
+        while select.select([self.fd], [], [], 0)[0]:
+            try:
+                if not os.read(self.fd, 4096):
+                    break
+            except OSError:
+                break
+
+
+def open_port(name, timeout=2.0):
+    try:
+        import serial
+    except ImportError:
+        sys.exit("pyserial is needed: pip install pyserial (or mpremote)")
+    return serial.Serial(name, 115200, timeout=timeout)
+
+
+def _read_exact(port, n):
+    b = port.read(n)
+    if len(b) != n:
+        raise LinkError("timeout (%d of %d bytes)" % (len(b), n))
+    return b
+
+
+def _read_until(port, marker, limit=1 << 16):
+    buf = b""
+    while not buf.endswith(marker):
+        b = port.read(1)
+        if not b or len(buf) > limit:
+            raise LinkError("no %r from the pico" % marker)
+        buf += b
+    return buf
+
+
+def _drain(port, quiet=0.3):
+    # let a reply in flight run out: read until nothing arrives for a while
+    timeout = port.timeout
+    port.timeout = quiet
+    try:
+        while port.read(4096):
+            pass
+    finally:
+        port.timeout = timeout
+
+
+class Client:
+    """Host side of the app/offload.py protocol on an open port."""
+    def __init__(self, port):
+        self.port = port
+        self.retries = 0
+        self.banner = self.frame()[3].decode()
+
+    @classmethod
+    def start(cls, port):
+        """Interrupt main.py, run serve() through the raw REPL."""
+        port.write(b"\r\x03\x03")
+        time.sleep(0.2)
+        port.reset_input_buffer()
+        port.write(b"\r\x01")
+        _read_until(port, b"raw REPL; CTRL-B to exit\r\n>")
+        port.write(_START + b"\x04")
+        _read_until(port, b"OK")
+        return cls(port)
+
+    def frame(self):
+        """(type, offset, length, payload) of the next frame; LinkError if damaged."""
+        hdr = _read_exact(self.port, HDR_SIZE)
+        magic, kind, _, offset, n, crc = struct.unpack(_HDR, hdr)
+        if magic != MAGIC or n > (1 << 20):
+            raise LinkError("bad frame header")
+        payload = _read_exact(self.port, n)
+        if crc32(payload, crc32(hdr[4:12])) & 0xFFFFFFFF != crc:
+            raise LinkError("CRC error at offset %d" % offset)
+        if kind == ERROR:
+            raise OSError(payload.decode())
+        return kind, offset, n, payload
+
+    def _request(self, line):
+        self.port.write(line.encode() + b"\n")
+
+    def _recover(self):
+        self.retries += 1
+        _drain(self.port)
+
+    def list(self):
+        """[(path, size)] of every file on the card."""
+        for _ in range(RETRIES):
+            self._request("L")
+            out = []
+            try:
+                while True:
+                    kind, _, _, payload = self.frame()
+                    if kind == END:
+                        return out
+                    path, size = payload.decode().strip().rsplit(",", 1)
+                    out.append((path, int(size)))
+            except LinkError:
+                self._recover()
+        raise LinkError("listing failed %d times" % RETRIES)
+
+    def get(self, path, f, size, progress=None):
+        """Append path from f.tell() on to f (the .part file) until size bytes."""
+        pos = f.tell()
+        fails = 0
+        while pos < size:
+            self._request("G %s %d %d" % (path, pos, WINDOW))
+            try:
+                while True:
+                    kind, offset, n, payload = self.frame()
+                    if kind == END:
+                        size = n  # the file as it is now
+                        break
+                    if offset != pos:
+                        raise LinkError("chunk at %d, expected %d" % (offset, pos))
+                    f.write(payload)
+                    pos += n
+                    if progress:
+                        progress(pos, size)
+                fails = 0
+            except LinkError:
+                fails += 1
+                if fails > RETRIES:
+                    raise
+                self._recover()
+        return pos
+
+    def quit(self):
+        self._request("Q")
+        try:
+            while self.frame()[0] != END:
+                pass
+        except LinkError:
+            pass
+
+
+def _progress(name, t0):
+    def show(pos, size):
+        dt = max(time.monotonic() - t0, 1e-3)
+        sys.stdout.write("\r%-40s %9d/%9d  %6.1f KB/s" % (name, pos, size, pos / 1024 / dt))
+        sys.stdout.flush()
+    return show
+
+
+def fetch(client, files, out, progress=True):
+    """Fetch (path, size) files into out; returns the local paths of the files now complete."""
+    done = []
+    for path, size in files:
+        dst = os.path.join(out, *path.split("/"))
+        if os.path.exists(dst) and os.path.getsize(dst) == size:
+            done.append(dst)
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        part = dst + ".part"
+        with open(part, "ab") as f:
+            if f.tell() > size:
+                # not a prefix of this file
+                f.truncate(0)
+            t0 = time.monotonic()
+            client.get(path, f, size, _progress(path, t0) if progress else None)
+        if progress:
+            print()
+        os.replace(part, dst)
+        done.append(dst)
+    return done
+
+
+def decode(dirs):
+    """Each log directory -> <dir>.npz through the data-analysis loader."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data-analysis"))
+    import module_eng
+    for d in dirs:
+        fn = module_eng.read(d, x="t_ms").save(d + ".npz")
+        print("decoded", fn)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="copy logs off the pico over USB serial")
+    ap.add_argument("port")
+    ap.add_argument("command", choices=("list", "get"))
+    ap.add_argument("dirs", nargs="*", help="experiment directories (default: all)")
+    ap.add_argument("--out", default="offload")
+    ap.add_argument("--decode", action="store_true")
+    ap.add_argument("--reset", action="store_true", help="restart main.py afterwards")
+    args = ap.parse_args()
+
+    port = open_port(args.port)
+    client = Client.start(port)
+    print(client.banner.strip())
+    try:
+        files = client.list()
+        if args.command == "list":
+            for path, size in files:
+                print("%10d  %s" % (size, path))
+            return
+        if args.dirs:
+            files = [(p, s) for p, s in files if p.split("/")[0] in args.dirs]
+        done = fetch(client, files, args.out)
+        print("%d files, %d retried windows" % (len(done), client.retries))
+        if args.decode:
+            decode(sorted({os.path.dirname(p) for p in done
+                           if os.path.basename(p) == "index.csv"}))
+    finally:
+        client.quit()
+        port.write(b"\x02")  # leave the raw REPL
+        if args.reset:
+            port.write(b"\x04")  # soft reset: main.py runs again
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# tools/offload_check.py - host-side check for app/offload.py + tools/offload.py
+#
+# Runs the device side of the offload (serve() in a thread, on CPython) on
+# one end of a pseudo-terminal and tools/offload.py on the other, like the
+# pico's USB serial port and the PC. The "pico" corrupts and drops bytes of
+# some frames and hangs up in the middle of the transfer a few times; the
+# host has to fetch the whole tree byte-exact anyway, resuming the
+# interrupted files from their .part files in a new session.
+#
+#   python tools/offload_check.py [cuts] [seed]
+import os
+import pty
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import tty
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, ".."))
+sys.path.insert(0, os.path.join(_HERE, "..", "lib"))
+sys.path.insert(0, _HERE)
+
+
+class HostOs:
+    """The part of MicroPython's uos that app/offload.py uses."""
+    stat = staticmethod(os.stat)
+
+    @staticmethod
+    def ilistdir(path):
+        for e in os.scandir(path):
+            yield (e.name, 0x4000 if e.is_dir() else 0x8000, 0, e.stat().st_size)
+
+
+sys.modules["uos"] = HostOs()
+import offload as host  # noqa: E402
+from app import offload as device  # noqa: E402
+
+host.RETRIES = 3
+
+
+class HungUp(BaseException):
+    # not an Exception: serve() reports those to the host and carries on
+    pass
+
+
+class FaultyOut:
+    """The pico's stdout: some frames damaged, and a hang-up after cut_at bytes."""
+    def __init__(self, fd, rng, cut_at, p_bad=0.02):
+        self.fd = fd
+        self.rng = rng
+        self.cut_at = cut_at
+        self.p_bad = p_bad
+        self.sent = 0
+        self.damaged = 0
+
+    def write(self, b):
+        b = bytearray(b)
+        if self.sent + len(b) > self.cut_at:
+            raise HungUp()
+        r = self.rng.random()
+        if r < self.p_bad / 2:
+            b[self.rng.randrange(len(b))] ^= 1 << self.rng.randrange(8)
+            self.damaged += 1
+        elif r < self.p_bad:
+            i = self.rng.randrange(len(b))
+            del b[i:i + self.rng.randint(1, 64)]
+            self.damaged += 1
+        self.sent += len(b)
+        view = memoryview(b)
+        while view:
+            view = view[os.write(self.fd, view):]
+
+
+def pico(fd, root, out):
+    # just enough raw REPL for Client.start, then serve()
+    inp = os.fdopen(os.dup(fd), "rb", buffering=0)
+    try:
+        while inp.read(1) != b"\x01":
+            pass
+        os.write(fd, b"raw REPL; CTRL-B to exit\r\n>")
+        while inp.read(1) != b"\x04":
+            pass
+        os.write(fd, b"OK")
+        device.serve(root, inp, out, chunk=1024)
+    except (HungUp, OSError):
+        pass
+    finally:
+        inp.close()
+        os.close(fd)
+
+
+def session(root, dst, rng, cut_at):
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    out = FaultyOut(slave, rng, cut_at)
+    t = threading.Thread(target=pico, args=(slave, root, out), daemon=True)
+    t.start()
+    port = host.PtyPort(master, timeout=0.3)
+    try:
+        client = host.Client.start(port)
+        files = client.list()
+        host.fetch(client, files, dst, progress=False)
+        client.quit()
+        return files, client.retries, out.damaged, True
+    except (host.LinkError, OSError):
+        # hung up (or gave up on a bad link): the next session resumes
+        return None, 0, out.damaged, False
+    finally:
+        os.close(master)
+        t.join(5)
+
+
+def make_tree(root, rng):
+    sizes = {
+        "20251206T101200Z/raw_0000.bjl": 300_000,
+        "20251206T101200Z/index.csv": 97,
+        "20251206T101200Z/10s.csv": 4096,
+        "20251207T080000Z/raw_0000.bjl": 65_536 + 1,
+        "20251207T080000Z/events.csv": 0,
+    }
+    for rel, n in sizes.items():
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(bytes(rng.getrandbits(8) for _ in range(n)))
+    return sizes
+
+
+def main():
+    cuts = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    rng = random.Random(seed)
+    tmp = tempfile.mkdtemp()
+    try:
+        root = os.path.join(tmp, "sd")
+        dst = os.path.join(tmp, "offload")
+        sizes = make_tree(root, rng)
+        total = sum(sizes.values())
+        sessions = retries = damaged = 0
+        ok = False
+        while not ok:
+            # hang up somewhere in the transfer the first `cuts` sessions
+            cut_at = rng.randrange(total) if sessions < cuts else 1 << 62
+            files, r, d, ok = session(root, dst, rng, cut_at)
+            sessions += 1
+            retries += r
+            damaged += d
+            if sessions > cuts + 5:
+                break
+        bad = 0
+        for rel in sizes:
+            a = open(os.path.join(root, *rel.split("/")), "rb").read()
+            p = os.path.join(dst, *rel.split("/"))
+            b = open(p, "rb").read() if os.path.exists(p) else None
+            if a != b:
+                bad += 1
+                print("MISMATCH", rel)
+        print("%d files, %d bytes: %d sessions (%d broke off), %d damaged frames, "
+              "%d windows retried, %d mismatches"
+              % (len(sizes), total, sessions, sessions - 1, damaged, retries, bad))
+        sys.exit(1 if bad or not ok else 0)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,802 @@
+# tools/replay.py - replay a recorded flight through the firmware on the PC
+#
+# Runs app/controller.py's App end to end on CPython, with the hardware
+# replaced at the driver level:
+#   - SHT31 serves the recorded temperature / humidity (linear between the
+#     trace rows) as raw ticks, DS3231 a clock running from --start
+#   - SDCard is a card of the configured clock; the log goes to a host
+#     directory, every write charged its SPI transfer and block programming
+#   - machine.I2C is the bus model under app/i2c_bus.py: each transfer takes
+#     its bit time at I2C_FREQ, the OLED driver and its frames are the real ones
+#   - recorded faults (--events, or the events.csv of a recorded log) make
+#     accesses fail, stall or slow down as they did in flight
+# Time is virtual: sleeps return at once and advance the clock, devices
+# advance it by their modelled latency, so a flight replays far faster than
+# real time and (with --cpu-scale 0) every run logs exactly the same rows.
+# The host CPU time of each firmware stage (_acquire, _read_sensor,
+# _log_row, _show_on, _bring_up, _idle, the whole loop) is measured
+# separately; it is no pico figure, but a change that makes a stage slower
+# makes it slower here too.
+#
+#   python tools/replay.py [TRACE] [--events FILE] [--set K=V ...]
+#                          [--save-baseline FILE | --baseline FILE] [--json FILE]
+#
+# TRACE is a CSV (default mission-data/sample.csv: one row per --period ms
+# unless it has a t_ms column; temp/temp_c and rh/humidity_percent columns,
+# --rh where there is none) or a log directory from the card (needs the
+# data-analysis module). Events files have lines "t_ms,device,kind,arg":
+#   device  sht31, rtc, oled, sd, or i2c (the whole bus)
+#   kind    error  every access fails from t_ms for arg ms (at least one)
+#           stall  the first access from t_ms on takes arg ms longer
+#           slow   every access from t_ms on takes arg us longer (0: ends it)
+#           stuck  (i2c) SDA held low for arg ms, until a bus clear after it
+# --baseline compares the rows read back from the log (exactly) and the
+# stage times (--tolerance) with a saved run; exit status 1 on a regression.
+import argparse
+import bisect
+import builtins
+import calendar
+import contextlib
+import errno
+import gc as host_gc
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.join(_HERE, "..")
+sys.path.insert(0, _ROOT)
+sys.path.insert(0, os.path.join(_ROOT, "lib"))
+
+SAMPLE = os.path.join(_ROOT, "..", "mission-data", "sample.csv")
+STAGES = ("_bring_up", "_acquire", "_read_sensor", "_log_row", "_show_on", "_idle")
+
+# MicroPython's ticks period (2**30 on the rp2 port)
+_MASK = 0x3FFFFFFF
+_HALF = 0x20000000
+
+
+class Finished(BaseException):
+    # not an Exception: App catches those and carries on
+    pass
+
+
+# --- virtual time -----------------------------------------------------------
+
+class Clock:
+    """
+    The firmware's time module. Sleeps and device latency advance it; each
+    ticks read advances it by 1 us (so polling loops end). cpu_scale > 0
+    also adds the host CPU time spent, times cpu_scale (the pico is some
+    tens of times slower than a PC), at the price of reproducible rows.
+    """
+    def __init__(self, cpu_scale=0.0):
+        self.us = 0
+        self.cpu_scale = cpu_scale
+        self._host0 = time.perf_counter()
+        self.on_sleep = None
+        self.woke_ns = time.perf_counter_ns()
+
+    def now_us(self):
+        if self.cpu_scale:
+            return self.us + int((time.perf_counter() - self._host0) * 1e6 * self.cpu_scale)
+        return self.us
+
+    def now_ms(self):
+        return self.now_us() // 1000
+
+    def advance(self, us):
+        self.us += int(us)
+
+    def ticks_us(self):
+        self.us += 1
+        return self.now_us() & _MASK
+
+    def ticks_ms(self):
+        self.us += 1
+        return (self.now_us() // 1000) & _MASK
+
+    @staticmethod
+    def ticks_add(t, delta):
+        return (t + delta) & _MASK
+
+    @staticmethod
+    def ticks_diff(a, b):
+        return ((a - b + _HALF) & _MASK) - _HALF
+
+    def sleep_us(self, us):
+        self.us += int(us)
+
+    def sleep_ms(self, ms):
+        self.us += int(ms * 1000)
+        if self.on_sleep is not None:
+            self.on_sleep()
+        self.woke_ns = time.perf_counter_ns()
+
+    def sleep(self, s):
+        self.sleep_ms(s * 1000)
+
+
+CLOCK = Clock()
+
+
+# --- recorded faults --------------------------------------------------------
+
+class Faults:
+    """Recorded fault / latency events, applied as virtual time passes."""
+    def __init__(self, events=()):
+        self.pending = sorted(events, key=lambda e: e[0])
+        self.active = []  # [t_ms, device, kind, arg, hit]
+        self.slow = {}
+        self.stuck_until = None
+        self.injected = 0
+
+    def _advance(self, now):
+        while self.pending and self.pending[0][0] <= now:
+            t, device, kind, arg = self.pending.pop(0)
+            if kind == "slow":
+                self.slow[device] = arg
+            elif kind == "stuck":
+                self.stuck_until = t + arg
+            else:
+                self.active.append([t, device, kind, arg, False])
+
+    def sda_held(self, now):
+        self._advance(now)
+        return self.stuck_until is not None and now <= self.stuck_until
+
+    def access(self, device, now, bus=False):
+        """Extra latency (us) of an access to device now; OSError if it fails."""
+        self._advance(now)
+        if bus and self.sda_held(now):
+            self.injected += 1
+            raise OSError(errno.ETIMEDOUT)
+        extra = self.slow.get(device, 0) + (self.slow.get("i2c", 0) if bus else 0)
+        keep = []
+        fail = False
+        for e in self.active:
+            t, dev, kind, arg, hit = e
+            if dev == device or (bus and dev == "i2c"):
+                if kind == "stall" and not hit:
+                    extra += arg * 1000
+                    e[4] = True
+                elif kind == "error" and (not hit or now <= t + arg):
+                    fail = True
+                    e[4] = True
+            if not e[4] or (e[2] == "error" and now <= e[0] + e[3]):
+                keep.append(e)
+        self.active = keep
+        if fail:
+            self.injected += 1
+            raise OSError(errno.EIO)
+        return extra
+
+
+FAULTS = Faults()
+
+
+def load_events(path):
+    """(t_ms, device, kind, arg) of an events file."""
+    out = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line or line.startswith("t_ms"):
+                continue
+            t, device, kind, arg = (c.strip() for c in line.split(","))
+            out.append((int(t), device, kind, int(arg or 0)))
+    return out
+
+
+# app/safe_mode.py "where" names of a recorded events.csv -> device
+_WHERE = {"sht31": "sht31", "rtc": "rtc", "oled": "oled", "i2c": "i2c",
+          "sd": "sd", "log": "sd", "events": "sd", "mem_write": "sd"}
+
+
+def log_events(path, t0):
+    """A recorded events.csv as error (or stuck bus) events, t_ms relative to t0."""
+    out = []
+    with open(path) as f:
+        for line in f:
+            cells = line.strip().split(",")
+            if line.startswith("#") or len(cells) != 7 or cells[0] == "t_ms":
+                continue
+            t, last, _, where = int(cells[0]), int(cells[1]), cells[2], cells[3]
+            device = _WHERE.get(where) or _WHERE.get(where.split("_")[0])
+            if device:
+                kind = "stuck" if where == "i2c_stuck" else "error"
+                out.append((t - t0, device, kind, last - t))
+    return out
+
+
+# --- the recorded signal ----------------------------------------------------
+
+class Trace:
+    """Temperature and humidity against ms from the start of the replay."""
+    def __init__(self, t_ms, temp, rh):
+        self.t = t_ms
+        self.temp = temp
+        self.rh = rh
+
+    @property
+    def end_ms(self):
+        return self.t[-1]
+
+    def _at(self, ys, t):
+        i = bisect.bisect_right(self.t, t)
+        if i <= 0:
+            return ys[0]
+        if i >= len(self.t):
+            return ys[-1]
+        t0, t1 = self.t[i - 1], self.t[i]
+        return ys[i - 1] + (ys[i] - ys[i - 1]) * (t - t0) / (t1 - t0)
+
+    def raw(self, t):
+        """(t_raw, rh_raw) SHT31 ticks at t (the inverse of SHT31.convert)."""
+        t_raw = round((self._at(self.temp, t) + 45) * 65535 / 175)
+        rh_raw = round(self._at(self.rh, t) * 65535 / 100)
+        return min(max(t_raw, 0), 65535), min(max(rh_raw, 0), 65535)
+
+
+def _pick(names, choices):
+    for c in choices:
+        if c in names:
+            return names.index(c)
+    return None
+
+
+def load_csv(path, period_ms, rh):
+    with open(path) as f:
+        lines = [ln.strip() for ln in f if ln.strip() and not ln.startswith("#")]
+    names = lines[0].split(",")
+    rows = [[float(v) for v in ln.split(",")] for ln in lines[1:]]
+    it = _pick(names, ("t_ms",))
+    itemp = _pick(names, ("temp_c", "temp", "temperature"))
+    irh = _pick(names, ("humidity_percent", "rh", "humidity"))
+    if itemp is None:
+        sys.exit("%s: no temp column" % path)
+    t = [r[it] for r in rows] if it is not None else [i * period_ms for i in range(len(rows))]
+    t = [v - t[0] for v in t]
+    return Trace(t, [r[itemp] for r in rows], [r[irh] if irh is not None else rh for r in rows])
+
+
+def _analysis():
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    sys.path.insert(0, os.path.join(_ROOT, "..", "data-analysis"))
+    import module_eng
+    return module_eng
+
+
+def load_log(path):
+    """Trace, events and start epoch (ms) of a log directory from the card."""
+    d = _analysis().read(path, x="t_ms")
+    t0 = int(d.x[0])
+    trace = Trace([int(v) - t0 for v in d.x], list(d.y["temp_c"]), list(d.y["humidity_percent"]))
+    ev = os.path.join(path, "events.csv")
+    events = log_events(ev, t0) if os.path.exists(ev) else []
+    epoch = int(d.meta["epoch_ms"]) + t0 if d.rtc else None
+    return trace, events, epoch
+
+
+# --- MicroPython modules ----------------------------------------------------
+
+class Pin:
+    IN, OUT, OPEN_DRAIN = 0, 1, 2
+    PULL_UP, PULL_DOWN = 1, 2
+    levels = {}
+    sda = None
+
+    def __init__(self, n, mode=None, pull=None, value=None):
+        self.n = n
+        if value is not None:
+            Pin.levels[n] = value
+
+    def init(self, mode=None, pull=None, value=None):
+        if value is not None:
+            Pin.levels[self.n] = value
+
+    def value(self, v=None):
+        if v is not None:
+            Pin.levels[self.n] = v
+            return None
+        if self.n == Pin.sda and FAULTS.sda_held(CLOCK.now_ms()):
+            return 0
+        # unset inputs read as pulled up (idle I2C lines)
+        return Pin.levels.get(self.n, 1)
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+
+class I2C:
+    """Bus model: bit time per transfer at freq, devices by address, recorded faults."""
+    devices = {}
+
+    def __init__(self, i2c_id=0, sda=None, scl=None, freq=400_000, timeout=50_000):
+        self.freq = freq
+
+    def _xfer(self, addr, n):
+        device = I2C.devices.get(addr)
+        extra = FAULTS.access(device, CLOCK.now_ms(), bus=True)
+        if device is None:
+            CLOCK.advance(9 * 1e6 / self.freq)
+            raise OSError(errno.ENODEV)
+        # address byte + n data bytes, 9 clocks each
+        CLOCK.advance((n + 1) * 9 * 1e6 / self.freq + extra)
+
+    def writeto(self, addr, buf, stop=True):
+        self._xfer(addr, len(buf))
+        return len(buf)
+
+    def writevto(self, addr, bufs, stop=True):
+        n = sum(len(b) for b in bufs)
+        self._xfer(addr, n)
+        return n
+
+    def readfrom(self, addr, n, stop=True):
+        self._xfer(addr, n)
+        return bytes(n)
+
+    def readfrom_mem(self, addr, reg, n):
+        self._xfer(addr, n + 1)
+        return bytes(n)
+
+    def writeto_mem(self, addr, reg, buf):
+        self._xfer(addr, len(buf) + 1)
+
+    def scan(self):
+        found = []
+        for addr in range(0x08, 0x78):
+            try:
+                self._xfer(addr, 0)
+                found.append(addr)
+            except OSError:
+                pass
+        return found
+
+
+class SPI:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def init(self, *args, **kwargs):
+        pass
+
+
+class FrameBuffer:
+    """Drawing is C on the pico and not modelled; the frames still go over the bus."""
+    def __init__(self, buf, width, height, fmt):
+        self.buf = buf
+
+    def _draw(self, *args):
+        pass
+
+    fill = pixel = text = hline = vline = line = rect = fill_rect = scroll = blit = _draw
+
+
+class HostGc:
+    """gc on a fixed model heap: the pico's figures are not observable here."""
+    HEAP = 192 * 1024
+    ALLOC = 64 * 1024
+
+    def __init__(self):
+        self.enabled = True
+        self.collections = 0
+
+    def collect(self):
+        self.collections += 1
+        host_gc.collect(0)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def isenabled(self):
+        return self.enabled
+
+    def threshold(self, n=None):
+        return -1
+
+    def mem_alloc(self):
+        return self.ALLOC
+
+    def mem_free(self):
+        return self.HEAP - self.ALLOC
+
+
+def _module(name, **attrs):
+    m = types.ModuleType(name)
+    m.__dict__.update(attrs)
+    sys.modules[name] = m
+    return m
+
+
+def install_modules():
+    """The MicroPython modules the firmware imports (no viper: app/acquire.py's Python kernels)."""
+    _module("machine", Pin=Pin, I2C=I2C, SPI=SPI, freq=lambda *a: 125_000_000)
+    _module("micropython", const=lambda x: x, alloc_emergency_exception_buf=lambda n: None,
+            mem_info=lambda *a: None)
+    _module("framebuf", FrameBuffer=FrameBuffer, MONO_VLSB=0, MONO_HLSB=3)
+    uos = _module("uos", VfsFat=lambda dev: dev, mount=lambda vfs, mp: None,
+                  umount=lambda mp: None, listdir=os.listdir, mkdir=os.mkdir,
+                  stat=os.stat, remove=os.remove, rename=os.rename)
+
+    def ilistdir(path="."):
+        for e in os.scandir(path):
+            yield (e.name, 0x4000 if e.is_dir() else 0x8000, 0, e.stat().st_size)
+    uos.ilistdir = ilistdir
+
+
+# --- driver stand-ins -------------------------------------------------------
+
+TRACE = None
+START_EPOCH_MS = 0
+
+
+def _stand_ins():
+    from drivers.sensor_sht31 import SHT31, _MEASURE
+    from drivers.rtc_ds3231 import DS3231
+
+    class ReplaySHT31(SHT31):
+        """The recorded signal, sampled when the measurement is triggered."""
+        def trigger(self):
+            self.i2c.writeto(self.addr, _MEASURE)
+            self._t = CLOCK.now_ms()
+
+        def fetch_raw(self):
+            self.i2c.readfrom(self.addr, 6)
+            return TRACE.raw(self._t)
+
+    class ReplayDS3231(DS3231):
+        """Runs from START_EPOCH_MS on the virtual clock; datetime(dt) moves it."""
+        def datetime(self, dt=None):
+            global START_EPOCH_MS
+            if dt is None:
+                self.i2c.readfrom_mem(self.address, 0x00, 7)
+                tm = time.gmtime((START_EPOCH_MS + CLOCK.now_ms()) // 1000)
+                return (tm.tm_year, tm.tm_mon, tm.tm_mday, tm.tm_wday + 1,
+                        tm.tm_hour, tm.tm_min, tm.tm_sec, 0)
+            self.i2c.writeto_mem(self.address, 0x00, bytes(7))
+            y, m, d, _, hh, mm, ss, _ = dt
+            START_EPOCH_MS = calendar.timegm((y, m, d, hh, mm, ss)) * 1000 - CLOCK.now_ms()
+
+    return ReplaySHT31, ReplayDS3231
+
+
+class SdModel:
+    """Card cost: SPI transfer at the card's clock, block_us per 512-byte block programmed."""
+    def __init__(self, block_us):
+        self.block_us = block_us
+        self.baudrate = 1_000_000
+        self.bytes = 0
+        self.writes = 0
+        self.flushes = 0
+        self.busy_us = 0
+
+    def charge(self, nbytes, blocks=0):
+        extra = FAULTS.access("sd", CLOCK.now_ms())
+        us = nbytes * 8 * 1e6 / self.baudrate + blocks * self.block_us + extra
+        self.busy_us += us
+        CLOCK.advance(us)
+
+
+SD = SdModel(1000)
+
+
+class ReplaySDCard:
+    """drivers.storage_sdcard.SDCard at the fastest configured clock (the files live on the host)."""
+    def __init__(self, spi, cs, baudrate=1_000_000, baudrates=(), crc=False):
+        FAULTS.access("sd", CLOCK.now_ms())
+        CLOCK.advance(20_000)  # CMD0 .. CSD read-back
+        self.baudrate = max((baudrate,) + tuple(baudrates))
+        self.max_baudrate = 25_000_000
+        self.sectors = 1 << 21
+        self.init_times = {}
+        SD.baudrate = self.baudrate
+
+    def readblocks(self, block_num, buf):
+        SD.charge(len(buf))
+
+    def writeblocks(self, block_num, buf):
+        SD.charge(len(buf), len(buf) // 512)
+
+    def ioctl(self, op, arg):
+        return self.sectors if op == 4 else 0
+
+
+class SdFile:
+    """A log file on the host; writes cost card time, a block per 512 bytes or flush."""
+    def __init__(self, f):
+        self.f = f
+        self._dirty = 0
+
+    def write(self, b):
+        SD.charge(len(b))
+        SD.bytes += len(b)
+        SD.writes += 1
+        self._dirty += len(b)
+        if self._dirty >= 512:
+            SD.charge(0, self._dirty // 512)
+            self._dirty %= 512
+        return self.f.write(b)
+
+    def flush(self):
+        if self._dirty:
+            SD.flushes += 1
+            SD.charge(0, 1)
+            self._dirty = 0
+        self.f.flush()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+    def read(self, n=-1):
+        b = self.f.read(n)
+        SD.charge(len(b))
+        return b
+
+    def readinto(self, buf):
+        n = self.f.readinto(buf)
+        SD.charge(n or 0)
+        return n
+
+    def seek(self, *args):
+        return self.f.seek(*args)
+
+    def tell(self):
+        return self.f.tell()
+
+    def __iter__(self):
+        return iter(self.f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sd_open(path, mode="r"):
+    return SdFile(builtins.open(path, mode))
+
+
+# --- the run ----------------------------------------------------------------
+
+def _stats(ns):
+    s = sorted(ns)
+    n = len(s)
+    if not n:
+        return {"n": 0}
+    return {"n": n, "p50_us": s[n // 2] / 1000, "p99_us": s[min(n - 1, n * 99 // 100)] / 1000,
+            "max_us": s[-1] / 1000, "total_ms": sum(s) / 1e6}
+
+
+def _timed(samples, fn):
+    def call(*args):
+        t = time.perf_counter_ns()
+        try:
+            return fn(*args)
+        finally:
+            samples.append(time.perf_counter_ns() - t)
+    return call
+
+
+def read_log(root):
+    """Rows [t_ms, late_ms, centi values ...] of every experiment directory under root, in order."""
+    mod = _analysis()
+    rows = []
+    base = None
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if not os.path.isfile(os.path.join(path, "index.csv")):
+            continue
+        d = mod.read(path, x="t_ms")
+        epoch = int(d.meta.get("epoch_ms", 0))
+        base = epoch if base is None else base
+        y = d.y.values()
+        for i in range(len(d.x)):
+            rows.append([int(d.x[i]) + epoch - base, int(d.late[i]) if d.late is not None else 0]
+                        + [int(round(v * 100)) for v in y[:, i]])
+    return rows
+
+
+def run(trace, events=(), overrides=None, out=None, cpu_scale=0.0, sd_block_us=1000,
+        start_epoch_ms=None, verbose=False):
+    """Replays trace through App into out (a new directory); returns the summary dict."""
+    global TRACE, START_EPOCH_MS
+    TRACE = trace
+    START_EPOCH_MS = start_epoch_ms if start_epoch_ms is not None else 1735689600000  # 2025-01-01
+    CLOCK.__init__(cpu_scale)
+    FAULTS.__init__(events)
+    SD.__init__(sd_block_us)
+
+    install_modules()
+    import config
+    for k, v in (overrides or {}).items():
+        setattr(config, k, v)
+    config.SD_MOUNT_POINT = out
+    import app.controller as ctl
+    import app.logging
+    import app.memory
+    for name, mod in list(sys.modules.items()):
+        if name == "config" or name.startswith(("app.", "drivers.")):
+            if getattr(mod, "time", None) is time:
+                mod.time = CLOCK
+    app.memory.gc = HostGc()
+    app.logging.open = sd_open
+    ctl.SHT31, ctl.DS3231 = _stand_ins()
+    ctl.SDCard = ReplaySDCard
+    I2C.devices = {config.OLED_I2C_ADDR: "oled", config.SHT31_ADDR: "sht31", config.DS3231_ADDR: "rtc"}
+    Pin.sda = config.I2C_SDA
+    Pin.levels = {config.BUTTON_PIN: config.BUTTON_ACTIVE_LEVEL}
+    if config.PAGE_BUTTON_PIN is not None:
+        Pin.levels[config.PAGE_BUTTON_PIN] = 1 - config.PAGE_BUTTON_ACTIVE_LEVEL
+
+    console = io.StringIO()
+    samples = {name: [] for name in STAGES + ("loop",)}
+    wall = time.perf_counter()
+    with contextlib.redirect_stdout(console):
+        a = ctl.App()
+        for name in STAGES:
+            setattr(a, name, _timed(samples[name], getattr(a, name)))
+        loop_done = a._loop_done
+
+        def timed_loop(t0_us):
+            samples["loop"].append(time.perf_counter_ns() - CLOCK.woke_ns)
+            loop_done(t0_us)
+        a._loop_done = timed_loop
+
+        def on_sleep():
+            # switch off at the end of the trace; done once the log is closed
+            now = CLOCK.now_ms()
+            if now >= trace.end_ms:
+                Pin.levels[config.BUTTON_PIN] = 1 - config.BUTTON_ACTIVE_LEVEL
+                if (not a.experiment_running and not a.backlog.n) or now > trace.end_ms + 120_000:
+                    raise Finished()
+        CLOCK.on_sleep = on_sleep
+        try:
+            a.run()
+        except Finished:
+            pass
+    wall = time.perf_counter() - wall
+    if verbose:
+        sys.stdout.write(console.getvalue())
+
+    rows = read_log(out)
+    late = [r[1] for r in rows]
+    virtual_ms = CLOCK.now_ms()
+    return {
+        "trace_rows": len(trace.t),
+        "virtual_s": virtual_ms / 1000,
+        "wall_s": wall,
+        "speedup": virtual_ms / 1000 / wall,
+        "cpu_scale": cpu_scale,
+        "config": {k: getattr(config, k) for k in ("LOG_FORMAT", "SAMPLE_INTERVAL_MS", "ACQ_INTERVAL_MS",
+                                                   "ACQ_FILTER", "LOG_SYNC_MS", "I2C_FREQ")},
+        "rows": rows,
+        "rows_digest": hashlib.sha1(json.dumps(rows).encode()).hexdigest(),
+        "late_ms_max": max(late) if late else 0,
+        "late_rows": sum(1 for v in late if v > 0),
+        "stages": {name: _stats(s) for name, s in samples.items()},
+        "sd": {"bytes": SD.bytes, "writes": SD.writes, "flushes": SD.flushes,
+               "busy_ms": SD.busy_us / 1000,
+               "kb_s": SD.bytes / 1024 / max(SD.busy_us / 1e6, 1e-9), "baudrate": SD.baudrate},
+        "i2c": {"tx": a.bus.tx, "errors": a.bus.errors, "max_us": a.bus.max_us, "clears": a.bus.clears},
+        "faults_injected": FAULTS.injected,
+        "errors": a.safe.events.total,
+        "loop_us_max": a.loop_us_max,
+        "gc_collections": a.mem.collections if hasattr(a.mem, "collections") else None,
+    }
+
+
+def compare(base, cur, tolerance=0.3, floor_us=20.0):
+    """Regressions of cur against base, as lines of text (none: OK)."""
+    out = []
+    a, b = base["rows"], cur["rows"]
+    if a != b:
+        i = next((i for i in range(min(len(a), len(b))) if a[i] != b[i]), min(len(a), len(b)))
+        out.append("rows: %d -> %d, first difference at row %d: %s -> %s"
+                   % (len(a), len(b), i, a[i] if i < len(a) else "-", b[i] if i < len(b) else "-"))
+    for name, s in base["stages"].items():
+        t = cur["stages"].get(name, {})
+        for key in ("p50_us", "p99_us"):
+            if key in s and key in t and t[key] > s[key] * (1 + tolerance) and t[key] - s[key] > floor_us:
+                out.append("%-12s %s %8.1f -> %8.1f us" % (name, key, s[key], t[key]))
+    if cur["sd"]["busy_ms"] > base["sd"]["busy_ms"] * (1 + tolerance):
+        out.append("sd busy %.1f -> %.1f ms" % (base["sd"]["busy_ms"], cur["sd"]["busy_ms"]))
+    return out
+
+
+def report(s):
+    print("%d trace rows -> %d logged rows, %.0f s replayed in %.2f s (x%.0f)"
+          % (s["trace_rows"], len(s["rows"]), s["virtual_s"], s["wall_s"], s["speedup"]))
+    print("late rows %d (max %d ms), %d faults injected, %d errors, loop_us_max %d"
+          % (s["late_rows"], s["late_ms_max"], s["faults_injected"], s["errors"], s["loop_us_max"]))
+    sd = s["sd"]
+    print("sd %d bytes in %d writes / %d flushes, busy %.1f ms (%.0f KB/s at %d Hz)"
+          % (sd["bytes"], sd["writes"], sd["flushes"], sd["busy_ms"], sd["kb_s"], sd["baudrate"]))
+    print("host CPU per call:     n    p50 us    p99 us    max us  total ms")
+    for name, t in s["stages"].items():
+        if t["n"]:
+            print("  %-14s %7d %9.1f %9.1f %9.1f %9.1f"
+                  % (name, t["n"], t["p50_us"], t["p99_us"], t["max_us"], t["total_ms"]))
+
+
+def _value(v):
+    try:
+        return json.loads(v)
+    except ValueError:
+        return v
+
+
+def main():
+    ap = argparse.ArgumentParser(description="replay a recorded flight through the firmware")
+    ap.add_argument("trace", nargs="?", default=SAMPLE, help="CSV or log directory")
+    ap.add_argument("--events", help="fault/latency events file (t_ms,device,kind,arg)")
+    ap.add_argument("--period", type=int, default=1000, help="ms per CSV row without t_ms")
+    ap.add_argument("--rh", type=float, default=50.0, help="humidity where the trace has none")
+    ap.add_argument("--start", help="RTC start, e.g. 2025-06-01T08:00:00Z (default: the log's, or 2025-01-01)")
+    ap.add_argument("--set", nargs="*", default=[], metavar="K=V", help="config overrides, JSON values")
+    ap.add_argument("--cpu-scale", type=float, default=0.0)
+    ap.add_argument("--sd-block-us", type=int, default=1000)
+    ap.add_argument("--out", help="log directory to keep (new or empty)")
+    ap.add_argument("--json", help="write the summary here")
+    ap.add_argument("--save-baseline", metavar="FILE")
+    ap.add_argument("--baseline", metavar="FILE")
+    ap.add_argument("--tolerance", type=float, default=0.3)
+    ap.add_argument("-v", "--verbose", action="store_true", help="show the firmware's console")
+    args = ap.parse_args()
+
+    epoch = None
+    if os.path.isdir(args.trace):
+        trace, events, epoch = load_log(args.trace)
+    else:
+        trace, events = load_csv(args.trace, args.period, args.rh), []
+    if args.events:
+        events += load_events(args.events)
+    if args.start:
+        epoch = calendar.timegm(time.strptime(args.start, "%Y-%m-%dT%H:%M:%SZ")) * 1000
+    overrides = dict(kv.split("=", 1) for kv in args.set)
+    overrides = {k: _value(v) for k, v in overrides.items()}
+
+    out = args.out or tempfile.mkdtemp(prefix="replay-")
+    os.makedirs(out, exist_ok=True)
+    if os.listdir(out) and args.out:
+        sys.exit("%s is not empty" % out)
+    try:
+        s = run(trace, events, overrides, os.path.abspath(out), args.cpu_scale, args.sd_block_us,
+                epoch, args.verbose)
+    finally:
+        if not args.out:
+            shutil.rmtree(out, ignore_errors=True)
+    report(s)
+    for fn in (args.json, args.save_baseline):
+        if fn:
+            with open(fn, "w") as f:
+                json.dump(s, f, indent=1)
+            print("wrote", fn)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(json.load(f), s, args.tolerance)
+        for p in problems:
+            print("REGRESSION", p)
+        print("baseline %s: %s" % (args.baseline, "%d regressions" % len(problems) if problems else "OK"))
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
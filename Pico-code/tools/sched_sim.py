@@ -0,0 +1,120 @@
+# tools/sched_sim.py - host-side sample-rate check for app/scheduler.py
+#
+# Runs the main loop's sampling on a simulated ticks_ms clock (30-bit wrap
+# like the pico, started just before the wrap) with a load model of the real
+# loop: ~1-3 ms of work per iteration, the 15 ms SHT31 measurement per sample,
+# a journal block commit every few seconds and now and then an SD stall
+# longer than the period. Compares the fixed-rate scheduler against the old
+# "last_sample_ms = now" loop: samples vs. the ideal count, rate error (ppm),
+# drift over the run, lateness percentiles and skipped slots.
+#
+#   python tools/sched_sim.py [hours] [seed]
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import app.scheduler as scheduler  # noqa: E402
+
+_MASK = (1 << 30) - 1
+PERIOD_MS = 1000
+SENSOR_MS = 15
+
+
+class SimTime:
+    """The ticks_* part of MicroPython's time module, on a virtual clock."""
+    def __init__(self, start):
+        self.us = start * 1000
+
+    def ticks_ms(self):
+        return (self.us // 1000) & _MASK
+
+    def ticks_add(self, a, b):
+        return (a + b) & _MASK
+
+    def ticks_diff(self, a, b):
+        return ((a - b + (1 << 29)) & _MASK) - (1 << 29)
+
+    def sleep_ms(self, ms):
+        self.us += ms * 1000
+
+    def spend_us(self, us):
+        self.us += us
+
+
+def _sample_cost_us(rng):
+    # SHT31 measurement + row formatting, a block commit about every 5 s,
+    # a rare long SD stall (GC, card housekeeping)
+    us = SENSOR_MS * 1000 + rng.randint(500, 1500)
+    r = rng.random()
+    if r < 0.2:
+        us += rng.randint(5_000, 40_000)
+    elif r > 0.9995:
+        us += rng.randint(PERIOD_MS * 1000, 3 * PERIOD_MS * 1000)
+    return us
+
+
+def run(fixed, seconds, seed):
+    rng = random.Random(seed)
+    # start 10 s before the ticks_ms wrap
+    clock = SimTime(_MASK - 10_000)
+    scheduler.time = clock
+    start_us = clock.us
+    end_us = start_us + seconds * 1_000_000
+    sampler = scheduler.FixedRate(PERIOD_MS, clock.ticks_ms())
+    last_sample_ms = clock.ticks_ms() - PERIOD_MS
+    stamps = []
+    late = []
+    while clock.us < end_us:
+        clock.spend_us(rng.randint(1000, 3000))  # loop work (UI, bring-up)
+        now = clock.ticks_ms()
+        if fixed:
+            if sampler.due(now):
+                late.append(sampler.take(now))
+                stamps.append(clock.us - start_us)
+                clock.spend_us(_sample_cost_us(rng))
+            clock.sleep_ms(max(0, min(10, sampler.until(clock.ticks_ms()))))
+        else:
+            d = clock.ticks_diff(now, last_sample_ms) - PERIOD_MS
+            if d >= 0:
+                last_sample_ms = now
+                late.append(d)
+                stamps.append(clock.us - start_us)
+                clock.spend_us(_sample_cost_us(rng))
+            clock.sleep_ms(10)
+    return stamps, late, sampler.skipped if fixed else None
+
+
+def _pct(values, p):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(p / 100 * len(s)))]
+
+
+def report(name, stamps, late, skipped, seconds):
+    n = len(stamps)
+    ideal = seconds * 1000 // PERIOD_MS
+    span_s = (stamps[-1] - stamps[0]) / 1e6
+    rate = (n - 1) / span_s
+    ppm = (rate * PERIOD_MS / 1000 - 1) * 1e6
+    # last sample against the slot it claims on the ideal grid (skipped
+    # slots are gaps, not drift)
+    slot = n - 1 + (skipped or 0)
+    drift_s = stamps[-1] / 1e6 - slot * PERIOD_MS / 1000
+    print("%-10s %8d samples (ideal %d)  rate error %+7.0f ppm  drift %+8.3f s"
+          % (name, n, ideal, ppm, drift_s))
+    print("%-10s late p50 %d ms  p99 %d ms  max %d ms%s"
+          % ("", _pct(late, 50), _pct(late, 99), max(late),
+             "" if skipped is None else "  skipped slots %d" % skipped))
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 6
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    seconds = int(hours * 3600)
+    for name, fixed in (("last=now", False), ("fixed", True)):
+        stamps, late, skipped = run(fixed, seconds, seed)
+        report(name, stamps, late, skipped, seconds)
+
+
+if __name__ == "__main__":
+    main()
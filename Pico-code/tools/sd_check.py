@@ -0,0 +1,496 @@
+# tools/sd_check.py - host-side check for drivers/storage_sdcard.py
+#
+# Runs SDCard on CPython against an SPI-mode SD card emulator (Card): the
+# SPI bus and CS pin the driver gets are the card's, every byte clocked
+# goes through its command / data state machine and advances a virtual
+# clock by its bit time at the current baudrate. The card checks what a
+# real one relies on (>= 74 clocks before CMD0, <= 400 kHz until it has
+# left idle, CRC7 on CMD0/CMD8 and on everything once CMD59 is on, CRC16
+# on data blocks) and can be an SDHC or an SDSC v1 card, slow to leave
+# idle, absent, or corrupt reads above a given clock. Data tokens come
+# after a random number of 0xFF bytes, so they land at every position of
+# the driver's polls; multi-block reads stream until CMD12, multi-block
+# writes take one 0xFC token per block.
+#
+#   python tools/sd_check.py [seed]
+import os
+import random
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, ".."))
+
+import drivers.storage_sdcard as storage_sdcard  # noqa: E402
+from drivers.storage_sdcard import SDCard  # noqa: E402
+
+
+# --- virtual time -----------------------------------------------------------
+
+class Clock:
+    """The driver's time module: advanced by the bytes clocked on the bus."""
+    def __init__(self):
+        self.us = 0.0
+
+    def ticks_ms(self):
+        return int(self.us // 1000)
+
+    @staticmethod
+    def ticks_diff(a, b):
+        return a - b
+
+
+CLOCK = Clock()
+storage_sdcard.time = CLOCK
+
+
+# --- the card ---------------------------------------------------------------
+
+def crc7(data):
+    crc = 0
+    for b in data:
+        for i in range(7, -1, -1):
+            top = ((crc >> 6) & 1) ^ ((b >> i) & 1)
+            crc = (crc << 1) & 0x7F
+            if top:
+                crc ^= 0x09
+    return crc
+
+
+def crc16(data):
+    crc = 0
+    for b in data:
+        crc ^= b << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+
+def csd_v2(sectors, tran):
+    """CSD of an SDHC/SDXC card (structure 1)."""
+    csd = bytearray(16)
+    c_size = sectors // 1024 - 1
+    csd[0] = 0x40
+    csd[3] = tran
+    csd[7] = (c_size >> 16) & 0x3F
+    csd[8] = (c_size >> 8) & 0xFF
+    csd[9] = c_size & 0xFF
+    csd[15] = (crc7(csd[:15]) << 1) | 1
+    return csd
+
+
+def csd_v1(sectors, tran):
+    """CSD of an SDSC card (structure 0): READ_BL_LEN 9, C_SIZE_MULT 7."""
+    csd = bytearray(16)
+    c_size = sectors // 512 - 1
+    mult = 7
+    csd[0] = 0x00
+    csd[3] = tran
+    csd[5] = 0x59  # CCC (low nibble) | READ_BL_LEN 9
+    csd[6] = (c_size >> 10) & 0x03
+    csd[7] = (c_size >> 2) & 0xFF
+    csd[8] = (c_size & 0x03) << 6
+    csd[9] = mult >> 1
+    csd[10] = (mult & 1) << 7
+    csd[15] = (crc7(csd[:15]) << 1) | 1
+    return csd
+
+
+class Cs:
+    """The chip-select Pin."""
+    OUT = 1
+
+    def __init__(self):
+        self.v = 1
+
+    def init(self, mode=None, value=None):
+        if value is not None:
+            self.v = value
+
+    def __call__(self, v=None):
+        if v is None:
+            return self.v
+        self.v = v
+
+
+class Card:
+    """
+    An SD card in SPI mode, driven through the machine.SPI methods the
+    driver uses. sdhc: block (not byte) addresses and CCS in the OCR; v1:
+    no CMD8 (an SDSC v1 card); ready_ms: time from the first ACMD41 until
+    it leaves idle (None: never); max_hz: clock above which data read
+    from the card is corrupted; latency: most 0xFF bytes before a data
+    token or an R1; present=False: nothing answers.
+    """
+    def __init__(self, rng, sectors=1 << 17, sdhc=True, v1=False, tran=0x32, ready_ms=30,
+                 max_hz=None, latency=12, echo=0xAA, present=True):
+        self.rng = rng
+        self.cs = Cs()
+        self.sectors = sectors
+        self.sdhc = sdhc
+        self.v1 = v1
+        self.ready_ms = ready_ms
+        self.max_hz = max_hz
+        self.latency = latency
+        self.echo = echo
+        self.present = present
+        self.csd = (csd_v2 if sdhc else csd_v1)(sectors, tran)
+        self.store = {}
+        self.baud = 0
+        self.pre_clocks = 0
+        self.reset = False
+        self.idle = True
+        self.app = False
+        self.acmd41_t0 = None
+        self.crc_on = False
+        self.cmd = bytearray()
+        self.out = bytearray()
+        self.rx = None
+        self.stream = None
+        self.log = []
+        self.violations = []
+
+    # machine.SPI
+    def init(self, baudrate=None, polarity=0, phase=0):
+        if baudrate:
+            self.baud = baudrate
+
+    def write(self, buf):
+        for b in bytes(buf):
+            self.xfer(b)
+
+    def read(self, n, fill=0xFF):
+        buf = bytearray(n)
+        self.readinto(buf, fill)
+        return bytes(buf)
+
+    def readinto(self, buf, fill=0xFF):
+        for i in range(len(buf)):
+            buf[i] = self.xfer(fill)
+
+    # the wire
+    def xfer(self, mosi):
+        CLOCK.us += 8e6 / self.baud
+        if self.cs.v or not self.present:
+            if not self.reset:
+                self.pre_clocks += 8
+            return 0xFF
+        if self.rx is not None and not self.out:
+            self._receive(mosi)
+            return 0xFF
+        if self.cmd or (mosi & 0xC0) == 0x40:
+            self.cmd.append(mosi)
+            if len(self.cmd) == 6:
+                cmd = bytes(self.cmd)
+                self.cmd = bytearray()
+                self.out = bytearray()
+                self._command(cmd)
+            return 0xFF
+        if not self.out and self.stream is not None:
+            # CMD18: the next block follows until CMD12
+            self._data(self.store.get(self.stream, bytes(512)))
+            self.stream += 1
+        if self.out:
+            return self.out.pop(0)
+        return 0xFF
+
+    def _gap(self):
+        self.out += b"\xFF" * self.rng.randint(0, self.latency)
+
+    def _r1(self, r1, *extra):
+        self.out += b"\xFF" * self.rng.randint(1, 8)
+        self.out.append(r1 | (1 if self.idle else 0))
+        self.out += bytes(extra)
+
+    def _data(self, data):
+        data = bytearray(data)
+        crc = crc16(data)
+        if self.max_hz and self.baud > self.max_hz:
+            # damaged on the wire, after the card computed its CRC
+            data[self.rng.randrange(len(data))] ^= 1 << self.rng.randrange(8)
+        self._gap()
+        self.out += b"\xFE" + data + bytes((crc >> 8, crc & 0xFF))
+
+    def _command(self, c):
+        idx = c[0] & 0x3F
+        arg = int.from_bytes(c[1:5], "big")
+        app = self.app
+        self.app = False
+        self.log.append(idx)
+        if idx == 12 and self.stream is not None:
+            # a stuff byte (still stream data), R1, busy
+            self.stream = None
+            self.out = bytearray((self.rng.getrandbits(8), 0) + (0,) * self.rng.randint(0, 8))
+            return
+        if self.stream is not None:
+            self.violations.append("CMD%d during a CMD18 read" % idx)
+        self.stream = None
+        if idx == 0:
+            if self.pre_clocks < 74:
+                self.violations.append("CMD0 after %d clocks" % self.pre_clocks)
+            self.reset = True
+            self.idle = True
+            self.crc_on = False
+        elif not self.reset:
+            return
+        if self.idle and self.baud > 400_000:
+            self.violations.append("CMD%d at %d Hz in idle state" % (idx, self.baud))
+        if (idx in (0, 8) or self.crc_on) and c[5] != (crc7(c[:5]) << 1) | 1:
+            self._r1(0x08)  # COM_CRC error
+            return
+
+        if idx == 0:
+            self._r1(0)
+        elif idx == 8:
+            if self.v1:
+                self._r1(0x04)
+            else:
+                self._r1(0, 0, 0, arg >> 8 & 0x0F, self.echo if self.echo is not None else arg & 0xFF)
+        elif idx == 55:
+            self.app = True
+            self._r1(0)
+        elif idx == 41 and app:
+            if self.acmd41_t0 is None:
+                self.acmd41_t0 = CLOCK.us
+            hcs_ok = arg & 0x40000000 or not self.sdhc
+            if (hcs_ok and self.ready_ms is not None
+                    and CLOCK.us - self.acmd41_t0 >= self.ready_ms * 1000):
+                self.idle = False
+            self._r1(0)
+        elif idx == 58:
+            ocr = 0x00FF8000 | (0 if self.idle else 0x80000000)
+            if self.sdhc and not self.idle:
+                ocr |= 0x40000000
+            self._r1(0, *ocr.to_bytes(4, "big"))
+        elif idx == 59:
+            self.crc_on = bool(arg & 1)
+            self._r1(0)
+        elif idx == 16:
+            self._r1(0 if arg == 512 or self.sdhc else 0x40)
+        elif idx == 9:
+            self._r1(0)
+            self._data(self.csd)
+        elif idx == 17:
+            block = self._block(arg)
+            if block is not None:
+                self._r1(0)
+                self._data(self.store.get(block, bytes(512)))
+        elif idx == 18:
+            block = self._block(arg)
+            if block is not None:
+                self._r1(0)
+                self.stream = block
+        elif idx in (24, 25):
+            block = self._block(arg)
+            if block is not None:
+                self._r1(0)
+                self.rx = [block, bytearray(), idx == 25]
+        else:
+            self._r1(0x04)  # illegal command
+
+    def _block(self, arg):
+        """Block number of a read/write address, or None (R1 error sent)."""
+        if self.idle:
+            self._r1(0x04)
+            return None
+        block = arg if self.sdhc else arg // 512
+        if not self.sdhc and arg % 512:
+            self._r1(0x20)  # address error
+            return None
+        if block >= self.sectors:
+            self._r1(0x40)  # parameter error
+            return None
+        return block
+
+    def _receive(self, mosi):
+        """
+        A byte of a CMD24 / CMD25 write: the start token (0xFE / 0xFC per
+        block; 0xFD ends CMD25), then 512 data bytes (whatever their value)
+        and the CRC.
+        """
+        block, buf, multi = self.rx
+        if not buf:
+            if mosi == 0xFF:
+                return
+            if multi and mosi == 0xFD:
+                self.rx = None
+                self.out = bytearray(b"\xFF" + b"\x00" * self.rng.randint(1, 40))
+                return
+            if mosi != (0xFC if multi else 0xFE):
+                self.violations.append("token 0x%02x in a CMD%d write" % (mosi, 25 if multi else 24))
+        buf.append(mosi)
+        if len(buf) < 515:
+            return
+        data = bytes(buf[1:513])
+        if self.crc_on and (buf[513] << 8 | buf[514]) != crc16(data):
+            self.rx = None
+            self.out = bytearray(b"\xEB")  # data response: CRC error
+            return
+        self.store[block] = data
+        self.rx = [block + 1, bytearray(), True] if multi else None
+        # data response "accepted", then busy while it programs
+        self.out = bytearray(b"\xE5" + b"\x00" * self.rng.randint(1, 40))
+
+
+# --- checks -----------------------------------------------------------------
+
+def new_card(rng, card_kw=None, **kw):
+    card = Card(rng, **(card_kw or {}))
+    CLOCK.us = 0.0
+    sd = SDCard(card, card.cs, **kw)
+    return card, sd
+
+
+def roundtrip(card, sd, rng, blocks=8):
+    for _ in range(blocks):
+        block = rng.randrange(sd.sectors)
+        data = bytes(rng.getrandbits(8) for _ in range(512))
+        sd.writeblocks(block, data)
+        assert card.store[block] == data, "block %d not written as sent" % block
+        back = bytearray(512)
+        sd.readblocks(block, back)
+        assert back == data, "block %d read back wrong" % block
+
+
+def check_sdhc(rng):
+    card, sd = new_card(rng, baudrate=1_000_000, baudrates=(25_000_000, 12_500_000))
+    assert sd.version == 2 and sd.cdv == 1, (sd.version, sd.cdv)
+    assert sd.sectors == card.sectors, sd.sectors
+    assert sd.max_baudrate == 25_000_000 and sd.baudrate == 25_000_000, (sd.max_baudrate, sd.baudrate)
+    assert 16 not in card.log, "CMD16 sent to an SDHC card"
+    n9 = card.log.count(9)
+    assert sd.ioctl(4, 0) == card.sectors and card.log.count(9) == n9, "ioctl(4) issued CMD9"
+    roundtrip(card, sd, rng)
+    return card, sd
+
+
+def check_capped(rng):
+    # advertises 25 MHz: 50 MHz is never tried
+    card, sd = new_card(rng, baudrate=1_000_000, baudrates=(50_000_000, 25_000_000))
+    assert sd.baudrate == 25_000_000, sd.baudrate
+    assert card.log.count(9) == 2, "CSD read %d times" % card.log.count(9)
+    return card, sd
+
+
+def check_fallback(rng):
+    # reads corrupt above 12.5 MHz: 25 MHz must fail the CSD read-back
+    card, sd = new_card(rng, {"max_hz": 12_500_000}, baudrate=1_000_000,
+                        baudrates=(25_000_000, 12_500_000))
+    assert sd.baudrate == 12_500_000, sd.baudrate
+    roundtrip(card, sd, rng)
+    # and nothing verifies: the fallback clock
+    card, sd = new_card(rng, {"max_hz": 2_000_000}, baudrate=1_000_000,
+                        baudrates=(25_000_000, 12_500_000))
+    assert sd.baudrate == 1_000_000, sd.baudrate
+    roundtrip(card, sd, rng)
+    return card, sd
+
+
+def check_v1_crc(rng):
+    # SDSC v1 card (no CMD8, byte addresses, CMD16) with CMD59 CRC checking
+    card, sd = new_card(rng, {"sdhc": False, "v1": True, "sectors": 1 << 16, "tran": 0x2A},
+                        baudrate=1_000_000, baudrates=(25_000_000,), crc=True)
+    assert sd.version == 1 and sd.cdv == 512, (sd.version, sd.cdv)
+    assert 16 in card.log and card.crc_on, "no CMD16 / CMD59"
+    assert sd.sectors == card.sectors, sd.sectors
+    assert sd.max_baudrate == 20_000_000 and sd.baudrate == 1_000_000, (sd.max_baudrate, sd.baudrate)
+    roundtrip(card, sd, rng)
+    # a corrupted read must not pass the CRC16 check
+    card.max_hz = 1
+    try:
+        sd.readblocks(3, bytearray(512))
+    except OSError:
+        pass
+    else:
+        raise AssertionError("corrupted block read without a CRC error")
+    return card, sd
+
+
+def check_slow_idle(rng):
+    # leaves idle after 600 ms: polled, no sleeps, within the 1 s deadline
+    card, sd = new_card(rng, {"ready_ms": 600})
+    assert 600 <= sd.init_times["acmd41"] < 700, sd.init_times
+    return card, sd
+
+
+def check_transfers(rng, crc=False):
+    # random single and multi-block reads and writes against a model of
+    # the card; every data token latency up to 24 bytes (3 polls)
+    card, sd = new_card(rng, {"latency": 24}, baudrate=1_000_000, baudrates=(25_000_000,), crc=crc)
+    model = {}
+    for _ in range(300):
+        n = rng.choice((1, 1, 2, 3, 8))
+        block = rng.randrange(sd.sectors - n)
+        if rng.random() < 0.5:
+            data = bytes(rng.getrandbits(8) for _ in range(512 * n))
+            sd.writeblocks(block, data)
+            for j in range(n):
+                model[block + j] = data[j * 512:(j + 1) * 512]
+        else:
+            buf = bytearray(512 * n)
+            sd.readblocks(block, buf)
+            want = b"".join(model.get(block + j, bytes(512)) for j in range(n))
+            assert buf == want, "%d block(s) at %d read back wrong" % (n, block)
+    assert all(card.store.get(b, bytes(512)) == d for b, d in model.items()), "card differs from the model"
+    for cmd in (17, 18, 24, 25):
+        assert cmd in card.log, "no CMD%d" % cmd
+    return card, sd
+
+
+def check_multi_write(rng):
+    # CMD25 takes one 0xFC start token per block: a second 0xFE token after
+    # it is taken as the first data byte, and the blocks land shifted by one
+    card, sd = new_card(rng)
+    data = bytes(range(256)) * 2 * 4
+    sd.writeblocks(100, data)
+    for j in range(4):
+        assert card.store.get(100 + j) == data[j * 512:(j + 1) * 512], "block %d of a CMD25 write shifted" % j
+    return card, sd
+
+
+def expect_error(rng, card_kw, what):
+    try:
+        new_card(rng, card_kw)
+    except OSError as e:
+        assert what in str(e), e
+        return None, None
+    raise AssertionError("init succeeded")
+
+
+CHECKS = (
+    ("SDHC init, clock step-up, cached CSD", check_sdhc),
+    ("clock capped by CSD TRAN_SPEED", check_capped),
+    ("clock falls back when reads corrupt", check_fallback),
+    ("SDSC v1 card with CMD59 CRC", check_v1_crc),
+    ("ACMD41 polled until ready", check_slow_idle),
+    ("reads and writes, random token latency", check_transfers),
+    ("reads and writes with CMD59 CRC", lambda rng: check_transfers(rng, crc=True)),
+    ("multi-block write: one start token per block", check_multi_write),
+    ("no card", lambda rng: expect_error(rng, {"present": False}, "CMD0")),
+    ("CMD8 echo mismatch", lambda rng: expect_error(rng, {"echo": 0x55}, "CMD8")),
+    ("ACMD41 never ready", lambda rng: expect_error(rng, {"ready_ms": None}, "ACMD41")),
+)
+
+
+def main():
+    rng = random.Random(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
+    failed = 0
+    for name, check in CHECKS:
+        try:
+            card, sd = check(rng)
+            if card is not None and card.violations:
+                raise AssertionError("; ".join(card.violations[:3]))
+        except (AssertionError, OSError) as e:
+            failed += 1
+            print("FAIL %s: %s: %s" % (name, type(e).__name__, e))
+            continue
+        extra = ""
+        if sd is not None:
+            extra = " (init %d ms at %d Hz: %s)" % (
+                sum(sd.init_times.values()), sd.baudrate,
+                ", ".join("%s %d" % kv for kv in sd.init_times.items()))
+        print("ok   %s%s" % (name, extra))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmarks for module_eng / module_swe on synthetic flights.
+
+    python benchmark.py                          # 10^3..10^6 rows, 1/5/20 channels -> benchmark.json
+    python benchmark.py --rows 1e3 1e7 --channels 20 --out after.json
+    python benchmark.py --compare before.json after.json
+
+Every (rows, channels) flight is generated deterministically from --seed
+and cached as CSV in --data. Times load (read/läs), trend (all channels),
+dist (showdist/visafödelning), box (showbox/visalådagram) and psd
+(showpsd/visapsd) with the non-interactive Agg backend: best of --repeat
+runs and the peak memory traced during one run. Once an operation takes
+longer than --budget seconds, or would by linear extrapolation, its
+larger sizes are skipped (recorded with seconds = None).
+"""
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _HERE)
+
+# per module: loader, plotter and the plotter methods benchmarked
+_API = {
+    'eng': ('read', 'plotter', {'trend': 'trend', 'dist': 'showdist', 'box': 'showbox', 'psd': 'showpsd'}, 'plot'),
+    'swe': ('läs', 'grafritare', {'trend': 'trend', 'dist': 'visafödelning', 'box': 'visalådagram', 'psd': 'visapsd'}, 'rita'),
+}
+OPS = ('load', 'trend', 'dist', 'box', 'psd')
+
+def flight(rows:int, channels:int, seed:int=1):
+    """
+    Synthetic balloon flight with rows samples: altitude (ascent at ~5 m/s,
+    burst, faster descent under the parachute) and channels sensor columns:
+    temperature on the standard lapse rate with a tropopause, humidity
+    falling with height, pressure, then further temperature-like channels
+    with their own offsets and noise levels. Same arguments, same data.
+    """
+    rng = np.random.default_rng([seed, rows, channels])
+    s = np.linspace(0.0, 1.0, rows)
+    burst = 0.75
+    alt = np.where(s < burst, 30000 * s / burst, 30000 * (1 - (s - burst) / (1 - burst)) ** 1.5)
+    alt += rng.normal(0, 2.0, rows)
+    temp = 15 - 0.0065 * np.minimum(alt, 11000) + 0.001 * np.maximum(alt - 20000, 0)
+    cols = [temp + rng.normal(0, 0.05, rows)]
+    if channels > 1:
+        cols.append(np.clip(70 * np.exp(-alt / 8000) + rng.normal(0, 0.5, rows), 0, 100))
+    if channels > 2:
+        cols.append(101325 * np.exp(-alt / 8434) + rng.normal(0, 3, rows))
+    for j in range(3, channels):
+        cols.append(temp + j + rng.normal(0, 0.02 * j, rows))
+    return np.column_stack([alt] + cols)
+
+def flight_csv(folder:str, rows:int, channels:int, seed:int=1):
+    """flight() as a CSV (alt first, like mission-data/sample.csv), generated once per folder."""
+    fn = os.path.join(folder, f'flight_{rows}x{channels}_s{seed}.csv')
+    if not os.path.exists(fn):
+        data = flight(rows, channels, seed)
+        header = ','.join(['alt', 'temp', 'rh', 'press'][:min(channels, 3) + 1] +
+                          [f'ch{j}' for j in range(3, channels)])
+        with open(fn + '.part', 'w') as f:
+            f.write(header + '\n')
+            for i in range(0, rows, 100000):
+                np.savetxt(f, data[i:i + 100000], fmt='%.4f', delimiter=',')
+        os.replace(fn + '.part', fn)
+    return fn
+
+def _measure(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+        plt.close('all')
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        plt.close('all')
+    return best, peak
+
+def run(module:str='eng', rows=(10**3, 10**4, 10**5, 10**6), channels=(1, 5, 20),
+        seed:int=1, data:str=None, repeat:int=3, budget:float=30.0, log=print):
+    """Results as a list of {op, rows, channels, seconds, peak_bytes}."""
+    mod = __import__('module_' + module)
+    loader, plotter, methods, plot = _API[module]
+    loader = getattr(mod, loader)
+    plotter = getattr(mod, plotter)
+    data = data or os.path.join(tempfile.gettempdir(), 'borealis-bench')
+    os.makedirs(data, exist_ok=True)
+    results = []
+    for c in channels:
+        last = {}
+        for n in rows:
+            fn = flight_csv(data, n, c, seed)
+            loaded = loader(fn, x='alt')
+            def plotted():
+                p = plotter(copy.copy(loaded))
+                getattr(p, plot)()
+                return p
+            ops = {
+                'load': lambda: loader(fn, x='alt'),
+                'trend': lambda: getattr(plotter(copy.copy(loaded)), methods['trend'])(),
+                'dist': lambda: getattr(plotted(), methods['dist'])(),
+                'box': lambda: getattr(plotted(), methods['box'])(),
+                # the synthetic flight has no time axis: 10 Hz
+                'psd': lambda: getattr(plotted(), methods['psd'])(fs=10.0),
+            }
+            for op in OPS:
+                r = {'op': op, 'rows': n, 'channels': c, 'seconds': None, 'peak_bytes': None}
+                if op not in last or last[op][1] * n / last[op][0] <= budget:
+                    r['seconds'], r['peak_bytes'] = _measure(ops[op], repeat if n <= 10**5 else 1)
+                    last[op] = (n, r['seconds'])
+                    log(f"{op:6s} {n:>9d} rows x {c:2d}  {r['seconds']:9.4f} s  {r['peak_bytes'] / 2**20:9.1f} MiB")
+                else:
+                    log(f"{op:6s} {n:>9d} rows x {c:2d}  skipped (over budget)")
+                results.append(r)
+    return results
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_HERE,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(old:str, new:str):
+    """Time and memory of new / old per (op, rows, channels) present in both."""
+    def index(fn):
+        with open(fn) as f:
+            doc = json.load(f)
+        return doc, {(r['op'], r['rows'], r['channels']): r for r in doc['results']}
+    a, ra = index(old)
+    b, rb = index(new)
+    print(f"{a.get('commit')} -> {b.get('commit')}   (ratio < 1: faster / smaller)")
+    for key in sorted(set(ra) & set(rb), key=lambda k: (OPS.index(k[0]), k[2], k[1])):
+        x, y = ra[key], rb[key]
+        if x['seconds'] is None or y['seconds'] is None:
+            continue
+        print(f"{key[0]:6s} {key[1]:>9d} rows x {key[2]:2d}  {x['seconds']:9.4f} -> {y['seconds']:9.4f} s"
+              f"  x{y['seconds'] / x['seconds']:6.2f}   mem x{y['peak_bytes'] / max(x['peak_bytes'], 1):6.2f}")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('--module', choices=sorted(_API), default='eng')
+    ap.add_argument('--rows', type=float, nargs='+', default=[1e3, 1e4, 1e5, 1e6])
+    ap.add_argument('--channels', type=int, nargs='+', default=[1, 5, 20])
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--data', help='folder for the generated flights (default: a temp folder)')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--budget', type=float, default=30.0)
+    ap.add_argument('--out', default='benchmark.json')
+    ap.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = ap.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+    # Agg: plt.show() only warns
+    warnings.filterwarnings('ignore', category=UserWarning)
+    results = run(args.module, [int(r) for r in args.rows], args.channels,
+                  args.seed, args.data, args.repeat, args.budget)
+    doc = {'commit': _commit(), 'module': args.module, 'seed': args.seed,
+           'python': sys.version.split()[0], 'numpy': np.__version__,
+           'matplotlib': matplotlib.__version__, 'results': results}
+    with open(args.out, 'w') as f:
+        json.dump(doc, f, indent=1)
+    print('wrote', args.out)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,16 @@
 import matplotlib.pyplot as plt
 from numpy import *
+from numpy.lib.stride_tricks import sliding_window_view
 import csv
+import io
+import os
+import re
+import sys
+
+# onlinestats is shared with the Pico firmware
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Pico-code', 'lib'))
+from onlinestats import RunningStats, RunningRegression, P2Quantile
+import journal
 
 class getter:
     def __init__(self, headers, y):
@@ -29,37 +39,489 @@ class getter:
     def keys(self):
         return self.headers
 
+def _meta(file):
+    """Reads an optional "# borealis-log k=v ..." line and leaves the file at the CSV header."""
+    first = file.readline()
+    if not first.startswith('#'):
+        file.seek(0)
+        return {}
+    return dict(kv.split('=', 1) for kv in first[1:].split() if '=' in kv)
+
+def _open(fn, offset=0):
+    """
+    Log file (plain CSV or journaled .bjl segment) as a text stream: the
+    header lines, then everything from byte offset on.
+    """
+    if not fn.endswith('.bjl'):
+        file = open(fn, 'r')
+        if not offset:
+            return file
+        with file:
+            head = file.readline()
+            if head.startswith('#'):
+                head += file.readline()
+            file.seek(offset)
+            return io.StringIO(head + file.read())
+    with open(fn, 'rb') as f:
+        records = journal.scan(f)
+        _, _, first = next(records, (0, 0, b''))
+        if offset:
+            # the first record of a segment holds the header lines
+            nhead = 2 if first.startswith(b'#') else 1
+            first = b''.join(first.splitlines(True)[:nhead])
+            f.seek(offset)
+            records = journal.scan(f)
+        text = first + b''.join(payload for _, _, payload in records)
+    return io.StringIO(text.decode())
+
+def _undelta(payloads, orders):
+    """
+    Rows of delta-coded journal frames (lib/deltacodec.py) as one int64
+    array, all frames at once: varint ends from the continuation bits,
+    zig-zag undone, then per column as many cumulative sums as its order,
+    restarted at every frame.
+    """
+    ncols = len(orders)
+    b = frombuffer(b''.join(payloads), dtype=uint8)
+    ends = flatnonzero(b < 0x80)
+    if not len(ends):
+        return zeros((0, ncols), dtype=int64)
+    starts = concatenate(([0], ends[:-1] + 1))
+    # byte k of a varint holds bits 7k..7k+6
+    k = arange(ends[-1] + 1) - repeat(starts, ends - starts + 1)
+    z = add.reduceat((b[:ends[-1] + 1] & 0x7F).astype(int64) << (7 * k), starts)
+    rows = ((z >> 1) ^ -(z & 1)).reshape(-1, ncols)
+    # rows per frame (every frame holds whole rows)
+    lens = diff(searchsorted(ends, cumsum([0] + [len(p) for p in payloads]))) // ncols
+    lens = lens[lens > 0]
+    first = concatenate(([0], cumsum(lens)[:-1]))
+    for j, order in enumerate(orders):
+        if not order:
+            continue
+        col = rows[:, j].copy()
+        x0 = col[first]
+        col[first] = 0
+        for _ in range(order):
+            c = cumsum(col)
+            col = c - repeat(c[first], lens)
+        rows[:, j] = col + repeat(x0, lens)
+    return rows
+
+def _decoded(fn, offset=0):
+    """
+    (meta, fields, rows as floats) of a delta-coded raw segment from byte
+    offset on, or None if fn is not one.
+    """
+    if not fn.endswith('.bjl'):
+        return None
+    with open(fn, 'rb') as f:
+        records = journal.scan(f)
+        _, _, first = next(records, (0, 0, b''))
+        if not first.startswith(b'#'):
+            return None
+        # the header lines, then (in newer logs) the segment's first frame
+        meta, cols, frame = (first.split(b'\n', 2) + [b''])[:3]
+        meta = _meta(io.StringIO(meta.decode() + '\n'))
+        if meta.get('codec') != 'delta':
+            return None
+        fields = cols.decode().strip().split(',')
+        payloads = [frame]
+        if offset:
+            f.seek(offset)
+            records = journal.scan(f)
+            payloads = []
+        rows = _undelta(payloads + [payload for _, _, payload in records], [int(o) for o in meta['orders'].split(',')])
+    return meta, fields, rows / 10.0 ** array([int(d) for d in meta['decimals'].split(',')])
+
+def _blocks(fn, chunk):
+    """(fields, rows as floats) of one log file, at most chunk rows at a time."""
+    coded = _decoded(fn)
+    if coded is not None:
+        _, fields, rows = coded
+        for i in range(0, len(rows), chunk):
+            yield fields, rows[i:i + chunk]
+        return
+    with _open(fn) as file:
+        _meta(file)
+        reader = csv.reader(file)
+        fields = next(reader)
+        while True:
+            rows = [row for _, row in zip(range(chunk), reader)]
+            if not rows:
+                return
+            yield fields, array(rows, dtype=float)
+
+# per-sample timing columns of raw rows, kept out of y
+_TIMING = ('late_ms',)
+
+def _time(t):
+    if isinstance(t, str):
+        t = t.rstrip('Z')
+    return datetime64(t, 'ms')
+
+def tierpath(path:str, tier:int):
+    """Summary file the logger writes for a log, e.g. tierpath('X', 10) -> 'X/10s.csv' (or 'X_10s.csv' next to a single CSV)."""
+    if os.path.isdir(path):
+        return os.path.join(path, f'{tier}s.csv')
+    root, ext = os.path.splitext(path)
+    return f'{root}_{tier}s{ext}'
+
+def tiers(path:str):
+    """Periods (s) of the summary tiers available for a log."""
+    if os.path.isdir(path):
+        folder, pattern = path, r'(\d+)s\.csv'
+    else:
+        root, ext = os.path.splitext(path)
+        folder, stem = os.path.split(root)
+        pattern = re.escape(stem) + r'_(\d+)s' + re.escape(ext)
+    out = []
+    for fn in os.listdir(folder or '.'):
+        m = re.fullmatch(pattern, fn)
+        if m:
+            out.append(int(m.group(1)))
+    return sorted(out)
+
+def segments(path:str, t0=None, t1=None):
+    """
+    Raw segments of a rotated log directory as (file, byte offset) pairs.
+    With t0/t1, index.csv is used to open only the segments (and the part
+    of the first one) that can hold rows in that time window.
+    """
+    files = sorted(fn for fn in os.listdir(path) if re.fullmatch(r'raw_\d+\.(csv|bjl)', fn))
+    with open(os.path.join(path, 'index.csv'), 'r') as file:
+        meta = _meta(file)
+        next(file)
+        idx = array([row for row in csv.reader(file) if len(row) == 3], dtype=int64).reshape(-1, 3)
+    if (t0 is None and t1 is None) or not len(idx):
+        return [(os.path.join(path, fn), 0) for fn in files]
+    base = datetime64(int(meta['epoch_ms']), 'ms')
+    seg, t, off = idx.T
+    lo = 0 if t0 is None else maximum(searchsorted(t, (_time(t0) - base).astype(int64), 'right') - 1, 0)
+    hi = len(t) if t1 is None else maximum(searchsorted(t, (_time(t1) - base).astype(int64), 'right'), 1)
+    out = []
+    for i in range(lo, hi):
+        if not out or out[-1][0] != seg[i]:
+            out.append((seg[i], off[i] if i == lo else 0))
+    # segments written after the last index entry (e.g. power lost)
+    if t1 is None:
+        out += [(n, 0) for n in range(seg[-1] + 1, len(files))]
+    return [(os.path.join(path, files[n]), o) for n, o in out]
+
 class read:
-    def __init__(self, path:str = 'data.csv', x:str='alt'):
-        self.x = []
-        self.y = []
-        with open(path, 'r') as file:
-            reader = csv.DictReader(file)
-            self.headers = reader.fieldnames[1:]
-            for row in reader:
-                data = []
-                self.x.append(float(row[x]))
-                for header in self.headers:
-                    data.append(float(row[header]))
-                self.y.append(data)
-        self.x = array(self.x)
-        self.y = getter(self.headers, array(self.y).T)
+    def __init__(self, path:str = 'data.csv', x:str='alt', tier:int=None, t0=None, t1=None):
+        if tier is not None:
+            path = tierpath(path, tier)
+        if path.endswith('.npz'):
+            # a cache written by save(): already decoded, x as it was saved
+            self._load(path)
+            if t0 is not None or t1 is not None:
+                self.between(t0, t1)
+            return
+        parts = segments(path, t0, t1) if os.path.isdir(path) else [(path, 0)]
+        blocks = []
+        for fn, offset in parts:
+            coded = _decoded(fn, offset)
+            if coded is not None:
+                self.meta, fields, rows = coded
+                blocks.append(rows)
+                continue
+            with _open(fn, offset) as file:
+                self.meta = _meta(file)
+                fields = next(csv.reader(file))
+                blocks.append(array(list(csv.reader(file)), dtype=float).reshape(-1, len(fields)))
+        self.headers = [h for h in fields[1:] if h not in _TIMING]
+        block = concatenate(blocks)
+        self.x = block[:, fields.index(x)]
+        self.y = getter(self.headers, block[:, [fields.index(h) for h in self.headers]].T.copy())
+        # sample lateness (ms past its deadline), None for logs without it
+        self.late = block[:, fields.index('late_ms')].astype(int64) if 'late_ms' in fields else None
+        # borealis logs: epoch base in the header + integer ms offsets per row.
+        # rtc False means the RTC was down and t counts from power-on (1970-01-01).
+        self.t = None
+        self.rtc = self.meta.get('rtc') == '1'
+        if 'epoch_ms' in self.meta and 't_ms' in fields:
+            t_ms = block[:, fields.index('t_ms')].astype(int64)
+            self.t = datetime64(int(self.meta['epoch_ms']), 'ms') + t_ms.astype('timedelta64[ms]')
+        if t0 is not None or t1 is not None:
+            self.between(t0, t1)
+
+    def save(self, fn:str):
+        """Decoded log as an .npz cache (e.g. from tools/offload.py --decode); read(fn) loads it without parsing the log again."""
+        arrays = dict(x=self.x, y=self.y.values(), headers=array(self.headers, dtype=str),
+                      meta_keys=array(list(self.meta), dtype=str),
+                      meta_values=array(list(self.meta.values()), dtype=str))
+        if self.t is not None:
+            arrays['t'] = self.t
+        if self.late is not None:
+            arrays['late'] = self.late
+        savez(fn, **arrays)
+        return fn
+
+    def _load(self, fn):
+        with load(fn) as z:
+            self.headers = [str(h) for h in z['headers']]
+            self.x = z['x']
+            self.y = getter(self.headers, z['y'])
+            self.meta = dict(zip((str(k) for k in z['meta_keys']), (str(v) for v in z['meta_values'])))
+            self.t = z['t'] if 't' in z else None
+            self.late = z['late'] if 'late' in z else None
+        self.rtc = self.meta.get('rtc') == '1'
+
+    def between(self, t0=None, t1=None):
+        """Keep only rows with t0 <= t <= t1 (datetime64 or ISO strings)."""
+        i0 = 0 if t0 is None else searchsorted(self.t, _time(t0), 'left')
+        i1 = len(self.t) if t1 is None else searchsorted(self.t, _time(t1), 'right')
+        self.x = self.x[i0:i1]
+        self.t = self.t[i0:i1]
+        if self.late is not None:
+            self.late = self.late[i0:i1]
+        self.y = getter(self.headers, self.y.values()[:, i0:i1])
+        return self
 
     def zero(self, index=None):
         if index is not None:
             self.y[index] -= self.y[index][0]
 
+def summarize(path:str = 'data.csv', x:str='alt', chunk:int=100000):
+    """
+    One pass over an arbitrarily long CSV in fixed-size chunks:
+    per-column n/mean/std/min/max, median estimate and trend against x.
+    """
+    files = [fn for fn, _ in segments(path)] if os.path.isdir(path) else [path]
+    stats = RunningStats()
+    reg = RunningRegression()
+    med = None
+    for fn in files:
+        for fields, block in _blocks(fn, chunk):
+            headers = [h for h in fields[1:] if h not in _TIMING]
+            ix = fields.index(x)
+            iy = [fields.index(h) for h in headers]
+            if med is None:
+                med = [P2Quantile(0.5) for _ in headers]
+            xs = block[:, ix]
+            ys = block[:, iy]
+            stats.extend(ys)
+            reg.extend(xs, ys)
+            for j in range(len(headers)):
+                med[j].extend(ys[:, j].tolist())
+    out = {}
+    for j, h in enumerate(headers):
+        out[h] = {'n': stats.n, 'mean': stats.mean[j], 'std': stats.std[j],
+                  'min': stats.min[j], 'max': stats.max[j], 'median': med[j].value,
+                  'k': reg.slope[j], 'm': reg.intercept[j], 'r2': reg.r2[j]}
+    return out
+
+LEVELS = ('OK', 'WARNING', 'DEGRADED', 'CRITICAL', 'FATAL')
+
+class events:
+    """
+    Safe-mode fault timeline of a flight: events.csv of one log directory,
+    or of every log directory below path, merged in time order.
+    Each record is one error, or a burst of the same error (count > 1,
+    first at t, last at last).
+    """
+    def __init__(self, path:str):
+        if os.path.isfile(path):
+            files = [path]
+        elif os.path.isfile(os.path.join(path, 'events.csv')):
+            files = [os.path.join(path, 'events.csv')]
+        else:
+            files = sorted(os.path.join(path, d, 'events.csv') for d in os.listdir(path)
+                           if os.path.isfile(os.path.join(path, d, 'events.csv')))
+        t, last, cols = [], [], []
+        for fn in files:
+            with open(fn, 'r') as file:
+                base = int(_meta(file).get('epoch_ms', 0))
+                if next(file, None) is None:
+                    continue
+                rows = [row for row in csv.reader(file) if len(row) == 7]
+            if not rows:
+                continue
+            block = array(rows, dtype=object)
+            t.append(base + block[:, 0].astype(int64))
+            last.append(base + block[:, 1].astype(int64))
+            cols.append(block[:, 2:])
+        block = concatenate(cols) if cols else empty((0, 5), dtype=object)
+        order = argsort(concatenate(t) if t else empty(0, dtype=int64), kind='stable')
+        self.t = (concatenate(t) if t else empty(0, dtype=int64))[order].astype('datetime64[ms]')
+        self.last = (concatenate(last) if last else empty(0, dtype=int64))[order].astype('datetime64[ms]')
+        block = block[order]
+        self.level = block[:, 0].astype(int)
+        self.where = block[:, 1].astype(str)
+        self.type = block[:, 2].astype(str)
+        self.arg = block[:, 3].astype(int)
+        self.count = block[:, 4].astype(int)
+
+    def __len__(self):
+        return len(self.t)
+
+    def totals(self):
+        """Errors per where (bursts counted in full), most frequent first."""
+        out = {}
+        for w, n in zip(self.where, self.count):
+            out[w] = out.get(w, 0) + int(n)
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]))
+
+    def __str__(self):
+        lines = []
+        for i in range(len(self)):
+            level = LEVELS[self.level[i]] if self.level[i] < len(LEVELS) else str(self.level[i])
+            line = f'{self.t[i]}  {level:<8}  {self.where[i]}  {self.type[i]}({self.arg[i]})'
+            if self.count[i] > 1:
+                line += f'  x{self.count[i]} until {self.last[i]}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+def boxstats(y, whis:float=1.5, chunk:int=1 << 20):
+    """
+    Box statistics of every row of y (channels x samples, or a list of
+    equally long columns) for ax.bxp, vectorized over the rows: quartiles
+    from np.partition (linear interpolation, like np.percentile and
+    ax.boxplot), whiskers at the furthest samples within whis * IQR, looked
+    for only in the partitioned outer quarters. No sorting; rows go through
+    in blocks of about chunk values, partitioned in place, so the working
+    copy stays that size however long the flight.
+    Returns a dict of arrays: med, q1, q3, whislo, whishi, mean.
+    """
+    rows, n = len(y), len(y[0])
+    pos = array([0.25, 0.5, 0.75]) * (n - 1)
+    lo = floor(pos).astype(int)
+    hi = minimum(lo + 1, n - 1)
+    frac = pos - lo
+    out = {k: empty(rows) for k in ('med', 'q1', 'q3', 'mean', 'whislo', 'whishi')}
+    step = chunk // n or 1
+    for r in range(0, rows, step):
+        part = array(y[r:r + step], dtype=float)
+        mean = part.mean(axis=1)
+        part.partition(unique(concatenate([lo, hi])), axis=1)
+        # np.percentile's interpolation, to the last bit
+        a, d = part[:, lo], part[:, hi] - part[:, lo]
+        q = where(frac >= 0.5, part[:, hi] - d * (1 - frac), a + d * frac)
+        q1, med, q3 = q.T
+        fence = whis * (q3 - q1)
+        # everything past the upper quartile's order statistics is >= q3, and below the lower one's <= q1
+        upper = part[:, hi[2]:]
+        lower = part[:, :lo[0] + 1]
+        whishi = upper.max(axis=1, where=upper <= (q3 + fence)[:, None], initial=-inf)
+        whislo = lower.min(axis=1, where=lower >= (q1 - fence)[:, None], initial=inf)
+        b = slice(r, r + len(part))
+        out['q1'][b], out['med'][b], out['q3'][b] = q1, med, q3
+        out['mean'][b] = mean
+        # as matplotlib: a whisker never ends inside the box
+        out['whislo'][b] = where(whislo > q1, q1, whislo)
+        out['whishi'][b] = where(whishi < q3, q3, whishi)
+    return out
+
+class spectrum:
+    """
+    Welch power spectral density of equally sampled channels, fed block by
+    block with extend(samples x channels): windows of nperseg samples,
+    overlapping by overlap, mean removed and Hann windowed, every channel of
+    up to batch values' worth of windows in one rfft call. Only the overlap
+    tail is carried from one block to the next, so memory follows the block
+    size, not the flight. psd is one-sided, scaled as a density (unit^2/Hz,
+    as scipy.signal.welch). frames=True also keeps a spectrogram: one PSD
+    per average windows in frames, their centre times (s) in times.
+    """
+    def __init__(self, fs:float, channels:int=1, nperseg:int=256, overlap:float=0.5, *,
+                 frames:bool=False, average:int=1, batch:int=1 << 20):
+        self.fs = fs
+        self.nperseg = nperseg
+        self.step = int(round(nperseg * (1 - overlap))) or 1
+        self.window = 0.5 - 0.5 * cos(2 * pi * arange(nperseg) / nperseg)
+        self.scale = 1 / (fs * (self.window ** 2).sum())
+        self.freqs = fft.rfftfreq(nperseg, 1 / fs)
+        self.n = 0
+        self.average = average
+        self.batch = batch
+        self._sum = zeros((channels, len(self.freqs)))
+        self._tail = empty((0, channels))
+        self._frames = [] if frames else None
+        self._pending = empty((0, channels, len(self.freqs)))
+
+    def _power(self, windows):
+        x = windows - windows.mean(axis=-1, keepdims=True)
+        x *= self.window
+        p = abs(fft.rfft(x, axis=-1)) ** 2 * self.scale
+        # one-sided: the negative frequencies folded in (not DC, not Nyquist)
+        p[..., 1:(self.nperseg + 1) // 2] *= 2
+        return p
+
+    def extend(self, block):
+        block = asarray(block, dtype=float)
+        buf = concatenate([self._tail, block.reshape(len(block), -1)])
+        count = (len(buf) - self.nperseg) // self.step + 1 if len(buf) >= self.nperseg else 0
+        if count:
+            # windows x channels x nperseg, a view into buf
+            windows = sliding_window_view(buf, self.nperseg, axis=0)[::self.step][:count]
+            per = self.batch // (buf.shape[1] * self.nperseg) or 1
+            for k in range(0, count, per):
+                p = self._power(windows[k:k + per])
+                self._sum += p.sum(axis=0)
+                if self._frames is not None:
+                    p = concatenate([self._pending, p])
+                    full = len(p) // self.average * self.average
+                    if full:
+                        self._frames.append(p[:full].reshape(-1, self.average, *p.shape[1:]).mean(axis=1))
+                    self._pending = p[full:]
+            self.n += count
+        self._tail = buf[count * self.step:].copy()
+        return self
+
+    @property
+    def psd(self):
+        """channels x freqs"""
+        return self._sum / (self.n or 1)
+
+    @property
+    def frames(self):
+        """frames x channels x freqs"""
+        if not self._frames:
+            return empty((0,) + self._sum.shape)
+        return concatenate(self._frames)
+
+    @property
+    def times(self):
+        k = arange(len(self.frames)) * self.average + (self.average - 1) / 2
+        return (k * self.step + self.nperseg / 2) / self.fs
+
+def welch(path:str = 'data.csv', fs:float=None, nperseg:int=256, overlap:float=0.5, chunk:int=100000, **kw):
+    """
+    spectrum of every column of an arbitrarily long log, streamed in chunks
+    like summarize (kw: frames, average, batch). fs from the t_ms column if
+    not given. The column names are in .headers.
+    """
+    files = [fn for fn, _ in segments(path)] if os.path.isdir(path) else [path]
+    out = None
+    for fn in files:
+        for fields, block in _blocks(fn, chunk):
+            iy = [i for i, h in enumerate(fields) if i and h not in _TIMING]
+            if out is None:
+                if fs is None:
+                    if 't_ms' not in fields:
+                        raise ValueError(f'{fn}: no t_ms column, fs needed')
+                    fs = 1000 / median(diff(block[:, fields.index('t_ms')]))
+                out = spectrum(fs, len(iy), nperseg, overlap, **kw)
+                out.headers = [fields[i] for i in iy]
+            out.extend(block[:, iy])
+    return out
+
 class plotter:
     def __init__(self, data:read, ft:tuple=None, *, x:bool=None, name:bool=None):
         self.data = data
         self.dict = {}
         self.plots = []
         self.name = name
+        self.ft = ft
+        # showbox statistics per (column, ft, segment edges, whis)
+        self._boxes = {}
         if x is not None:
             self.data.x = x
         mask = slice(None) if ft is None else (ft[0] <= self.data.x) & (self.data.x <= ft[1])
         self.data.x = self.data.x[mask]
         self.data.y = self.data.y.values().T[mask].T
+        if getattr(self.data, 't', None) is not None:
+            self.data.t = self.data.t[mask]
     
     def __update(self, index, target, n):
         if index not in self.dict.keys():
@@ -67,14 +529,9 @@ class plotter:
         self.dict[index][n] = target
     
     def __linreg(self, index):
-        y = self.data.y[index]
-        k = polyfit(self.data.x, y, 1)
-        ymean = mean(y)
-        yhat = polyval(k, self.data.x)
-        sstot = sum((y-ymean)**2)
-        ssres = sum((y - yhat)**2)
-        r2 = 1 - ssres/sstot if sstot != 0 else 1.
-        return [k[0], k[1], r2]
+        reg = RunningRegression()
+        reg.extend(self.data.x, self.data.y[index] if index is not None else self.data.y.T)
+        return [reg.slope, reg.intercept, reg.r2]
 
     def plot(self, index=None):
         if index is not None:
@@ -105,9 +562,11 @@ class plotter:
                 self.__update(index, f'Trendline for {label}:\nk = {k[0]:.4f}\nm = {k[1]:.4f}\nR^2 = {k[2]:.4f}', 3)
 
         else:
+            # all channels in one vectorized pass
+            ks = self.__linreg(None)
             for i in range(len(self.data.y)):
                 label = self.data.headers[i]
-                k = self.__linreg(i)
+                k = [ks[0][i], ks[1][i], ks[2][i]]
                 self.__update(i, k[0]*self.data.x + k[1], 1)
                 if name:
                     self.__update(i, f'Trendline for {label}:\nk = {k[0]:.4f}\nm = {k[1]:.4f}\nR^2 = {k[2]:.4f}', 3)
@@ -128,22 +587,117 @@ class plotter:
         fig.legend()
         plt.show()
     
-    def showbox(self, *, grid:bool=True):
+    def __boxstats(self, indices, edges, whis):
+        """Per column, the box stats of each x segment (one box without edges); cached."""
+        key = lambda i: (i, None if self.ft is None else tuple(self.ft), edges, whis)
+        todo = [i for i in indices if key(i) not in self._boxes]
+        if todo:
+            y = [self.dict[i][0] for i in todo]
+            if edges is None:
+                groups = [None]
+            else:
+                band = digitize(self.data.x, edges[1:-1])
+                inside = (edges[0] <= self.data.x) & (self.data.x <= edges[-1])
+                order = argsort(where(inside, band, len(edges)), kind='stable')
+                ends = cumsum(bincount(band[inside], minlength=len(edges) - 1))
+                groups = split(order, ends)[:len(edges) - 1]
+            boxes = [[] for _ in todo]
+            # segment labels to about 3 significant digits of the whole range
+            digits = 0 if edges is None else int(clip(2 - floor(log10(abs(edges[-1] - edges[0]) or 1)), 0, 6))
+            for g, rows in enumerate(groups):
+                if rows is not None and not len(rows):
+                    continue
+                s = boxstats(y if rows is None else [c[rows] for c in y], whis)
+                label = None if edges is None else f'{edges[g]:.{digits}f}-{edges[g + 1]:.{digits}f}'
+                for j in range(len(todo)):
+                    boxes[j].append(dict({k: v[j] for k, v in s.items()}, fliers=[], label=label))
+            for j, i in enumerate(todo):
+                self._boxes[key(i)] = boxes[j]
+        return [self._boxes[key(i)] for i in indices]
+
+    def showbox(self, segments=None, *, grid:bool=True, whis:float=1.5):
+        """
+        Box plot of the plotted columns from precomputed statistics (see
+        boxstats), cached so a redraw only draws. segments: boxes per x
+        segment (altitude with the default x), one axes per column, as a
+        number of equal segments or the segment edges.
+        """
+        columns = [(i, p[2]) for i, p in self.dict.items() if p[0] is not None]
+        edges = None
+        if segments is not None:
+            x = self.data.x
+            edges = tuple(linspace(x.min(), x.max(), int(segments) + 1) if isscalar(segments) else segments)
+        stats = self.__boxstats([i for i, _ in columns], edges, whis)
+        if edges is None:
+            fig, ax = plt.subplots(label=self.name)
+            axes = [ax]
+            ax.bxp([dict(s[0], label=label) for s, (_, label) in zip(stats, columns)], showfliers=False)
+        else:
+            fig, axes = plt.subplots(1, len(columns), squeeze=False, label=self.name)
+            axes = axes[0]
+            for ax, s, (_, label) in zip(axes, stats, columns):
+                ax.bxp(s, showfliers=False)
+                ax.set_title(label)
+                ax.tick_params(axis='x', labelrotation=90)
+        if grid:
+            for ax in axes:
+                ax.yaxis.grid(alpha=0.3)
+        fig.tight_layout()
+        fig.legend()
+        plt.show()
+
+    def __spectra(self, fs, nperseg, overlap, chunk, **kw):
+        columns = [(p[0], p[2]) for p in self.dict.values() if p[0] is not None]
+        if not columns:
+            raise ValueError('nothing plotted')
+        if fs is None:
+            if getattr(self.data, 't', None) is None:
+                raise ValueError('no time axis (t), fs needed')
+            fs = 1e6 / median(diff(self.data.t).astype('timedelta64[us]').astype(float))
+        s = spectrum(fs, len(columns), nperseg, overlap, **kw)
+        for i in range(0, len(columns[0][0]), chunk):
+            s.extend(column_stack([c[i:i + chunk] for c, _ in columns]))
+        return s, [label for _, label in columns]
+
+    def showpsd(self, fs:float=None, nperseg:int=256, overlap:float=0.5, *, grid:bool=True, chunk:int=100000):
+        """
+        Welch PSD of the plotted columns (see spectrum), one line each. fs
+        (Hz) from the time axis t if not given: the channels must be sampled
+        at a fixed rate.
+        """
+        s, labels = self.__spectra(fs, nperseg, overlap, chunk)
         fig, ax = plt.subplots(label=self.name)
-        label = []
-        q = []
-        for p in self.dict.values():
-            if p[0] is not None:
-                label.append(p[2])
-                q.append(p[0])
-        ax.boxplot(q, showfliers=False)
-        ax.set_xticklabels(label)
+        for j, label in enumerate(labels):
+            ax.semilogy(s.freqs[1:], s.psd[j, 1:], label=label)
+        ax.set_xlabel('Frequency [Hz]')
+        ax.set_ylabel('PSD [unit$^2$/Hz]')
         if grid:
-            ax.yaxis.grid(alpha=0.3)
+            ax.grid(alpha=0.3, which='both')
         fig.tight_layout()
         fig.legend()
         plt.show()
 
+    def showspectrogram(self, fs:float=None, nperseg:int=256, overlap:float=0.5, average:int=1, *,
+                        chunk:int=100000):
+        """
+        Spectrogram of each plotted column (power in dB against time since
+        the first sample and frequency), one axes each; average windows per
+        column of the image.
+        """
+        s, labels = self.__spectra(fs, nperseg, overlap, chunk, frames=True, average=average)
+        fig, ax = plt.subplots(len(labels), 1, squeeze=False, sharex=True, label=self.name)
+        ax = ax[:, 0]
+        db = 10 * log10(s.frames + finfo(float).tiny)
+        for j, label in enumerate(labels):
+            # 100 dB of range: a constant channel is not all floor
+            mesh = ax[j].pcolormesh(s.times, s.freqs, db[:, j].T, shading='nearest', vmin=db[:, j].max() - 100)
+            fig.colorbar(mesh, ax=ax[j], label='dB')
+            ax[j].set_title(label)
+            ax[j].set_ylabel('Frequency [Hz]')
+        ax[-1].set_xlabel('Time [s]')
+        fig.tight_layout()
+        plt.show()
+
     def showdist(self, normal:bool=True, title:bool=False, *, grid:bool=True, res=100):
         q = []
         label = []
@@ -1,6 +1,16 @@
 import matplotlib.pyplot as plt
 from numpy import *
+from numpy.lib.stride_tricks import sliding_window_view
 import csv
+import io
+import os
+import re
+import sys
+
+# onlinestats delas med Pico-firmwaren
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Pico-code', 'lib'))
+from onlinestats import RunningStats, RunningRegression, P2Quantile
+import journal
 
 class getter:
     def __init__(self, headers, y):
@@ -29,37 +39,490 @@ class getter:
     def keys(self):
         return self.headers
 
+def _meta(file):
+    """Läser en valfri "# borealis-log k=v ..."-rad och lämnar filen vid CSV-rubriken."""
+    first = file.readline()
+    if not first.startswith('#'):
+        file.seek(0)
+        return {}
+    return dict(kv.split('=', 1) for kv in first[1:].split() if '=' in kv)
+
+def _open(fn, offset=0):
+    """
+    Loggfil (vanlig CSV eller journalförd .bjl) som textström: rubrikraderna,
+    sedan allt från byteoffset och framåt.
+    """
+    if not fn.endswith('.bjl'):
+        file = open(fn, 'r')
+        if not offset:
+            return file
+        with file:
+            head = file.readline()
+            if head.startswith('#'):
+                head += file.readline()
+            file.seek(offset)
+            return io.StringIO(head + file.read())
+    with open(fn, 'rb') as f:
+        records = journal.scan(f)
+        _, _, first = next(records, (0, 0, b''))
+        if offset:
+            # the first record of a segment holds the header lines
+            nhead = 2 if first.startswith(b'#') else 1
+            first = b''.join(first.splitlines(True)[:nhead])
+            f.seek(offset)
+            records = journal.scan(f)
+        text = first + b''.join(payload for _, _, payload in records)
+    return io.StringIO(text.decode())
+
+def _undelta(payloads, orders):
+    """
+    Rader ur deltakodade journalramar (lib/deltacodec.py) som en int64-
+    matris, alla ramar på en gång: varint-slut från fortsättningsbitarna,
+    zig-zag upphävd, sedan per kolumn lika många kumulativa summor som
+    dess ordning, omstartade vid varje ram.
+    """
+    ncols = len(orders)
+    b = frombuffer(b''.join(payloads), dtype=uint8)
+    ends = flatnonzero(b < 0x80)
+    if not len(ends):
+        return zeros((0, ncols), dtype=int64)
+    starts = concatenate(([0], ends[:-1] + 1))
+    # byte k i en varint bär bitarna 7k..7k+6
+    k = arange(ends[-1] + 1) - repeat(starts, ends - starts + 1)
+    z = add.reduceat((b[:ends[-1] + 1] & 0x7F).astype(int64) << (7 * k), starts)
+    rows = ((z >> 1) ^ -(z & 1)).reshape(-1, ncols)
+    # rader per ram (varje ram har hela rader)
+    lens = diff(searchsorted(ends, cumsum([0] + [len(p) for p in payloads]))) // ncols
+    lens = lens[lens > 0]
+    first = concatenate(([0], cumsum(lens)[:-1]))
+    for j, order in enumerate(orders):
+        if not order:
+            continue
+        col = rows[:, j].copy()
+        x0 = col[first]
+        col[first] = 0
+        for _ in range(order):
+            c = cumsum(col)
+            col = c - repeat(c[first], lens)
+        rows[:, j] = col + repeat(x0, lens)
+    return rows
+
+def _decoded(fn, offset=0):
+    """
+    (meta, fält, rader som flyttal) ur ett deltakodat råsegment från
+    byteoffset och framåt, eller None om fn inte är ett sådant.
+    """
+    if not fn.endswith('.bjl'):
+        return None
+    with open(fn, 'rb') as f:
+        records = journal.scan(f)
+        _, _, first = next(records, (0, 0, b''))
+        if not first.startswith(b'#'):
+            return None
+        # rubrikraderna, sedan (i nyare loggar) segmentets första ram
+        meta, cols, frame = (first.split(b'\n', 2) + [b''])[:3]
+        meta = _meta(io.StringIO(meta.decode() + '\n'))
+        if meta.get('codec') != 'delta':
+            return None
+        fields = cols.decode().strip().split(',')
+        payloads = [frame]
+        if offset:
+            f.seek(offset)
+            records = journal.scan(f)
+            payloads = []
+        rows = _undelta(payloads + [payload for _, _, payload in records], [int(o) for o in meta['orders'].split(',')])
+    return meta, fields, rows / 10.0 ** array([int(d) for d in meta['decimals'].split(',')])
+
+def _blocks(fn, chunk):
+    """(fält, rader som flyttal) ur en loggfil, högst chunk rader åt gången."""
+    coded = _decoded(fn)
+    if coded is not None:
+        _, fields, rows = coded
+        for i in range(0, len(rows), chunk):
+            yield fields, rows[i:i + chunk]
+        return
+    with _open(fn) as file:
+        _meta(file)
+        reader = csv.reader(file)
+        fields = next(reader)
+        while True:
+            rows = [row for _, row in zip(range(chunk), reader)]
+            if not rows:
+                return
+            yield fields, array(rows, dtype=float)
+
+# tidskolumner per mätning i råa rader, hålls utanför y
+_TIMING = ('late_ms',)
+
+def _time(t):
+    if isinstance(t, str):
+        t = t.rstrip('Z')
+    return datetime64(t, 'ms')
+
+def nivåfil(path:str, nivå:int):
+    """Sammanfattningsfil som loggern skriver för en logg, t.ex. nivåfil('X', 10) -> 'X/10s.csv' (eller 'X_10s.csv' bredvid en enskild CSV)."""
+    if os.path.isdir(path):
+        return os.path.join(path, f'{nivå}s.csv')
+    root, ext = os.path.splitext(path)
+    return f'{root}_{nivå}s{ext}'
+
+def nivåer(path:str):
+    """Perioder (s) för de sammanfattningsnivåer som finns för en logg."""
+    if os.path.isdir(path):
+        folder, pattern = path, r'(\d+)s\.csv'
+    else:
+        root, ext = os.path.splitext(path)
+        folder, stem = os.path.split(root)
+        pattern = re.escape(stem) + r'_(\d+)s' + re.escape(ext)
+    out = []
+    for fn in os.listdir(folder or '.'):
+        m = re.fullmatch(pattern, fn)
+        if m:
+            out.append(int(m.group(1)))
+    return sorted(out)
+
+def segment(path:str, t0=None, t1=None):
+    """
+    Rådatasegment i en roterad loggkatalog som par (fil, byteoffset).
+    Med t0/t1 används index.csv för att bara öppna de segment (och den del
+    av det första) som kan innehålla rader i tidsfönstret.
+    """
+    files = sorted(fn for fn in os.listdir(path) if re.fullmatch(r'raw_\d+\.(csv|bjl)', fn))
+    with open(os.path.join(path, 'index.csv'), 'r') as file:
+        meta = _meta(file)
+        next(file)
+        idx = array([row for row in csv.reader(file) if len(row) == 3], dtype=int64).reshape(-1, 3)
+    if (t0 is None and t1 is None) or not len(idx):
+        return [(os.path.join(path, fn), 0) for fn in files]
+    base = datetime64(int(meta['epoch_ms']), 'ms')
+    seg, t, off = idx.T
+    lo = 0 if t0 is None else maximum(searchsorted(t, (_time(t0) - base).astype(int64), 'right') - 1, 0)
+    hi = len(t) if t1 is None else maximum(searchsorted(t, (_time(t1) - base).astype(int64), 'right'), 1)
+    out = []
+    for i in range(lo, hi):
+        if not out or out[-1][0] != seg[i]:
+            out.append((seg[i], off[i] if i == lo else 0))
+    # segment skrivna efter sista indexraden (t.ex. strömavbrott)
+    if t1 is None:
+        out += [(n, 0) for n in range(seg[-1] + 1, len(files))]
+    return [(os.path.join(path, files[n]), o) for n, o in out]
+
 class läs:
-    def __init__(self, path:str = 'data.csv', x:str='alt'):
-        self.x = []
-        self.y = []
-        with open(path, 'r') as file:
-            reader = csv.DictReader(file)
-            self.headers = reader.fieldnames[1:]
-            for row in reader:
-                data = []
-                self.x.append(float(row[x]))
-                for header in self.headers:
-                    data.append(float(row[header]))
-                self.y.append(data)
-        self.x = array(self.x)
-        self.y = getter(self.headers, array(self.y).T)
+    def __init__(self, path:str = 'data.csv', x:str='alt', nivå:int=None, t0=None, t1=None):
+        if nivå is not None:
+            path = nivåfil(path, nivå)
+        if path.endswith('.npz'):
+            # en cache från spara(): redan avkodad, x som den sparades
+            self._load(path)
+            if t0 is not None or t1 is not None:
+                self.mellan(t0, t1)
+            return
+        parts = segment(path, t0, t1) if os.path.isdir(path) else [(path, 0)]
+        blocks = []
+        for fn, offset in parts:
+            coded = _decoded(fn, offset)
+            if coded is not None:
+                self.meta, fields, rows = coded
+                blocks.append(rows)
+                continue
+            with _open(fn, offset) as file:
+                self.meta = _meta(file)
+                fields = next(csv.reader(file))
+                blocks.append(array(list(csv.reader(file)), dtype=float).reshape(-1, len(fields)))
+        self.headers = [h for h in fields[1:] if h not in _TIMING]
+        block = concatenate(blocks)
+        self.x = block[:, fields.index(x)]
+        self.y = getter(self.headers, block[:, [fields.index(h) for h in self.headers]].T.copy())
+        # mätningens försening (ms efter sin deadline), None för loggar utan den
+        self.late = block[:, fields.index('late_ms')].astype(int64) if 'late_ms' in fields else None
+        # borealis-loggar: epokbas i filhuvudet + heltal ms per rad.
+        # rtc False betyder att RTC:n var nere och t räknas från uppstart (1970-01-01).
+        self.t = None
+        self.rtc = self.meta.get('rtc') == '1'
+        if 'epoch_ms' in self.meta and 't_ms' in fields:
+            t_ms = block[:, fields.index('t_ms')].astype(int64)
+            self.t = datetime64(int(self.meta['epoch_ms']), 'ms') + t_ms.astype('timedelta64[ms]')
+        if t0 is not None or t1 is not None:
+            self.mellan(t0, t1)
+
+    def spara(self, fn:str):
+        """Avkodad logg som .npz-cache (t.ex. från tools/offload.py --decode); läs(fn) laddar den utan att tolka loggen igen."""
+        arrays = dict(x=self.x, y=self.y.values(), headers=array(self.headers, dtype=str),
+                      meta_keys=array(list(self.meta), dtype=str),
+                      meta_values=array(list(self.meta.values()), dtype=str))
+        if self.t is not None:
+            arrays['t'] = self.t
+        if self.late is not None:
+            arrays['late'] = self.late
+        savez(fn, **arrays)
+        return fn
+
+    def _load(self, fn):
+        with load(fn) as z:
+            self.headers = [str(h) for h in z['headers']]
+            self.x = z['x']
+            self.y = getter(self.headers, z['y'])
+            self.meta = dict(zip((str(k) for k in z['meta_keys']), (str(v) for v in z['meta_values'])))
+            self.t = z['t'] if 't' in z else None
+            self.late = z['late'] if 'late' in z else None
+        self.rtc = self.meta.get('rtc') == '1'
+
+    def mellan(self, t0=None, t1=None):
+        """Behåll bara rader med t0 <= t <= t1 (datetime64 eller ISO-strängar)."""
+        i0 = 0 if t0 is None else searchsorted(self.t, _time(t0), 'left')
+        i1 = len(self.t) if t1 is None else searchsorted(self.t, _time(t1), 'right')
+        self.x = self.x[i0:i1]
+        self.t = self.t[i0:i1]
+        if self.late is not None:
+            self.late = self.late[i0:i1]
+        self.y = getter(self.headers, self.y.values()[:, i0:i1])
+        return self
 
     def nollställ(self, index=None):
         if index is not None:
             self.y[index] -= self.y[index][0]
 
+def sammanfatta(path:str = 'data.csv', x:str='alt', chunk:int=100000):
+    """
+    Ett pass genom en godtyckligt lång CSV i bitar av fast storlek:
+    n/medel/std/min/max, medianuppskattning och trend mot x per kolumn.
+    """
+    files = [fn for fn, _ in segment(path)] if os.path.isdir(path) else [path]
+    stats = RunningStats()
+    reg = RunningRegression()
+    med = None
+    for fn in files:
+        for fields, block in _blocks(fn, chunk):
+            headers = [h for h in fields[1:] if h not in _TIMING]
+            ix = fields.index(x)
+            iy = [fields.index(h) for h in headers]
+            if med is None:
+                med = [P2Quantile(0.5) for _ in headers]
+            xs = block[:, ix]
+            ys = block[:, iy]
+            stats.extend(ys)
+            reg.extend(xs, ys)
+            for j in range(len(headers)):
+                med[j].extend(ys[:, j].tolist())
+    out = {}
+    for j, h in enumerate(headers):
+        out[h] = {'n': stats.n, 'mean': stats.mean[j], 'std': stats.std[j],
+                  'min': stats.min[j], 'max': stats.max[j], 'median': med[j].value,
+                  'k': reg.slope[j], 'm': reg.intercept[j], 'r2': reg.r2[j]}
+    return out
+
+NIVÅER = ('OK', 'WARNING', 'DEGRADED', 'CRITICAL', 'FATAL')
+
+class händelser:
+    """
+    Felhistoriken (safe mode) för en flygning: events.csv i en loggmapp,
+    eller i alla loggmappar under path, sammanslagna i tidsordning.
+    Varje post är ett fel, eller en serie av samma fel (count > 1, första
+    vid t, sista vid last).
+    """
+    def __init__(self, path:str):
+        if os.path.isfile(path):
+            files = [path]
+        elif os.path.isfile(os.path.join(path, 'events.csv')):
+            files = [os.path.join(path, 'events.csv')]
+        else:
+            files = sorted(os.path.join(path, d, 'events.csv') for d in os.listdir(path)
+                           if os.path.isfile(os.path.join(path, d, 'events.csv')))
+        t, last, cols = [], [], []
+        for fn in files:
+            with open(fn, 'r') as file:
+                base = int(_meta(file).get('epoch_ms', 0))
+                if next(file, None) is None:
+                    continue
+                rows = [row for row in csv.reader(file) if len(row) == 7]
+            if not rows:
+                continue
+            block = array(rows, dtype=object)
+            t.append(base + block[:, 0].astype(int64))
+            last.append(base + block[:, 1].astype(int64))
+            cols.append(block[:, 2:])
+        block = concatenate(cols) if cols else empty((0, 5), dtype=object)
+        order = argsort(concatenate(t) if t else empty(0, dtype=int64), kind='stable')
+        self.t = (concatenate(t) if t else empty(0, dtype=int64))[order].astype('datetime64[ms]')
+        self.last = (concatenate(last) if last else empty(0, dtype=int64))[order].astype('datetime64[ms]')
+        block = block[order]
+        self.level = block[:, 0].astype(int)
+        self.where = block[:, 1].astype(str)
+        self.type = block[:, 2].astype(str)
+        self.arg = block[:, 3].astype(int)
+        self.count = block[:, 4].astype(int)
+
+    def __len__(self):
+        return len(self.t)
+
+    def summor(self):
+        """Antal fel per where (serier räknas fullt), vanligast först."""
+        out = {}
+        for w, n in zip(self.where, self.count):
+            out[w] = out.get(w, 0) + int(n)
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]))
+
+    def __str__(self):
+        lines = []
+        for i in range(len(self)):
+            nivå = NIVÅER[self.level[i]] if self.level[i] < len(NIVÅER) else str(self.level[i])
+            line = f'{self.t[i]}  {nivå:<8}  {self.where[i]}  {self.type[i]}({self.arg[i]})'
+            if self.count[i] > 1:
+                line += f'  x{self.count[i]} till {self.last[i]}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+def lådstatistik(y, whis:float=1.5, chunk:int=1 << 20):
+    """
+    Lådstatistik för varje rad i y (kanaler x mätvärden, eller en lista med
+    lika långa kolumner) till ax.bxp, vektoriserad över raderna: kvartiler
+    ur np.partition (linjär interpolation, som np.percentile och
+    ax.boxplot), morrhår vid de yttersta värdena inom whis * IQR, sökta bara
+    i de partitionerade yttre fjärdedelarna. Ingen sortering; raderna tas i
+    block om ungefär chunk värden, partitionerade på plats, så arbetskopian
+    håller den storleken hur lång flygningen än är.
+    Returnerar en dict med arrayer: med, q1, q3, whislo, whishi, mean.
+    """
+    rows, n = len(y), len(y[0])
+    pos = array([0.25, 0.5, 0.75]) * (n - 1)
+    lo = floor(pos).astype(int)
+    hi = minimum(lo + 1, n - 1)
+    frac = pos - lo
+    out = {k: empty(rows) for k in ('med', 'q1', 'q3', 'mean', 'whislo', 'whishi')}
+    step = chunk // n or 1
+    for r in range(0, rows, step):
+        part = array(y[r:r + step], dtype=float)
+        mean = part.mean(axis=1)
+        part.partition(unique(concatenate([lo, hi])), axis=1)
+        # np.percentiles interpolation, till sista biten
+        a, d = part[:, lo], part[:, hi] - part[:, lo]
+        q = where(frac >= 0.5, part[:, hi] - d * (1 - frac), a + d * frac)
+        q1, med, q3 = q.T
+        fence = whis * (q3 - q1)
+        # allt bortom övre kvartilens ordningsstatistika är >= q3, och under den undre kvartilens <= q1
+        upper = part[:, hi[2]:]
+        lower = part[:, :lo[0] + 1]
+        whishi = upper.max(axis=1, where=upper <= (q3 + fence)[:, None], initial=-inf)
+        whislo = lower.min(axis=1, where=lower >= (q1 - fence)[:, None], initial=inf)
+        b = slice(r, r + len(part))
+        out['q1'][b], out['med'][b], out['q3'][b] = q1, med, q3
+        out['mean'][b] = mean
+        # som matplotlib: ett morrhår slutar aldrig inne i lådan
+        out['whislo'][b] = where(whislo > q1, q1, whislo)
+        out['whishi'][b] = where(whishi < q3, q3, whishi)
+    return out
+
+class spektrum:
+    """
+    Welch-effekttäthetsspektrum för kanaler med jämn samplingstakt, matat
+    block för block med extend(mätvärden x kanaler): fönster om nperseg
+    värden som överlappar med overlap, medelvärdet borttaget och
+    Hann-fönstrade, alla kanaler för upp till batch värden fönster i ett
+    rfft-anrop. Bara överlappssvansen följer med från ett block till nästa,
+    så minnet följer blockstorleken, inte flygningen. psd är ensidig och
+    skalad som täthet (enhet^2/Hz, som scipy.signal.welch). frames=True
+    sparar också ett spektrogram: ett PSD per average fönster i frames,
+    deras mittider (s) i times.
+    """
+    def __init__(self, fs:float, channels:int=1, nperseg:int=256, overlap:float=0.5, *,
+                 frames:bool=False, average:int=1, batch:int=1 << 20):
+        self.fs = fs
+        self.nperseg = nperseg
+        self.step = int(round(nperseg * (1 - overlap))) or 1
+        self.window = 0.5 - 0.5 * cos(2 * pi * arange(nperseg) / nperseg)
+        self.scale = 1 / (fs * (self.window ** 2).sum())
+        self.freqs = fft.rfftfreq(nperseg, 1 / fs)
+        self.n = 0
+        self.average = average
+        self.batch = batch
+        self._sum = zeros((channels, len(self.freqs)))
+        self._tail = empty((0, channels))
+        self._frames = [] if frames else None
+        self._pending = empty((0, channels, len(self.freqs)))
+
+    def _power(self, windows):
+        x = windows - windows.mean(axis=-1, keepdims=True)
+        x *= self.window
+        p = abs(fft.rfft(x, axis=-1)) ** 2 * self.scale
+        # ensidigt: de negativa frekvenserna invikta (inte DC, inte Nyquist)
+        p[..., 1:(self.nperseg + 1) // 2] *= 2
+        return p
+
+    def extend(self, block):
+        block = asarray(block, dtype=float)
+        buf = concatenate([self._tail, block.reshape(len(block), -1)])
+        count = (len(buf) - self.nperseg) // self.step + 1 if len(buf) >= self.nperseg else 0
+        if count:
+            # fönster x kanaler x nperseg, en vy in i buf
+            windows = sliding_window_view(buf, self.nperseg, axis=0)[::self.step][:count]
+            per = self.batch // (buf.shape[1] * self.nperseg) or 1
+            for k in range(0, count, per):
+                p = self._power(windows[k:k + per])
+                self._sum += p.sum(axis=0)
+                if self._frames is not None:
+                    p = concatenate([self._pending, p])
+                    full = len(p) // self.average * self.average
+                    if full:
+                        self._frames.append(p[:full].reshape(-1, self.average, *p.shape[1:]).mean(axis=1))
+                    self._pending = p[full:]
+            self.n += count
+        self._tail = buf[count * self.step:].copy()
+        return self
+
+    @property
+    def psd(self):
+        """kanaler x frekvenser"""
+        return self._sum / (self.n or 1)
+
+    @property
+    def frames(self):
+        """bilder x kanaler x frekvenser"""
+        if not self._frames:
+            return empty((0,) + self._sum.shape)
+        return concatenate(self._frames)
+
+    @property
+    def times(self):
+        k = arange(len(self.frames)) * self.average + (self.average - 1) / 2
+        return (k * self.step + self.nperseg / 2) / self.fs
+
+def welch(path:str = 'data.csv', fs:float=None, nperseg:int=256, overlap:float=0.5, chunk:int=100000, **kw):
+    """
+    spektrum för varje kolumn i en godtyckligt lång logg, strömmad i bitar
+    som sammanfatta (kw: frames, average, batch). fs ur t_ms-kolumnen om den
+    inte anges. Kolumnnamnen finns i .headers.
+    """
+    files = [fn for fn, _ in segment(path)] if os.path.isdir(path) else [path]
+    out = None
+    for fn in files:
+        for fields, block in _blocks(fn, chunk):
+            iy = [i for i, h in enumerate(fields) if i and h not in _TIMING]
+            if out is None:
+                if fs is None:
+                    if 't_ms' not in fields:
+                        raise ValueError(f'{fn}: ingen t_ms-kolumn, fs behövs')
+                    fs = 1000 / median(diff(block[:, fields.index('t_ms')]))
+                out = spektrum(fs, len(iy), nperseg, overlap, **kw)
+                out.headers = [fields[i] for i in iy]
+            out.extend(block[:, iy])
+    return out
+
 class grafritare:
     def __init__(self, data:läs, ft:tuple=None, *, namn:bool=None, x:bool=None):
         self.data = data
         self.dict = {}
         self.plots = []
         self.name = namn
+        self.ft = ft
+        # visalådagram-statistik per (kolumn, ft, segmentgränser, whis)
+        self._boxes = {}
         if x is not None:
             self.data.x = x
         mask = slice(None) if ft is None else (ft[0] <= self.data.x) & (self.data.x <= ft[1])
         self.data.x = self.data.x[mask]
         self.data.y = self.data.y.values().T[mask].T
+        if getattr(self.data, 't', None) is not None:
+            self.data.t = self.data.t[mask]
     
     def __update(self, index, target, n):
         if index not in self.dict.keys():
@@ -67,14 +530,9 @@ class grafritare:
         self.dict[index][n] = target
     
     def __linreg(self, index):
-        y = self.data.y[index]
-        k = polyfit(self.data.x, y, 1)
-        ymean = mean(y)
-        yhat = polyval(k, self.data.x)
-        sstot = sum((y-ymean)**2)
-        ssres = sum((y - yhat)**2)
-        r2 = 1 - ssres/sstot if sstot != 0 else 1.
-        return [k[0], k[1], r2]
+        reg = RunningRegression()
+        reg.extend(self.data.x, self.data.y[index] if index is not None else self.data.y.T)
+        return [reg.slope, reg.intercept, reg.r2]
 
     def rita(self, index=None):
         if index is not None:
@@ -101,15 +559,17 @@ class grafritare:
             
             k = self.__linreg(index)
             self.__update(index, k[0]*self.data.x + k[1], 1)
-            if name:
+            if namn:
                 self.__update(index, f'Trendline for {label}:\nk = {k[0]:.4f}\nm = {k[1]:.4f}\nR^2 = {k[2]:.4f}', 3)
 
         else:
+            # alla kanaler i ett vektoriserat pass
+            ks = self.__linreg(None)
             for i in range(len(self.data.y)):
                 label = self.data.headers[i]
-                k = self.__linreg(i)
+                k = [ks[0][i], ks[1][i], ks[2][i]]
                 self.__update(i, k[0]*self.data.x + k[1], 1)
-                if name:
+                if namn:
                     self.__update(i, f'Trendline for {label}:\nk = {k[0]:.4f}\nm = {k[1]:.4f}\nR^2 = {k[2]:.4f}', 3)
 
     def visa(self, *, grid:bool=True):
@@ -128,22 +588,117 @@ class grafritare:
         fig.legend()
         plt.show()
     
-    def visalådagram(self, *, grid:bool=True):
+    def __boxstats(self, indices, edges, whis):
+        """Per kolumn lådstatistiken för varje x-segment (en låda utan gränser); cachad."""
+        key = lambda i: (i, None if self.ft is None else tuple(self.ft), edges, whis)
+        todo = [i for i in indices if key(i) not in self._boxes]
+        if todo:
+            y = [self.dict[i][0] for i in todo]
+            if edges is None:
+                groups = [None]
+            else:
+                band = digitize(self.data.x, edges[1:-1])
+                inside = (edges[0] <= self.data.x) & (self.data.x <= edges[-1])
+                order = argsort(where(inside, band, len(edges)), kind='stable')
+                ends = cumsum(bincount(band[inside], minlength=len(edges) - 1))
+                groups = split(order, ends)[:len(edges) - 1]
+            boxes = [[] for _ in todo]
+            # segmentetiketter med ungefär 3 värdesiffror av hela intervallet
+            digits = 0 if edges is None else int(clip(2 - floor(log10(abs(edges[-1] - edges[0]) or 1)), 0, 6))
+            for g, rows in enumerate(groups):
+                if rows is not None and not len(rows):
+                    continue
+                s = lådstatistik(y if rows is None else [c[rows] for c in y], whis)
+                label = None if edges is None else f'{edges[g]:.{digits}f}-{edges[g + 1]:.{digits}f}'
+                for j in range(len(todo)):
+                    boxes[j].append(dict({k: v[j] for k, v in s.items()}, fliers=[], label=label))
+            for j, i in enumerate(todo):
+                self._boxes[key(i)] = boxes[j]
+        return [self._boxes[key(i)] for i in indices]
+
+    def visalådagram(self, segment=None, *, grid:bool=True, whis:float=1.5):
+        """
+        Lådagram för de ritade kolumnerna ur förberäknad statistik (se
+        lådstatistik), cachad så att en omritning bara ritar. segment: lådor
+        per x-segment (höjd med standard-x), en axel per kolumn, som ett antal
+        lika stora segment eller segmentgränserna.
+        """
+        columns = [(i, p[2]) for i, p in self.dict.items() if p[0] is not None]
+        edges = None
+        if segment is not None:
+            x = self.data.x
+            edges = tuple(linspace(x.min(), x.max(), int(segment) + 1) if isscalar(segment) else segment)
+        stats = self.__boxstats([i for i, _ in columns], edges, whis)
+        if edges is None:
+            fig, ax = plt.subplots(label=self.name)
+            axes = [ax]
+            ax.bxp([dict(s[0], label=label) for s, (_, label) in zip(stats, columns)], showfliers=False)
+        else:
+            fig, axes = plt.subplots(1, len(columns), squeeze=False, label=self.name)
+            axes = axes[0]
+            for ax, s, (_, label) in zip(axes, stats, columns):
+                ax.bxp(s, showfliers=False)
+                ax.set_title(label)
+                ax.tick_params(axis='x', labelrotation=90)
+        if grid:
+            for ax in axes:
+                ax.yaxis.grid(alpha=0.3)
+        fig.tight_layout()
+        fig.legend()
+        plt.show()
+
+    def __spectra(self, fs, nperseg, overlap, chunk, **kw):
+        columns = [(p[0], p[2]) for p in self.dict.values() if p[0] is not None]
+        if not columns:
+            raise ValueError('inget plottat')
+        if fs is None:
+            if getattr(self.data, 't', None) is None:
+                raise ValueError('ingen tidsaxel (t), fs behövs')
+            fs = 1e6 / median(diff(self.data.t).astype('timedelta64[us]').astype(float))
+        s = spektrum(fs, len(columns), nperseg, overlap, **kw)
+        for i in range(0, len(columns[0][0]), chunk):
+            s.extend(column_stack([c[i:i + chunk] for c, _ in columns]))
+        return s, [label for _, label in columns]
+
+    def visapsd(self, fs:float=None, nperseg:int=256, overlap:float=0.5, *, grid:bool=True, chunk:int=100000):
+        """
+        Welch-PSD för de ritade kolumnerna (se spektrum), en linje var. fs
+        (Hz) ur tidsaxeln t om den inte anges: kanalerna måste vara samplade
+        med fast takt.
+        """
+        s, labels = self.__spectra(fs, nperseg, overlap, chunk)
         fig, ax = plt.subplots(label=self.name)
-        label = []
-        q = []
-        for p in self.dict.values():
-            if p[0] is not None:
-                label.append(p[2])
-                q.append(p[0])
-        ax.boxplot(q, showfliers=False)
-        ax.set_xticklabels(label)
+        for j, label in enumerate(labels):
+            ax.semilogy(s.freqs[1:], s.psd[j, 1:], label=label)
+        ax.set_xlabel('Frekvens [Hz]')
+        ax.set_ylabel('PSD [enhet$^2$/Hz]')
         if grid:
-            ax.yaxis.grid(alpha=0.3)
+            ax.grid(alpha=0.3, which='both')
         fig.tight_layout()
         fig.legend()
         plt.show()
 
+    def visaspektrogram(self, fs:float=None, nperseg:int=256, overlap:float=0.5, average:int=1, *,
+                        chunk:int=100000):
+        """
+        Spektrogram för varje ritad kolumn (effekt i dB mot tid sedan första
+        mätvärdet och frekvens), en axel var; average fönster per kolumn i
+        bilden.
+        """
+        s, labels = self.__spectra(fs, nperseg, overlap, chunk, frames=True, average=average)
+        fig, ax = plt.subplots(len(labels), 1, squeeze=False, sharex=True, label=self.name)
+        ax = ax[:, 0]
+        db = 10 * log10(s.frames + finfo(float).tiny)
+        for j, label in enumerate(labels):
+            # 100 dB omfång: en konstant kanal blir inte bara golv
+            mesh = ax[j].pcolormesh(s.times, s.freqs, db[:, j].T, shading='nearest', vmin=db[:, j].max() - 100)
+            fig.colorbar(mesh, ax=ax[j], label='dB')
+            ax[j].set_title(label)
+            ax[j].set_ylabel('Frekvens [Hz]')
+        ax[-1].set_xlabel('Tid [s]')
+        fig.tight_layout()
+        plt.show()
+
     def visafödelning(self, normal:bool=True, title:bool=False, *, grid:bool=True, res=100):
         q = []
         label = []